@@ -0,0 +1,108 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+# ------- Match Change Log -------
+# The matches page polls all matches of the current round. Clients that already have the matches of a revision
+# only need the rows that have changed since then (see Tournament.get_match_changes).
+
+log_lock = threading.Lock()
+
+
+def reset_lock() -> None:
+    # The lock may have been held by another thread of the parent while the process forked
+    global log_lock
+    log_lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=reset_lock)
+
+
+class MatchChangeLog:
+    """
+    The rows of the matches of a tournament, together with the change they were last modified in.
+
+    Whenever a request sees a new revision of the tournament, the current rows are compared with the logged ones (:meth:`sync`).
+    Rows that differ are logged with a new change number, rows of matches that are gone are logged as removed.
+    Every revision is mapped to the change number it has been synced at, so the changes since a revision are the rows logged afterwards (:meth:`changes_since`).
+
+    Only the last ``MAX_REVISIONS`` revisions are remembered, and the log starts over with a new stage or round,
+    clients with an unknown revision have to request all matches again.
+    """
+
+    MAX_REVISIONS = 256
+
+    def __init__(self):
+        self.stage: str = None
+        self.rows: Dict[str, dict] = {} # Match ID -> row
+        self.changed: Dict[str, int] = {} # Match ID -> change the row was last modified in
+        self.removed: Dict[str, int] = {} # Match ID -> change the match was removed in
+        self.change = 0
+        self.revisions: OrderedDict = OrderedDict() # Revision -> change
+
+    def sync(self, revision: str, stage: str, rows: List[dict]) -> None:
+        """
+        Logs the rows of the matches at a revision of the tournament. Revisions that have been synced already are ignored.
+
+        Parameters
+        ----------
+        revision : str
+            The revision of the tournament the rows have been built at.
+        stage : str
+            The stage (and round) the matches belong to.
+        rows : List[dict]
+            The rows of all current matches, with their "id".
+        """
+        with log_lock:
+            if revision in self.revisions:
+                return
+
+            if stage != self.stage:
+                # The matches of a new stage or round are all new, older revisions are of no use anymore
+                self.stage = stage
+                self.rows.clear()
+                self.changed.clear()
+                self.removed.clear()
+                self.revisions.clear()
+
+            self.change += 1
+            current = set()
+            for row in rows:
+                current.add(row["id"])
+                if self.rows.get(row["id"]) != row:
+                    self.rows[row["id"]] = row
+                    self.changed[row["id"]] = self.change
+                    self.removed.pop(row["id"], None)
+            for match_id in [match_id for match_id in self.rows if match_id not in current]:
+                del self.rows[match_id]
+                del self.changed[match_id]
+                self.removed[match_id] = self.change
+
+            self.revisions[revision] = self.change
+            while len(self.revisions) > self.MAX_REVISIONS:
+                self.revisions.popitem(last=False)
+
+    def changes_since(self, revision: str) -> Tuple[List[dict], List[str]]:
+        """
+        Returns the matches that have changed since a revision.
+
+        Parameters
+        ----------
+        revision : str
+            The revision the client has seen last.
+
+        Returns
+        -------
+        Tuple[List[dict], List[str]]
+            The rows of the changed matches and the ids of the removed matches, if the revision is known
+        None
+            otherwise
+        """
+        with log_lock:
+            change = self.revisions.get(revision)
+            if change is None:
+                return None
+            changed = [self.rows[match_id] for match_id, modified in self.changed.items() if modified > change]
+            removed = [match_id for match_id, modified in self.removed.items() if modified > change]
+            return changed, removed
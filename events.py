@@ -0,0 +1,107 @@
+import os
+import threading
+
+# ------- Change Notifications -------
+# Event streams (see main.stream_tournament_events) wait for changes of their tournament. Changes made by this process wake them up immediately,
+# changes made by other workers are noticed by checking the tournament every few seconds.
+
+
+class ChangeNotifier:
+    """
+    Wakes up the threads waiting for changes of a tournament.
+
+    Every tournament has a counter, which is incremented with every change made by this process.
+    Waiting threads remember the counter they have seen last and are woken up as soon as it differs.
+
+    The number of open event streams of this process is counted as well, as every stream occupies a thread (see :meth:`open_stream`).
+    """
+
+    def __init__(self):
+        self.changes = {} # tournament id -> number of changes made by this process
+        self.open_streams = 0
+        self.condition = threading.Condition()
+
+        if hasattr(os, 'register_at_fork'):
+            # The lock may have been held by another thread of the parent while the process forked
+            os.register_at_fork(after_in_child=self.reset_lock)
+
+    def reset_lock(self) -> None:
+        self.condition = threading.Condition()
+        self.open_streams = 0 # The streams belong to the threads of the parent
+
+    def open_stream(self, max_streams: int) -> bool:
+        """
+        Reserves a thread for an event stream.
+
+        Parameters
+        ----------
+        max_streams : int
+            The maximum number of open streams of this process.
+
+        Returns
+        -------
+        bool
+            False if the maximum number of streams is open already
+        """
+        with self.condition:
+            if self.open_streams >= max_streams:
+                return False
+            self.open_streams += 1
+            return True
+
+    def close_stream(self) -> None:
+        """
+        Releases the thread reserved by :meth:`open_stream`.
+        """
+        with self.condition:
+            self.open_streams -= 1
+
+    def notify(self, tournament_id: str) -> None:
+        """
+        Wakes up all threads waiting for changes of a tournament.
+
+        Parameters
+        ----------
+        tournament_id : str
+            The id of the changed tournament.
+        """
+        with self.condition:
+            self.changes[tournament_id] = self.changes.get(tournament_id, 0) + 1
+            self.condition.notify_all()
+
+    def changes_of(self, tournament_id: str) -> int:
+        """
+        Returns the current counter of a tournament, to be passed to :meth:`wait`.
+        """
+        with self.condition:
+            return self.changes.get(tournament_id, 0)
+
+    def wait(self, tournament_id: str, seen: int, timeout: float) -> int:
+        """
+        Waits until a tournament is changed by this process, or the timeout has passed.
+
+        Parameters
+        ----------
+        tournament_id : str
+            The id of the tournament.
+        seen : int
+            The counter of the tournament seen last.
+        timeout : float
+            The maximum time to wait in seconds.
+
+        Returns
+        -------
+        int
+            The current counter of the tournament.
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.changes.get(tournament_id, 0) != seen, timeout)
+            return self.changes.get(tournament_id, 0)
+
+    def remove(self, tournament_id: str) -> None:
+        """
+        Removes the counter of a deleted tournament and wakes up its waiting threads.
+        """
+        with self.condition:
+            self.changes.pop(tournament_id, None)
+            self.condition.notify_all()
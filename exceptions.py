@@ -17,4 +17,10 @@ class StageError(Exception):
     pass
 
 class TournamentError(Exception):
+    pass
+
+class JournalError(Exception):
+    pass
+
+class SnapshotError(Exception):
     pass
\ No newline at end of file
@@ -0,0 +1,188 @@
+import heapq
+import logging
+import os
+import threading
+import time
+from typing import Callable
+
+# ------- Logging -------
+try: # Error Catch for Sphinx Documentation
+    # create logger
+    logger = logging.getLogger('janitor')
+    logger.setLevel(logging.DEBUG)
+
+    # create console handler and set level to debug
+    ch = logging.StreamHandler()
+    ch.setLevel(logging.DEBUG)
+
+    # create file handler and set level to debug
+    fh = logging.FileHandler('logs/tournament.log')
+    fh.setLevel(logging.DEBUG)
+
+    # create formatter
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    # add formatter to ch
+    ch.setFormatter(formatter)
+    fh.setFormatter(formatter)
+
+    # add ch to logger
+    logger.addHandler(ch)
+    logger.addHandler(fh)
+
+except FileNotFoundError:
+    pass
+
+
+class Janitor:
+    """
+    Background service expiring tournaments.
+
+    Tournaments are kept in a heap ordered by the time they expire. Every interval, only the tournaments at the top of the heap
+    whose expiry time has passed are looked at. As the expiry time may have been extended in the meantime (e.g. because the tournament was active),
+    it is computed again before a tournament is expired; if it lies in the future, the tournament is simply pushed back into the heap.
+    Tournaments that still exist after they have been expired (e.g. because they have been archived instead) are scheduled again.
+
+    The heap is seeded once when the janitor starts. Afterwards, tournaments are only added by :meth:`schedule`,
+    so the janitor never has to look at tournaments that are not due.
+    """
+
+    def __init__(self, expiry: Callable[[str], float], expire: Callable[[str], bool], interval: int, periodic: Callable[[], None] = None, seed: Callable[[], None] = None):
+        """
+        Parameters
+        ----------
+        expiry : Callable[[str], float]
+            Returns the current expiry time (as a unix timestamp) of a tournament given its id, or None if the tournament does not exist anymore.
+        expire : Callable[[str], bool]
+            Expires a tournament given its id, returns False if the tournament has not been expired after all.
+        interval : int
+            The time between two runs in seconds.
+        periodic : Callable[[], None], optional
+            Called on every run, e.g. to evict idle tournaments from memory.
+        seed : Callable[[], None], optional
+            Called once when the janitor starts, to schedule all existing tournaments.
+        """
+        self.expiry = expiry
+        self.expire = expire
+        self.interval = interval
+        self.periodic = periodic
+        self.seed = seed
+
+        self.heap = [] # (expiry time, tournament id)
+        self.scheduled = {} # Tournament id -> expiry time of its current heap entry, other entries are outdated
+        self.lock = threading.Lock()
+        self.thread = None
+        self.pid = None
+
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self.reset)
+
+    def reset(self) -> None:
+        # The thread does not exist in a forked child and the lock may have been held by it
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def schedule(self, tournament_id: str, expiry: float = None) -> None:
+        """
+        Adds a tournament to the heap, if it is not scheduled yet.
+        A scheduled tournament is only moved if an earlier expiry time is given (e.g. because it is due to be archived).
+
+        Parameters
+        ----------
+        tournament_id : str
+            The id of the tournament.
+        expiry : float, optional
+            The expiry time of the tournament as a unix timestamp. By default, it is computed, unless the tournament is scheduled already.
+        """
+        with self.lock:
+            if tournament_id in self.scheduled and expiry is None:
+                return
+        if expiry is None:
+            expiry = self.expiry(tournament_id)
+            if expiry is None:
+                return
+        with self.lock:
+            if expiry < self.scheduled.get(tournament_id, float("inf")):
+                self.scheduled[tournament_id] = expiry
+                heapq.heappush(self.heap, (expiry, tournament_id))
+
+    def run_once(self, now: float = None) -> int:
+        """
+        Expires all tournaments whose expiry time has passed.
+
+        Parameters
+        ----------
+        now : float, optional
+            The current time as a unix timestamp, by default time.time().
+
+        Returns
+        -------
+        int
+            The number of expired tournaments.
+        """
+        if now is None:
+            now = time.time()
+
+        expired = 0
+        retried = set()
+        while True:
+            with self.lock:
+                if self.heap == [] or self.heap[0][0] > now:
+                    break
+                expiry, tournament_id = heapq.heappop(self.heap)
+                if self.scheduled.get(tournament_id) != expiry:
+                    continue # Outdated entry, the tournament has been moved
+                del self.scheduled[tournament_id]
+            if tournament_id in retried:
+                continue # Scheduled again while it was expired, it is looked at once per run
+
+            try:
+                expiry = self.expiry(tournament_id)
+                if expiry is None:
+                    continue
+                if expiry > now:
+                    self.schedule(tournament_id, expiry)
+                    continue
+                if self.expire(tournament_id):
+                    expired += 1
+                    logger.info(f"Expired tournament {tournament_id}")
+            except Exception as e:
+                logger.error(f"Could not expire tournament {tournament_id}: {e}", exc_info=True)
+            # Scheduled again after this run, as it may still be due (e.g. if it could not be expired)
+            retried.add(tournament_id)
+
+        for tournament_id in retried:
+            try:
+                self.schedule(tournament_id)
+            except Exception as e:
+                logger.error(f"Could not schedule tournament {tournament_id}: {e}", exc_info=True)
+
+        if self.periodic is not None:
+            try:
+                self.periodic()
+            except Exception as e:
+                logger.error(e, exc_info=True)
+        return expired
+
+    def start(self) -> None:
+        """
+        Starts the background thread, if it is not running in this process yet.
+        """
+        if self.thread is not None and self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.thread is not None and self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+            self.thread = threading.Thread(target=self.run, name="janitor", daemon=True)
+            self.thread.start()
+
+    def run(self) -> None:
+        if self.seed is not None:
+            try:
+                self.seed()
+            except Exception as e:
+                logger.error(e, exc_info=True)
+        while True:
+            time.sleep(self.interval)
+            self.run_once()
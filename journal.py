@@ -0,0 +1,359 @@
+import datetime
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Tuple
+
+try:
+    import fcntl
+except ImportError: # Not available on Windows, mutations are then only serialized within one process
+    fcntl = None
+
+from exceptions import JournalError
+
+# ------- Logging -------
+try: # Error Catch for Sphinx Documentation
+    # create logger
+    logger = logging.getLogger('journal')
+    logger.setLevel(logging.DEBUG)
+
+    # create console handler and set level to debug
+    ch = logging.StreamHandler()
+    ch.setLevel(logging.DEBUG)
+
+    # create file handler and set level to debug
+    fh = logging.FileHandler('logs/tournament.log')
+    fh.setLevel(logging.DEBUG)
+
+    # create formatter
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    # add formatter to ch
+    ch.setFormatter(formatter)
+    fh.setFormatter(formatter)
+
+    # add ch to logger
+    logger.addHandler(ch)
+    logger.addHandler(fh)
+
+except FileNotFoundError:
+    pass
+
+
+# ------- Journal -------
+# Every mutation of a tournament is appended as one small JSON line to tournament_cache/<id>.journal.
+# A full snapshot (see snapshot.py) is only written from time to time; loading a tournament means loading the
+# snapshot and replaying all journal records with a sequence number higher than the one stored in the snapshot.
+
+JOURNAL_FOLDER = 'tournament_cache'
+
+# Only these methods of the Tournament class can be journaled and replayed.
+# They must be deterministic for a given state of the tournament.
+JOURNALED_OPERATIONS = (
+    "push_score",
+    "push_scores",
+    "set_active",
+    "prioritize_match",
+    "assign_certain_piste",
+    "remove_piste_assignment",
+    "toggle_piste",
+    "disqualify_fencer",
+    "set_tableau_approved",
+    "add_cookie",
+    "change_fencer_attribute",
+    "subscribe_fencer_to_push_notifications",
+    "unsubscribe_fencer_from_push_notifications",
+)
+
+# Operations that set a timestamp on a match. On replay the original time of the mutation is restored.
+TIMESTAMPED_OPERATIONS = {
+    "push_score": "match_completed_timestamp",
+    "set_active": "match_ongoing_timestamp",
+}
+
+journal_lock = threading.Lock()
+
+# Per tournament locks serializing mutations within this process (see mutation_lock)
+tournament_locks = {}
+tournament_lock_depths = {}
+
+
+def reset_locks() -> None:
+    # Locks held by another thread while the process forks (e.g. gunicorn with --preload) would never be released in the child
+    global journal_lock
+    journal_lock = threading.Lock()
+    tournament_locks.clear()
+    tournament_lock_depths.clear()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=reset_locks)
+
+
+def journal_path(tournament_id: str) -> str:
+    """
+    Returns the path of the journal file of a tournament.
+
+    Parameters
+    ----------
+    tournament_id : str
+        The id of the tournament.
+
+    Returns
+    -------
+    str
+        The path of the journal file.
+    """
+    return f'{JOURNAL_FOLDER}/{tournament_id}.journal'
+
+
+def size(tournament_id: str) -> int:
+    """
+    Returns the size of the journal file of a tournament in bytes (0 if there is no journal).
+
+    Parameters
+    ----------
+    tournament_id : str
+        The id of the tournament.
+    """
+    try:
+        return os.path.getsize(journal_path(tournament_id))
+    except FileNotFoundError:
+        return 0
+
+
+@contextmanager
+def mutation_lock(tournament_id: str):
+    """
+    Context manager serializing mutations of a tournament across threads and (if fcntl is available) across processes,
+    e.g. multiple gunicorn workers. While the lock is held, no other worker appends to the journal or writes a snapshot of the tournament.
+    The lock is reentrant within a thread.
+
+    Parameters
+    ----------
+    tournament_id : str
+        The id of the tournament.
+    """
+    with journal_lock:
+        lock = tournament_locks.setdefault(tournament_id, threading.RLock())
+
+    with lock:
+        depth = tournament_lock_depths.get(tournament_id, 0)
+        tournament_lock_depths[tournament_id] = depth + 1
+        try:
+            if fcntl is None or depth > 0:
+                yield
+            else:
+                if not os.path.exists(JOURNAL_FOLDER):
+                    os.makedirs(JOURNAL_FOLDER)
+                with open(f'{JOURNAL_FOLDER}/{tournament_id}.lock', 'a') as f:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                    try:
+                        yield
+                    finally:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+        finally:
+            tournament_lock_depths[tournament_id] = depth
+
+
+def append(tournament, operation: str, *args, sync: bool = True) -> int:
+    """
+    Appends a mutation record to the journal of a tournament and flushes it to disk.
+    The mutation has to be applied to the tournament object before calling this function.
+    The record is visible to other processes as soon as this function returns, but it is only guaranteed to survive
+    a crash of the operating system after it has been synced to disk.
+
+    Parameters
+    ----------
+    tournament : Tournament
+        The tournament that was mutated.
+    operation : str
+        The name of the Tournament method that was called. Must be one of ``JOURNALED_OPERATIONS``.
+    *args
+        The (JSON serializable) arguments the method was called with.
+    sync : bool, optional
+        Whether the journal is synced to disk (fsync) before returning, by default True.
+        If False, :func:`sync` has to be called later.
+
+    Returns
+    -------
+    int
+        The sequence number of the record.
+
+    Raises
+    ------
+    ValueError
+        if the operation cannot be journaled
+    """
+    if operation not in JOURNALED_OPERATIONS:
+        raise ValueError(f"Operation {operation} cannot be journaled")
+
+    if not os.path.exists(JOURNAL_FOLDER):
+        os.makedirs(JOURNAL_FOLDER)
+
+    if operation in TIMESTAMPED_OPERATIONS:
+        timestamp = getattr(tournament.get_match_by_id(args[0]), TIMESTAMPED_OPERATIONS[operation])
+    else:
+        timestamp = datetime.datetime.now()
+
+    with journal_lock:
+        tournament.journal_sequence += 1
+        tournament.version += 1
+        record = {
+            "seq": tournament.journal_sequence,
+            "op": operation,
+            "args": list(args),
+            "ts": timestamp.isoformat(),
+        }
+        with open(journal_path(tournament.id), 'a') as f:
+            f.write(json.dumps(record) + '\n')
+            f.flush()
+            if sync:
+                os.fsync(f.fileno())
+
+    return record["seq"]
+
+
+def sync(tournament_id: str) -> None:
+    """
+    Syncs the journal of a tournament to disk (fsync), see :func:`append`.
+
+    Parameters
+    ----------
+    tournament_id : str
+        The id of the tournament.
+    """
+    try:
+        with open(journal_path(tournament_id), 'rb') as f:
+            os.fsync(f.fileno())
+    except FileNotFoundError:
+        pass
+
+
+def read(tournament_id: str, offset: int = 0) -> Tuple[list, int]:
+    """
+    Reads the records from the journal of a tournament, starting at a byte offset.
+    A trailing line that was only written partially (e.g. because of a crash, or because another worker is still writing it) is not read.
+
+    Parameters
+    ----------
+    tournament_id : str
+        The id of the tournament.
+    offset : int, optional
+        The byte offset to start reading from, by default 0. Must be the start of a record.
+
+    Returns
+    -------
+    list of dict
+        The records in the order they were written.
+    int
+        The offset after the last complete record.
+
+    Raises
+    ------
+    JournalError
+        if the offset is not the start of a record in the current journal file (e.g. because the journal has been compacted since)
+    """
+    if not os.path.exists(journal_path(tournament_id)):
+        if offset != 0:
+            raise JournalError(f"Journal of tournament {tournament_id} does not exist anymore")
+        return [], 0
+
+    records = []
+    with open(journal_path(tournament_id), 'rb') as f:
+        if offset > 0:
+            f.seek(offset - 1)
+            if f.read(1) != b'\n':
+                raise JournalError(f"Offset {offset} is not the start of a record in the journal of tournament {tournament_id}")
+
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            offset += len(line)
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                logger.warning(f"Skipped corrupt journal record of tournament {tournament_id}")
+    return records, offset
+
+
+def replay(tournament, records: list = None) -> int:
+    """
+    Replays all journal records onto a tournament that are newer than the tournament's ``journal_sequence``.
+
+    Parameters
+    ----------
+    tournament : Tournament
+        The tournament loaded from the last snapshot.
+    records : list of dict, optional
+        The records to replay. By default, the journal of the tournament is read from disk.
+
+    Returns
+    -------
+    int
+        The number of replayed records.
+    """
+    if records is None:
+        records, _ = read(tournament.id)
+
+    replayed = 0
+    for record in records:
+        if record["seq"] <= tournament.journal_sequence:
+            continue
+
+        try:
+            getattr(tournament, record["op"])(*record["args"])
+            if record["op"] in TIMESTAMPED_OPERATIONS:
+                setattr(tournament.get_match_by_id(record["args"][0]), TIMESTAMPED_OPERATIONS[record["op"]], datetime.datetime.fromisoformat(record["ts"]))
+        except Exception as e:
+            logger.error(f"Could not replay journal record {record['seq']} ({record['op']}) of tournament {tournament.id}: {e}", exc_info=True)
+
+        tournament.journal_sequence = record["seq"]
+        tournament.version += 1
+        replayed += 1
+
+    return replayed
+
+
+def truncate(tournament_id: str, sequence: int) -> None:
+    """
+    Removes all records up to a sequence number from the journal of a tournament.
+    This is done after a snapshot containing these records has been written.
+
+    Parameters
+    ----------
+    tournament_id : str
+        The id of the tournament.
+    sequence : int
+        The ``journal_sequence`` of the written snapshot.
+    """
+    with journal_lock:
+        records, _ = read(tournament_id)
+        remaining = [record for record in records if record["seq"] > sequence]
+        if len(remaining) == len(records):
+            return
+        if remaining == []:
+            if os.path.exists(journal_path(tournament_id)):
+                os.remove(journal_path(tournament_id))
+        else:
+            # Rewrite the journal atomically, so that other workers never read a partially rewritten journal
+            with open(journal_path(tournament_id) + '.tmp', 'w') as f:
+                f.writelines(json.dumps(record) + '\n' for record in remaining)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(journal_path(tournament_id) + '.tmp', journal_path(tournament_id))
+
+
+def delete(tournament_id: str) -> None:
+    """
+    Deletes the journal of a tournament.
+
+    Parameters
+    ----------
+    tournament_id : str
+        The id of the tournament.
+    """
+    with journal_lock:
+        if os.path.exists(journal_path(tournament_id)):
+            os.remove(journal_path(tournament_id))
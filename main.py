@@ -7,13 +7,17 @@ try:
     import datetime
     import hashlib
     import hmac
+    import json
     import logging
+    import lzma
     import os
     import pickle
     import subprocess
     import threading
+    import time
     import traceback
-    from typing import List, Literal
+    from contextlib import contextmanager
+    from typing import Callable, List, Literal, Tuple
     import logging.handlers
 
     import bcrypt
@@ -36,14 +40,23 @@ try:
 
     import _version
     import attr_checker
+    from events import ChangeNotifier
     import random_generator
     from exceptions import *
     from fencer import Fencer, Stage, Wildcard
     from match import EliminationMatch, GroupMatch
     from piste import Piste
     from tournament import *
+    import journal
     import log_parser
+    from janitor import Janitor
+    from registry import TournamentRegistry
+    from response_cache import ResponseCache
     import push_notification
+    import snapshot
+    import sqlite_storage
+    import tournament_index
+    from write_behind import WriteBehind
 
 except ModuleNotFoundError:
     raise RequiredLibraryError("Please install all required libraries by running 'pip install -r requirements.txt'")
@@ -93,14 +106,49 @@ except FileNotFoundError:
 
 
 # ------- Tournament Cache -------
-enable_tournament_cache = False
-
-tournament_cache: List[Tournament] = []
-cache_lock = threading.Lock()
+# Loaded tournaments are kept in a registry (see registry.py), so that they do not have to be loaded from disk on every request.
+# If the estimated size of all loaded tournaments exceeds the memory budget, the least recently used tournaments are evicted.
+# Every worker keeps its own cache, changes made by other workers are picked up before a cached tournament is returned (see refresh_tournament).
+enable_tournament_cache = True
+tournament_cache_memory_budget = 64 * 1024 * 1024 # in bytes, estimated by the size of the saved files
+snapshot_size_factor = 1 # The snapshot is the pickled tournament the memory budget was chosen for
+archive_size_factor = 8 # The archive is about 8 times smaller than the snapshot
+
+# ------- SQLite Storage -------
+# If enabled, tournaments are additionally stored in normalized tables of a SQLite database (see sqlite_storage.py).
+# After a mutation only the changed rows are written, and the matches and standings are queried directly from the database.
+enable_sqlite_storage = False
+
+# ------- Durability -------
+# "sync" (default): Every mutation is synced to disk before the response is sent.
+# "write_behind": Mutations are written to the journal immediately (so that other workers see them), but syncing to disk,
+#                 snapshots and the SQLite storage are done in the background, at most once every write_behind_interval.
+#                 If the operating system crashes or the power fails, the mutations of the last write_behind_interval may be lost,
+#                 although their requests (e.g. pushed scores) have already been answered successfully. Only opt in if this is acceptable.
+save_durability: Literal["sync", "write_behind"] = "sync"
+write_behind_interval = 500 # in milliseconds
+
+# ------- Response Cache -------
+# The serialized responses of the polled read endpoints are cached per version of the tournament (see response_cache.py and cached_json).
+enable_response_cache = True
+response_cache_max_entries = 4096
+response_cache = ResponseCache(response_cache_max_entries)
+
+# ------- Event Streams -------
+# Pages subscribe to a Server-Sent Events stream of their tournament instead of polling (see stream_tournament_events).
+# Every open stream occupies a worker thread, so event streams must only be enabled if gunicorn runs threaded workers (e.g. --threads 32),
+# and event_stream_max_streams has to leave enough threads for the other requests. Otherwise the pages poll.
+enable_event_streams = False
+event_stream_max_streams = 16 # per worker, further streams are refused with 503 and the pages poll instead
+event_stream_poll_interval = 1 # in seconds, changes of other workers are noticed within this interval
+event_stream_keep_alive_interval = 15 # in seconds
+event_stream_max_duration = 5 * 60 # in seconds, the browser reconnects afterwards
+change_notifier = ChangeNotifier()
 
 def get_tournament(tournament_id) -> Tournament:
     """
     This function returns a tournament from the tournament cache, given an id.
+    If the tournament is not in the cache, it is loaded from disk and added to the cache.
     If the tournament with the given id does not exist, it returns None.
 
     Parameters
@@ -115,21 +163,16 @@ def get_tournament(tournament_id) -> Tournament:
     None
         if the tournament does not exist
     """
-    global tournament_cache, cache_lock, enable_tournament_cache
-
     if enable_tournament_cache:
-        with cache_lock:
-            for tournament in tournament_cache:
-                if tournament.id == tournament_id:
-                    return tournament
-            return None
+        return tournament_registry.get(tournament_id)
     else:
         return load_tournament(tournament_id)
 
 
 def check_tournament_exists(tournament_id) -> bool:
     """
-    This function checks if a tournament with given id exists in the tournament cache.
+    This function checks if a tournament with given id exists in the tournament cache, the tournament index or on disk.
+    The tournament is never loaded for this.
 
     Parameters
     ----------
@@ -143,20 +186,16 @@ def check_tournament_exists(tournament_id) -> bool:
     False
         if the tournament does not exist
     """
-    global tournament_cache, cache_lock, enable_tournament_cache
-
-    if enable_tournament_cache:
-        with cache_lock:
-            for tournament in tournament_cache:
-                if tournament.id == tournament_id:
-                    return True
-            return False
-    else:
-        return os.path.exists(f'tournament_cache/{tournament_id}.pickle')
+    if enable_tournament_cache and tournament_id in tournament_registry:
+        return True
+    if tournament_id in metadata_index:
+        return True
+    # Tournaments saved by older versions are only added to the index once they are loaded
+    return any(os.path.exists(path) for path in (snapshot_path(tournament_id), archive_path(tournament_id), legacy_snapshot_path(tournament_id)))
 
 
-# ------- Pickeling -------
-# Pickeling is an easy way to save data to a file, so that it stays persistent even if the server has to restart.
+# ------- Snapshots -------
+# Tournaments are saved as snapshots in a versioned format (see snapshot.py), so that they stay persistent even if the server has to restart.
 
 
 
@@ -167,24 +206,245 @@ def create_local_tournament_folder():
     if not os.path.exists('tournament_cache'):
         os.makedirs('tournament_cache')
 
-def save_tournament(tournament: Tournament):
+def snapshot_path(tournament_id: str) -> str:
+    """
+    This function returns the path of the snapshot file of a tournament (see snapshot.py).
+    """
+    return f'tournament_cache/{tournament_id}.snapshot'
+
+def archive_path(tournament_id: str) -> str:
+    """
+    This function returns the path of the archived snapshot of a finished tournament (see :func:`archive_tournament`).
+    """
+    return f'tournament_cache/archive/{tournament_id}.snapshot.xz'
+
+def legacy_snapshot_path(tournament_id: str) -> str:
+    """
+    This function returns the path of the pickled snapshot of a tournament, as saved by older versions.
+    """
+    return f'tournament_cache/{tournament_id}.pickle'
+
+def convert_legacy_snapshot(tournament_id: str):
+    """
+    This function converts the pickled snapshot of a tournament saved by an older version into the current snapshot format.
+
+    Parameters
+    ----------
+    tournament_id : str
+        The id of the tournament to be converted.
+    """
+    with journal.mutation_lock(tournament_id):
+        if os.path.exists(snapshot_path(tournament_id)) or not os.path.exists(legacy_snapshot_path(tournament_id)):
+            return # Already converted by another worker
+
+        with open(legacy_snapshot_path(tournament_id), 'rb') as f:
+            tournament = pickle.load(f)
+        with open(snapshot_path(tournament_id) + '.tmp', 'wb') as f:
+            snapshot.dump(tournament, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(snapshot_path(tournament_id) + '.tmp', snapshot_path(tournament_id))
+        os.remove(legacy_snapshot_path(tournament_id))
+        metadata_index.update(tournament_index.metadata(tournament, os.path.getsize(snapshot_path(tournament_id))))
+        logger.info(f"Converted pickled snapshot of tournament {tournament_id}")
+
+def save_tournament(tournament: Tournament, compaction: bool = False):
     """
     This function saves a tournament to a file, so that it can be loaded again later, even if the server has to restart.
-    This is done by pickeling a tournament object. The file is saved in the /tournaments folder and is named after the tournament id.
+    The tournament is serialized into the snapshot format (see snapshot.py). The file is saved in the /tournament_cache folder and is named after the tournament id.
+    The snapshot is written to a temporary file first, which then atomically replaces the previous snapshot, so that
+    a crash or another worker reading at the same time never sees a partially written snapshot.
+    Once the snapshot is synced to disk, all journal records contained in it are removed from the journal (see :func:`sync_snapshot`).
+    With ``save_durability = "write_behind"``, syncing is done in the background.
+    The metadata of the tournament is updated in the tournament index.
+    If the tournament cache is enabled, the tournament is (re-)added to the cache as well.
+    If the SQLite storage is enabled, all rows of the tournament are rewritten.
 
     Parameters
     ----------
     tournament : Tournament
         The tournament to be saved.
+    compaction : bool, optional
+        True if the snapshot only compacts the journal (see :func:`write_pending`), by default False.
+        The version of the tournament is not changed then, so other workers can keep their cached tournament (see :func:`refresh_tournament`).
+    """
+    create_local_tournament_folder()
+    # Snapshots are saved after mutations that are not journaled (e.g. advancing to the next stage)
+    if not compaction:
+        tournament.version += 1
+    tournament.snapshot_sequence = tournament.journal_sequence
+    with open(snapshot_path(tournament.id) + '.tmp', 'wb') as f:
+        snapshot.dump(tournament, f)
+        f.flush()
+        if save_durability == "sync":
+            os.fsync(f.fileno())
+    os.replace(snapshot_path(tournament.id) + '.tmp', snapshot_path(tournament.id))
+    metadata_index.update(tournament_index.metadata(tournament, os.path.getsize(snapshot_path(tournament.id))))
+    # The due time is computed again, as a tournament that has just finished is due to be archived earlier
+    janitor.schedule(tournament.id, tournament_due_time(tournament.id))
+
+    generation = tournament_generation(tournament.id)
+    if enable_tournament_cache:
+        tournament_registry.add(tournament, generation)
+
+    # Written before the journal is compacted, which stores the new generation for the rows
+    if enable_sqlite_storage:
+        sqlite_storage.write_tournament(tournament, generation)
+
+    if save_durability == "sync":
+        sync_snapshot(tournament.id)
+    else:
+        snapshot_syncer.mark_dirty(tournament.id)
+
+    change_notifier.notify(tournament.id)
+
+def sync_snapshot(tournament_id: str):
+    """
+    This function syncs the snapshot of a tournament to disk (fsync) and removes the journal records contained in it from the journal,
+    except for the records of the last ``journal_compaction_interval`` mutations.
+    The journal is only compacted after the snapshot is synced, so that no mutation is lost if the operating system crashes in between.
+
+    Parameters
+    ----------
+    tournament_id : str
+        The id of the tournament.
+    """
+    with tournament_transaction(tournament_id) as tournament:
+        if tournament is None or not os.path.exists(snapshot_path(tournament_id)):
+            return # Deleted or archived in the meantime
+
+        with open(snapshot_path(tournament_id), 'rb') as f:
+            os.fsync(f.fileno())
+        sync_folder('tournament_cache')
+
+        # A tournament that has been mutated after it was archived is not archived anymore
+        if os.path.exists(archive_path(tournament_id)):
+            os.remove(archive_path(tournament_id))
+        # The records of the last compaction interval are kept, so that other workers that have not replayed them yet
+        # can still do so instead of loading the new snapshot (see refresh_tournament)
+        journal.truncate(tournament_id, tournament.snapshot_sequence - journal_compaction_interval)
+        generation = tournament_generation(tournament_id)
+        if enable_tournament_cache:
+            # The tournament is up to date with the compacted journal, which would otherwise cause a reload on the next request
+            tournament_registry.add(tournament, generation)
+        if enable_sqlite_storage:
+            sqlite_storage.update_generation(tournament, generation)
+
+def sync_folder(folder: str):
+    """
+    This function syncs a folder to disk, so that files renamed or removed in it stay renamed or removed after a crash.
+    """
+    if hasattr(os, 'O_DIRECTORY'): # Syncing the rename is not possible on Windows
+        fd = os.open(folder, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+def snapshot_signature(tournament_id: str) -> tuple:
+    """
+    This function returns a signature of the saved snapshot (or archive) of a tournament, which changes whenever a new snapshot is written.
+
+    Parameters
+    ----------
+    tournament_id : str
+        The id of the tournament.
+
+    Returns
+    -------
+    tuple
+        (inode, modification time in ns, size) of the snapshot file
+    None
+        if the tournament does not exist
+    """
+    for path in (snapshot_path(tournament_id), archive_path(tournament_id)):
+        try:
+            stat = os.stat(path)
+            return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            pass
+    return None
+
+def snapshot_state(tournament_id: str) -> tuple:
+    """
+    This function returns the version and journal sequence of the tournament stored in its snapshot, read from the header of the snapshot (see snapshot.py).
+
+    Parameters
+    ----------
+    tournament_id : str
+        The id of the tournament.
+
+    Returns
+    -------
+    tuple
+        (version, journal sequence) of the stored tournament
+    None
+        if the tournament has no snapshot, or the snapshot does not store them
+    """
+    try:
+        with open(snapshot_path(tournament_id), 'rb') as f:
+            return snapshot.read_state(f)
+    except FileNotFoundError:
+        return None
+
+def tournament_generation(tournament_id: str) -> tuple:
+    """
+    This function returns the generation (snapshot signature, journal size) of a tournament on disk, see :func:`read_tournament`.
+    """
+    return (snapshot_signature(tournament_id), journal.size(tournament_id))
+
+def read_tournament(tournament_id: str) -> Tuple[Tournament, tuple]:
+    """
+    This function loads a tournament from its snapshot (or archive) and journal and returns it together with its generation.
+    The generation (snapshot signature, journal offset) describes the state on disk the tournament was loaded from
+    and is used by :func:`refresh_tournament` to detect changes made by other workers.
+
+    Parameters
+    ----------
+    tournament_id : str
+        The id of the tournament to be loaded.
+
+    Returns
+    -------
+    Tournament object, tuple
+        if the tournament exists
+    None, None
+        if the tournament does not exist
     """
     create_local_tournament_folder()
-    with open(f'tournament_cache/{tournament.id}.pickle', 'wb') as f:
-        pickle.dump(tournament, f)
+    if not os.path.exists(snapshot_path(tournament_id)) and os.path.exists(legacy_snapshot_path(tournament_id)):
+        convert_legacy_snapshot(tournament_id)
+
+    try:
+        with open(snapshot_path(tournament_id), 'rb') as f:
+            # The signature is taken from the opened file, as the snapshot may be replaced by another worker at any time
+            stat = os.fstat(f.fileno())
+            signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            tournament = snapshot.load(f)
+        archived = False
+    except FileNotFoundError:
+        try:
+            with open(archive_path(tournament_id), 'rb') as f:
+                stat = os.fstat(f.fileno())
+                signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+                tournament = snapshot.loads(lzma.decompress(f.read()))
+            archived = True
+            logger.info(f"Loaded tournament {tournament_id} from the archive")
+        except FileNotFoundError:
+            return None, None
+
+    records, offset = journal.read(tournament_id)
+    journal.replay(tournament, records)
+
+    if tournament_id not in metadata_index:
+        metadata_index.update(tournament_index.metadata(tournament, signature[2], archived))
+    return tournament, (signature, offset)
 
 def load_tournament(tournament_id: str) -> Tournament:
     """
     This function loads a tournament from a file, given an id.
-    This is done by pickeling a tournament object. The file is saved in the /tournaments folder and is named after the tournament id.
+    The file is saved in the /tournament_cache folder and is named after the tournament id.
+    Mutations that were journaled after the snapshot was written are replayed onto the loaded tournament.
 
     Parameters
     ----------
@@ -198,46 +458,463 @@ def load_tournament(tournament_id: str) -> Tournament:
     None
         if the tournament does not exist
     """
-    create_local_tournament_folder()
-    if os.path.exists(f'tournament_cache/{tournament_id}.pickle'):
-        with open(f'tournament_cache/{tournament_id}.pickle', 'rb') as f:
-            tournament = pickle.load(f)
-            return tournament
-    else:
-        return None
+    return read_tournament(tournament_id)[0]
+
+def refresh_tournament(tournament: Tournament, generation: tuple) -> Tuple[Tournament, tuple]:
+    """
+    This function brings a cached tournament up to date with the files on disk, which may have been changed by another worker.
+    If only the journal has grown, the new records are replayed onto the cached tournament.
+    If a new snapshot has only compacted the journal, the cached tournament is kept and the remaining records are replayed onto it.
+    If a new snapshot contains other changes, the tournament is loaded again.
+    If nothing has changed, this costs two stat calls.
+
+    Parameters
+    ----------
+    tournament : Tournament
+        The cached tournament.
+    generation : tuple
+        The generation of the cached tournament (see :func:`read_tournament`).
+
+    Returns
+    -------
+    Tournament object, tuple
+        the up to date tournament and its generation
+    None, None
+        if the tournament does not exist anymore
+    """
+    signature, offset = generation
+    if snapshot_signature(tournament.id) == signature and journal.size(tournament.id) == offset:
+        return tournament, generation
+
+    with journal.mutation_lock(tournament.id):
+        current_signature = snapshot_signature(tournament.id)
+        if current_signature is None:
+            return None, None
+
+        if current_signature == signature:
+            try:
+                records, offset = journal.read(tournament.id, offset)
+            except JournalError:
+                records = None
+            
+            if records is not None:
+                new_records = [record for record in records if record["seq"] > tournament.journal_sequence]
+                # Records must follow on the cached state without a gap, otherwise the tournament is loaded again
+                if new_records == [] or new_records[0]["seq"] == tournament.journal_sequence + 1:
+                    replay_records(tournament, new_records)
+                    return tournament, (signature, offset)
+
+        # Every journaled mutation increments both the version and the journal sequence, snapshots after other mutations only the version.
+        # If their difference is the same, the snapshot contains no other mutations than the journaled ones (see save_tournament).
+        state = snapshot_state(tournament.id)
+        if state is not None and state[1] >= tournament.journal_sequence and state[0] - state[1] == tournament.version - tournament.journal_sequence:
+            records, offset = journal.read(tournament.id)
+            new_records = [record for record in records if record["seq"] > tournament.journal_sequence]
+            # Without new records, the snapshot must not be ahead of the cached tournament
+            first_sequence = new_records[0]["seq"] if new_records else state[1] + 1
+            if first_sequence == tournament.journal_sequence + 1:
+                replay_records(tournament, new_records)
+                return tournament, (current_signature, offset)
+
+        loaded, generation = read_tournament(tournament.id)
+        if loaded is not None:
+            # The log only compares the rows of the matches, so the revisions seen before stay valid for ?since= (see change_log.py)
+            loaded.match_log = tournament.match_log
+        return loaded, generation
+
+def replay_records(tournament: Tournament, records: list):
+    """
+    This function replays journal records of other workers onto a cached tournament (see :func:`refresh_tournament`).
+    If the SQLite storage is enabled, the rows they have changed are written with the next mutation of this worker.
+    """
+    journal.replay(tournament, records)
+    if enable_sqlite_storage:
+        for record in records:
+            sqlite_storage.mark_changed(tournament, record["op"], *record["args"])
+
+def estimate_tournament_size(tournament_id: str) -> int:
+    """
+    This function estimates the memory footprint of a tournament by the size of its snapshot (or archive) and journal on disk.
+
+    Parameters
+    ----------
+    tournament_id : str
+        The id of the tournament.
+
+    Returns
+    -------
+    int
+        The estimated size in bytes.
+    """
+    size = 0
+    if os.path.exists(snapshot_path(tournament_id)):
+        size += snapshot_size_factor * os.path.getsize(snapshot_path(tournament_id))
+    elif os.path.exists(archive_path(tournament_id)):
+        size += archive_size_factor * os.path.getsize(archive_path(tournament_id))
+    if os.path.exists(journal.journal_path(tournament_id)):
+        size += os.path.getsize(journal.journal_path(tournament_id))
+    return size
 
 def load_all_tournaments(return_values: bool = False):
     """
-    This function loads all saved tournaments from the /tournaments folder and adds them to the tournament cache.
-    """
-    global tournament_cache, cache_lock
-    tournaments = []
-    with cache_lock:
-        create_local_tournament_folder()
-        for file in os.listdir('tournament_cache'):
-            if file.endswith('.pickle'):
-                with open(f'tournament_cache/{file}', 'rb') as f:
-                    tournament = pickle.load(f)
-                    if tournament is not None:
-                        tournaments.append(tournament)
+    This function loads the saved tournaments from the /tournament_cache folder and adds them to the tournament cache.
+    Using the sizes from the tournament index, only the newest tournaments that fit into the memory budget are loaded,
+    the others (and archived tournaments) are loaded when they are requested. Tournaments that are not in the index yet (saved by older versions) are loaded once to add them to the index.
+
+    Parameters
+    ----------
+    return_values : bool, optional
+        If True, all tournaments are loaded and returned instead of being added to the cache.
+    """
+    create_local_tournament_folder()
+    for file in os.listdir('tournament_cache'):
+        if file.endswith('.snapshot') or file.endswith('.pickle'):
+            tournament_id = file.rsplit('.', 1)[0]
+            if tournament_id not in metadata_index:
+                read_tournament(tournament_id)
+    if os.path.exists('tournament_cache/archive'):
+        for file in os.listdir('tournament_cache/archive'):
+            if file.endswith('.snapshot.xz') and file[:-len('.snapshot.xz')] not in metadata_index:
+                read_tournament(file[:-len('.snapshot.xz')])
+
     if return_values:
-        return tournaments
-    else:
-        tournament_cache = tournaments
+        return [tournament for tournament in (load_tournament(entry["id"]) for entry in metadata_index.all()) if tournament is not None]
+
+    # The newest tournaments are added last, so that they are the last to be evicted
+    entries, size = [], 0
+    for entry in reversed(metadata_index.all()):
+        if entry.get("archived"):
+            continue
+        size += snapshot_size_factor * entry["snapshot_size"]
+        if size > tournament_cache_memory_budget:
+            break
+        entries.insert(0, entry)
+    for entry in entries:
+        tournament_registry.get(entry["id"])
+
 
+def delete_tournament(tournament_id: str):
+    """
+    This function deletes all files of a tournament and removes it from the tournament index and the tournament cache.
+
+    Parameters
+    ----------
+    tournament_id : str
+        The id of the tournament to be deleted.
+    """
+    with journal.mutation_lock(tournament_id):
+        for path in (snapshot_path(tournament_id), archive_path(tournament_id), legacy_snapshot_path(tournament_id)):
+            if os.path.exists(path):
+                os.remove(path)
+        journal.delete(tournament_id)
+        metadata_index.remove(tournament_id)
+        if enable_sqlite_storage:
+            sqlite_storage.delete_tournament(tournament_id)
+    tournament_registry.remove(tournament_id)
+    response_cache.invalidate(tournament_id)
+    change_notifier.remove(tournament_id)
+
+def expire_tournament(tournament_id: str) -> bool:
+    """
+    This function deletes a tournament, if it has expired (see :func:`tournament_expiry_time`).
+    The expiry time is checked again while holding the mutation lock, so that a tournament is never deleted right after a mutation.
+
+    Parameters
+    ----------
+    tournament_id : str
+        The id of the tournament.
+
+    Returns
+    -------
+    bool
+        True if the tournament has been deleted
+    """
+    with journal.mutation_lock(tournament_id):
+        expiry = tournament_expiry_time(tournament_id)
+        if expiry is None or expiry > datetime.datetime.now().timestamp():
+            return False
+        delete_tournament(tournament_id)
+        return True
 
 def delete_old_tournaments():
     """
-    This function deletes all tournament files that are older than 1 day from the /tournaments folder.
+    This function deletes all tournaments that are older than ``tournament_max_age``.
+    The same is done in the background by the janitor, see :func:`tournament_expiry_time`.
     """
-    global tournament_cache, cache_lock
-    with cache_lock:
-        create_local_tournament_folder()
-        for tournament in tournament_cache:
-            # Delete the tournament.pickle file if it is older than 1 day
-            if (datetime.datetime.now() - tournament.created_at).days > 1:
-                os.remove(f'tournament_cache/{tournament.id}.pickle')
-                tournament_cache.remove(tournament)
+    create_local_tournament_folder()
+    schedule_tournaments()
+    janitor.run_once()
+
+
+tournament_registry = TournamentRegistry(read_tournament, refresh_tournament, estimate_tournament_size, tournament_cache_memory_budget)
+metadata_index = tournament_index.TournamentIndex('tournament_cache/index.json')
+
+
+# ------- Janitor -------
+# Tournaments older than tournament_max_age are deleted by a background janitor (see janitor.py).
+# Finished tournaments that have not been active for tournament_archive_delay are moved into a compressed archive,
+# where they are kept for archived_tournament_max_idle_time. Archived tournaments are loaded transparently when they are requested.
+# Cached tournaments that have not been requested for tournament_cache_max_idle_time are evicted from memory.
+tournament_max_age = 2 * 24 * 60 * 60 # in seconds after the creation of the tournament, however active it has been since
+tournament_archive_delay = 60 * 60 # in seconds
+archived_tournament_max_idle_time = 30 * 24 * 60 * 60 # in seconds
+archive_compression = 6 # lzma preset, higher presets need more memory without making the archives of tournaments smaller
+tournament_cache_max_idle_time = 60 * 60 # in seconds
+janitor_interval = 60 # in seconds
+
+def tournament_last_activity(tournament_id: str, entry: dict) -> float:
+    """
+    This function returns the time of the last activity of a tournament, which is the latest of the creation of the tournament,
+    the last snapshot and the last journaled mutation.
+
+    Parameters
+    ----------
+    tournament_id : str
+        The id of the tournament.
+    entry : dict
+        The metadata of the tournament from the tournament index.
+
+    Returns
+    -------
+    float
+        The time of the last activity as a unix timestamp
+    """
+    last_activity = datetime.datetime.fromisoformat(entry["created_at"]).timestamp()
+    # The archive keeps the modification time of the snapshot it was created from
+    for path in (snapshot_path(tournament_id), archive_path(tournament_id), journal.journal_path(tournament_id)):
+        try:
+            last_activity = max(last_activity, os.path.getmtime(path))
+        except FileNotFoundError:
+            pass
+    return last_activity
+
+def tournament_expiry_time(tournament_id: str) -> float:
+    """
+    This function returns the time a tournament expires, which is ``tournament_max_age`` after its creation,
+    or ``archived_tournament_max_idle_time`` after its last activity for archived tournaments (see :func:`tournament_last_activity`).
+
+    Parameters
+    ----------
+    tournament_id : str
+        The id of the tournament.
+
+    Returns
+    -------
+    float
+        The expiry time as a unix timestamp
+    None
+        if the tournament does not exist
+    """
+    entry = metadata_index.get(tournament_id)
+    if entry is None:
+        return None
+
+    if entry.get("archived"):
+        return tournament_last_activity(tournament_id, entry) + archived_tournament_max_idle_time
+    return datetime.datetime.fromisoformat(entry["created_at"]).timestamp() + tournament_max_age
+
+def archive_tournament(tournament_id: str) -> bool:
+    """
+    This function moves a finished tournament into the archive (tournament_cache/archive), which is compressed with lzma
+    and about 8 times smaller than the snapshot. The journal is compacted into the archive, the snapshot is removed and the tournament
+    is evicted from the tournament cache. :func:`get_tournament` loads archived tournaments transparently.
+    If the tournament is mutated again, the next snapshot replaces the archive (see :func:`sync_snapshot`).
+
+    Parameters
+    ----------
+    tournament_id : str
+        The id of the tournament to be archived.
+
+    Returns
+    -------
+    bool
+        True if the tournament has been archived
+    """
+    with tournament_transaction(tournament_id) as tournament:
+        if tournament is None or tournament.stage != Stage.FINISHED or not os.path.exists(snapshot_path(tournament_id)):
+            return False
+
+        # Archiving is no activity, so the archive keeps the time of the last activity
+        last_activity = tournament_last_activity(tournament_id, metadata_index.get(tournament_id) or tournament_index.metadata(tournament, 0))
+        if not os.path.exists('tournament_cache/archive'):
+            os.makedirs('tournament_cache/archive')
+        tournament.snapshot_sequence = tournament.journal_sequence
+        with open(archive_path(tournament_id) + '.tmp', 'wb') as f:
+            f.write(lzma.compress(snapshot.dumps(tournament), preset=archive_compression))
+            f.flush()
+            os.fsync(f.fileno())
+        os.utime(archive_path(tournament_id) + '.tmp', (last_activity, last_activity))
+        os.replace(archive_path(tournament_id) + '.tmp', archive_path(tournament_id))
+        sync_folder('tournament_cache/archive')
+
+        # The snapshot and journal are only removed once the archive is on disk
+        os.remove(snapshot_path(tournament_id))
+        journal.truncate(tournament_id, tournament.snapshot_sequence)
+        metadata_index.update(tournament_index.metadata(tournament, os.path.getsize(archive_path(tournament_id)), archived=True))
+    tournament_registry.remove(tournament_id)
+    logger.info(f"Archived tournament {tournament_id}")
+    return True
+
+def tournament_due_time(tournament_id: str) -> float:
+    """
+    This function returns the time the janitor has to look at a tournament next: the time a finished tournament is due to be archived
+    (``tournament_archive_delay`` after its last activity), or otherwise its expiry time (see :func:`tournament_expiry_time`).
+
+    Parameters
+    ----------
+    tournament_id : str
+        The id of the tournament.
+
+    Returns
+    -------
+    float
+        The due time as a unix timestamp
+    None
+        if the tournament does not exist
+    """
+    expiry = tournament_expiry_time(tournament_id)
+    entry = metadata_index.get(tournament_id)
+    if expiry is None or entry is None or entry["stage"] != Stage.FINISHED.name or entry.get("archived"):
+        return expiry
+    return min(expiry, tournament_last_activity(tournament_id, entry) + tournament_archive_delay)
+
+def expire_or_archive_tournament(tournament_id: str) -> bool:
+    """
+    This function deletes a tournament if it has expired (see :func:`expire_tournament`), or otherwise archives it if it is finished
+    and due to be archived (see :func:`tournament_due_time`). It is called by the janitor.
+
+    Parameters
+    ----------
+    tournament_id : str
+        The id of the tournament.
+
+    Returns
+    -------
+    bool
+        True if the tournament has been deleted
+    """
+    if expire_tournament(tournament_id):
+        return True
+    due_time = tournament_due_time(tournament_id)
+    if due_time is not None and due_time <= datetime.datetime.now().timestamp():
+        archive_tournament(tournament_id)
+    return False
+
+def schedule_tournaments():
+    """
+    This function schedules all tournaments of the tournament index (including the ones created by other workers) with the janitor.
+    It is run once when the janitor of a worker starts, afterwards tournaments are scheduled whenever they are saved or mutated
+    (see :func:`save_tournament` and :func:`record_mutation`).
+    """
+    for entry in metadata_index.all():
+        janitor.schedule(entry["id"])
+
+def evict_idle_tournaments():
+    """
+    This function evicts the tournaments that have not been requested for ``tournament_cache_max_idle_time`` from the tournament cache.
+    It is run by the janitor on every run.
+    """
+    tournament_registry.evict_idle(tournament_cache_max_idle_time)
+
+janitor = Janitor(tournament_due_time, expire_or_archive_tournament, janitor_interval, periodic=evict_idle_tournaments, seed=schedule_tournaments)
+
+
+# ------- Journal -------
+# Small mutations (scores, piste assignments, cookies, ...) are not saved as a full snapshot.
+# They are appended to the journal of the tournament instead, see journal.py.
+# After a number of journaled mutations, a new snapshot is written and the journal is compacted.
+
+journal_compaction_interval = 50
+
+@contextmanager
+def tournament_transaction(tournament_id: str):
+    """
+    Context manager for mutating a tournament. It holds the mutation lock of the tournament, so that no other thread or worker
+    mutates the tournament at the same time, and yields the up to date tournament (or None if it does not exist).
+    All mutations and their :func:`record_mutation` / :func:`save_tournament` calls have to happen inside of the transaction.
+    Every mutation has to be journaled or saved before the transaction ends, otherwise it only exists in the tournament cache
+    of this worker and is lost as soon as the tournament is evicted or loaded again (see tests/test_tournament_cache.py).
+
+    Parameters
+    ----------
+    tournament_id : str
+        The id of the tournament to be mutated.
+    """
+    with journal.mutation_lock(tournament_id):
+        tournament = get_tournament(tournament_id)
+        try:
+            yield tournament
+        except BaseException:
+            # A failed mutation may have changed the cached tournament partially. It is loaded again from disk, where only the journaled mutations
+            # are saved, so its version is the same in every worker again. Responses built from the partially changed tournament are dropped.
+            if tournament is not None:
+                tournament_registry.remove(tournament_id)
+                response_cache.invalidate(tournament_id)
+                change_notifier.notify(tournament_id)
+            raise
+
+def record_mutation(tournament: Tournament, operation: str, *args):
+    """
+    This function persists a mutation that has already been applied to a tournament by appending it to the tournament's journal.
+    Depending on ``save_durability``, the journal is synced and pending writes (see :func:`write_pending`) are done immediately,
+    or the tournament is marked as dirty and flushed in the background (see :func:`flush_tournament`).
+    Has to be called inside of a :func:`tournament_transaction`.
+
+    Parameters
+    ----------
+    tournament : Tournament
+        The mutated tournament.
+    operation : str
+        The name of the Tournament method that was called (see ``journal.JOURNALED_OPERATIONS``).
+    *args
+        The arguments the method was called with.
+    """
+    if enable_sqlite_storage:
+        sqlite_storage.mark_changed(tournament, operation, *args)
+    if save_durability == "sync":
+        journal.append(tournament, operation, *args)
+        write_pending(tournament)
+    else:
+        journal.append(tournament, operation, *args, sync=False)
+        write_behind.mark_dirty(tournament.id)
+    # Tournaments created by other workers are only known to the janitor of this worker once they are mutated here (or it is started again)
+    janitor.schedule(tournament.id)
+    change_notifier.notify(tournament.id)
+
+def write_pending(tournament: Tournament):
+    """
+    This function writes a new snapshot of a tournament if enough mutations have been journaled since the last snapshot.
+    Otherwise, if the SQLite storage is enabled, only the changed rows of the tournament are written.
+    Has to be called inside of a :func:`tournament_transaction`.
+
+    Parameters
+    ----------
+    tournament : Tournament
+        The mutated tournament.
+    """
+    if tournament.journal_sequence - tournament.snapshot_sequence >= journal_compaction_interval:
+        save_tournament(tournament, compaction=True)
+    elif enable_sqlite_storage:
+        sqlite_storage.sync_tournament(tournament, tournament_generation(tournament.id))
+
+def flush_tournament(tournament_id: str):
+    """
+    This function syncs the journal of a tournament to disk and writes everything that is pending (see :func:`write_pending`).
+    It is called by the write-behind thread for every tournament that has been mutated since the last flush.
+
+    Parameters
+    ----------
+    tournament_id : str
+        The id of the tournament to be flushed.
+    """
+    with tournament_transaction(tournament_id) as tournament:
+        if tournament is None:
+            return
+        journal.sync(tournament_id)
+        write_pending(tournament)
+
+write_behind = WriteBehind(flush_tournament, write_behind_interval)
+snapshot_syncer = WriteBehind(sync_snapshot, 0)
 
 
 
@@ -246,19 +923,17 @@ def create_cookie(response: Response, tournament_id: str, clearence: Literal["ma
     """
     """
     cookie_value = random_generator.cookie()
-    tournament = get_tournament(tournament_id)
 
     if clearence == "master":
-        tournament.master_cookies.append(cookie_value)
         response.set_cookie(tournament_id + "_master", cookie_value, max_age=60*60*24*7) # 7 days
     if clearence == "referee":
-        tournament.referee_cookies.append(cookie_value)
         response.set_cookie(tournament_id + "_referee", cookie_value, max_age=60*60*24*7) # 7 days
     if clearence == "fencer":
-        tournament.get_fencer_by_id(fencer_id).cookies.append(cookie_value)
         response.set_cookie(tournament_id + "_fencer_" + fencer_id, cookie_value, max_age=60*60*24*7) # 7 days
 
-    save_tournament(tournament)
+    with tournament_transaction(tournament_id) as tournament:
+        tournament.add_cookie(clearence, cookie_value, fencer_id)
+        record_mutation(tournament, "add_cookie", clearence, cookie_value, fencer_id)
     print(f"Created {clearence} cookie for tournament {tournament_id} with value {cookie_value}")
     return response
 
@@ -305,10 +980,7 @@ def search_fencer(tournament_id, fencer_id) -> Fencer:
     tournament = get_tournament(tournament_id)
     if tournament is None:
         return None
-    for fencer in tournament.fencers:
-        if fencer.id == fencer_id:
-            return fencer
-    return None
+    return tournament.get_fencer_object(fencer_id)
 
 
 # ------- CSV -------
@@ -412,6 +1084,11 @@ def check_password(password: str, hashed_password: str) -> bool:
 # ------- Flask / Flask Mail -------
 app = Flask(__name__, static_folder='static', template_folder='templates')
 
+@app.before_request
+def start_janitor():
+    # The janitor is started with the first request, so that every (forked) gunicorn worker runs its own janitor
+    janitor.start()
+
 if __name__ != '__main__':
     gunicorn_logger = logging.getLogger('gunicorn.error')
     logger.handlers = gunicorn_logger.handlers
@@ -715,8 +1392,6 @@ def process_form():
 
             simulation_active=bool(simulation_active == 'true'),
         )
-        tournament_cache.append(tournament)
-
         # Generate Mail
         msg = Message(f'Tournament {tournament.id} created',
                       sender=MAIL_SENDER,
@@ -836,7 +1511,8 @@ def standings(tournament_id):
         group = request.args.get('group')
         if group is None:
             group = ""
-        return render_template('/dashboard/standings.html', requested_group=group, num_groups=tournament.get_num_groups(), tournament_id=tournament_id)
+        return render_template('/dashboard/standings.html', requested_group=group, num_groups=tournament.get_num_groups(), tournament_id=tournament_id,
+                               enable_event_streams=enable_event_streams)
 
 @app.route('/<tournament_id>/fencer/<fencer_id>')
 def fencer(tournament_id, fencer_id):
@@ -870,7 +1546,8 @@ def fencer(tournament_id, fencer_id):
                                    club=fencer.club,
                                    tournament_id=tournament.id,
                                    fencer_id=fencer.id,
-                                   version=APP_VERSION
+                                   version=APP_VERSION,
+                                   enable_event_streams=enable_event_streams
                                    )
 
 @app.route('/<tournament_id>/tableau')
@@ -914,7 +1591,7 @@ def piste_overview(tournament_id):
         abort(404)
     else:
         tournament = get_tournament(tournament_id)
-        return render_template('/piste_overview.html', tournament_id=tournament_id, num_pistes=tournament.num_pistes)
+        return render_template('/piste_overview.html', tournament_id=tournament_id, num_pistes=tournament.num_pistes, enable_event_streams=enable_event_streams)
 
 @app.route('/<tournament_id>/brackets')
 def brackets(tournament_id):
@@ -1102,6 +1779,99 @@ def default_error(e: Exception = None, traceback = None, code = "DEFAULT_ERROR",
 def tournament_not_found_error():
     return default_error(code = "TOURNAMENT_NOT_FOUND", message = "Tournament not found")
 
+def tournament_etag(tournament_id: str, revision: str, endpoint: str, *params) -> str:
+    """
+    This function returns the ETag of a response of a read endpoint, derived from the revision of the tournament (see :attr:`tournament.Tournament.revision`).
+
+    Parameters
+    ----------
+    tournament_id : str
+        The id of the requested tournament.
+    revision : str
+        The revision of the tournament the response is built from.
+    endpoint : str
+        The name of the endpoint.
+    *params
+        The parameters the response depends on, including the ones that are not part of the URL (e.g. the login state).
+    """
+    digest = hashlib.sha1(repr((tournament_id, endpoint) + params).encode()).hexdigest()[:16]
+    return f"{revision}.{digest}"
+
+def cached_json(tournament: Tournament, endpoint: str, build: Callable[[], object], *params) -> Response:
+    """
+    This function returns the JSON response of a read endpoint. The serialized response is cached for the current version of the tournament,
+    so it is only built again after the tournament has been mutated (see :class:`response_cache.ResponseCache`).
+    The response carries an ETag (see :func:`tournament_etag`). If the client already has the current response (If-None-Match),
+    304 Not Modified is returned without a body.
+
+    Parameters
+    ----------
+    tournament : Tournament
+        The requested tournament.
+    endpoint : str
+        The name of the endpoint.
+    build : Callable[[], object]
+        Builds the response data if it is not cached.
+    *params
+        The request parameters the response depends on.
+    """
+    # The version is read before the response is built, so a response built during a mutation is never used for the new version
+    return cached_response(tournament.id, tournament.version, tournament.revision, endpoint, build, *params)
+
+def sqlite_json(tournament_id: str, endpoint: str, query: Callable, *params) -> Response:
+    """
+    This function returns the JSON response of a read endpoint queried from the SQLite storage, without loading the tournament.
+    The response is cached and carries an ETag like the ones of :func:`cached_json`, as long as the rows are up to date
+    with the tournament on disk, which may have been mutated by another worker (see :func:`sqlite_storage.query_revision`).
+
+    Parameters
+    ----------
+    tournament_id : str
+        The id of the requested tournament.
+    endpoint : str
+        The name of the endpoint.
+    query : Callable
+        Queries the response data, called with the tournament id and the parameters.
+    *params
+        The request parameters the response depends on.
+
+    Returns
+    -------
+    Response
+        if the rows are up to date
+    None
+        otherwise, the response has to be built from the tournament
+    """
+    generation = tournament_generation(tournament_id)
+    with sqlite_storage.read_transaction():
+        written = sqlite_storage.query_revision(tournament_id, generation)
+        if written is None:
+            return None
+        version, revision = written
+        return cached_response(tournament_id, version, revision, endpoint, lambda: query(tournament_id, *params), *params)
+
+def cached_response(tournament_id: str, version: int, revision: str, endpoint: str, build: Callable[[], object], *params) -> Response:
+    """
+    This function returns the JSON response of a read endpoint for a version and revision of a tournament, see :func:`cached_json`.
+    """
+    etag = tournament_etag(tournament_id, revision, endpoint, *params)
+    if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+    else:
+        key = (tournament_id, endpoint) + params
+        body = response_cache.get(key, version) if enable_response_cache else None
+        if body is not None:
+            response = app.response_class(body, mimetype=app.json.mimetype)
+        else:
+            response = jsonify(build())
+            if enable_response_cache:
+                response_cache.put(key, version, response.get_data())
+
+    # Clients have to revalidate the response on every poll
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 # --- Dashboard ---
 
 # @app.route('/<tournament_id>/dashboard/update', methods=['GET'])
@@ -1113,7 +1883,7 @@ def get_dashboard_infos():
     tournament = get_tournament(tournament_id)
     if tournament is None:
         return tournament_not_found_error(), 404
-    return jsonify(tournament.get_dashboard_infos())
+    return cached_json(tournament, "dashboard", tournament.get_dashboard_infos)
 
 
 # --- Matches ---
@@ -1125,10 +1895,26 @@ def get_matches():
     """
     try:
         tournament_id = request.args.get('tournament_id')
+
+        # With ?since=<revision>, only the matches that have changed since this revision are returned (see Tournament.get_match_changes)
+        since = request.args.get('since')
+
+        # Query the matches directly from the database, without loading the tournament
+        # (unless mutations of the tournament are not written to the database yet)
+        if enable_sqlite_storage:
+            if since is not None:
+                response = sqlite_json(tournament_id, "match_changes", sqlite_storage.query_match_changes, since)
+            else:
+                response = sqlite_json(tournament_id, "matches", sqlite_storage.query_matches)
+            if response is not None:
+                return response
+
         tournament = get_tournament(tournament_id)
         if tournament is None:
             return tournament_not_found_error(), 404
-        return jsonify(tournament.get_matches())
+        if since is not None:
+            return cached_json(tournament, "match_changes", lambda: tournament.get_match_changes(since), since)
+        return cached_json(tournament, "matches", tournament.get_matches)
     except Exception as e:
         logger.error(e, exc_info=True)
         return default_error(e)
@@ -1158,8 +1944,9 @@ def set_active():
         
         override_flag = request.json['override_flag']
 
-        tournament.set_active(match_id, override_flag)
-        save_tournament(tournament)
+        with tournament_transaction(tournament_id) as tournament:
+            tournament.set_active(match_id, override_flag)
+            record_mutation(tournament, "set_active", match_id, override_flag)
         return {}, 200
     
     except OccupiedPisteError:
@@ -1196,14 +1983,52 @@ def push_score():
         green_score = int(request.json['green_score'])
         red_score = int(request.json['red_score'])
 
-        tournament.push_score(match_id, green_score, red_score)
-        save_tournament(tournament)
+        with tournament_transaction(tournament_id) as tournament:
+            tournament.push_score(match_id, green_score, red_score)
+            record_mutation(tournament, "push_score", match_id, green_score, red_score)
         return {}, 200
     
     except Exception as e:
         logger.error(e, exc_info=True)
         return default_error(e, traceback.format_exc())
 
+@app.route('/api/matches/push-scores', methods=['POST'])
+def push_scores():
+    """
+    This route pushes several scores at once, in one transaction and with one piste assignment (see :meth:`tournament.Tournament.push_scores`).
+    It is used by devices that have queued scores while they were offline. Scores with an idempotency key that has been pushed before are ignored,
+    so a batch can be sent again if the response got lost.
+
+    The body is {"scores": [{"match_id", "green_score", "red_score", "idempotency_key"}, ...]}, the response contains the result of every score.
+    """
+    try:
+        tournament_id = request.args.get('tournament_id')
+
+        tournament = get_tournament(tournament_id)
+        if tournament is None:
+            return tournament_not_found_error(), 404
+
+        # Check if logged in as referee or master
+        if not check_logged_in(request, tournament_id, "referee") and not check_logged_in(request, tournament_id, 'master') and not tournament.allow_fencers_to_input_scores:
+            return default_error(code = "NOT_LOGGED_IN", message = "User must be logged in to input Results!"), 401
+
+        try:
+            scores = [[entry['match_id'], int(entry['green_score']), int(entry['red_score']), entry.get('idempotency_key')] for entry in request.json['scores']]
+        except (KeyError, TypeError, ValueError) as e:
+            return default_error(e, code = "INVALID_SCORES", message = "Scores must contain a match_id, green_score and red_score"), 400
+
+        with tournament_transaction(tournament_id) as tournament:
+            timestamp = datetime.datetime.now().isoformat()
+            results = tournament.push_scores(scores, timestamp)
+            # Batches that have been sent again only contain duplicates, they must not change the revision
+            if "applied" in results:
+                record_mutation(tournament, "push_scores", scores, timestamp)
+        return {"results": [{"match_id": score[0], "idempotency_key": score[3], "status": result} for score, result in zip(scores, results)]}, 200
+
+    except Exception as e:
+        logger.error(e, exc_info=True)
+        return default_error(e, traceback.format_exc()), 500
+
 # @app.route('/<tournament_id>/matches/prioritize', methods=['POST'])
 @app.route('/api/matches/prioritize', methods=['POST']) # BEARBEITET
 def prioritize():
@@ -1219,8 +2044,9 @@ def prioritize():
         
         value = request.json['value']
 
-        tournament.prioritize_match(match_id, value)
-        save_tournament(tournament)
+        with tournament_transaction(tournament_id) as tournament:
+            tournament.prioritize_match(match_id, value)
+            record_mutation(tournament, "prioritize_match", match_id, value)
         return {}, 200
     
     except Exception as e:
@@ -1242,8 +2068,9 @@ def assign_piste():
 
         piste = int(request.json['piste'])
 
-        tournament.assign_certain_piste(match_id, piste)
-        save_tournament(tournament)
+        with tournament_transaction(tournament_id) as tournament:
+            tournament.assign_certain_piste(match_id, piste)
+            record_mutation(tournament, "assign_certain_piste", match_id, piste)
         return {}, 200
 
     except Exception as e:
@@ -1263,8 +2090,9 @@ def remove_piste_assignment():
         if tournament is None:
             return tournament_not_found_error()
 
-        tournament.remove_piste_assignment(match_id)
-        save_tournament(tournament)
+        with tournament_transaction(tournament_id) as tournament:
+            tournament.remove_piste_assignment(match_id)
+            record_mutation(tournament, "remove_piste_assignment", match_id)
         return {}, 200
     
     except Exception as e:
@@ -1284,7 +2112,7 @@ def matches_left():
         if tournament is None:
             return tournament_not_found_error()
         
-        return jsonify({"matches_left": tournament.get_matches_left()}), 200
+        return cached_json(tournament, "matches_left", lambda: {"matches_left": tournament.get_matches_left()})
     
     except Exception as e:
         logger.error(e, exc_info=True)
@@ -1301,16 +2129,23 @@ def get_standings():
     try:
         tournament_id = request.args.get('tournament_id')
 
-        tournament = get_tournament(tournament_id)
-        if tournament is None:
-            return tournament_not_found_error()
-
         group = request.args.get('group')
         gender = request.args.get('gender')
         handedness = request.args.get('handedness')
         age_group = request.args.get('age')
 
-        return jsonify(tournament.get_standings(group, gender, handedness, age_group)), 200
+        # Query the standings directly from the database, without loading the tournament
+        # (unless mutations of the tournament are not written to the database yet)
+        if enable_sqlite_storage:
+            response = sqlite_json(tournament_id, "standings", sqlite_storage.query_standings, group, gender, handedness, age_group)
+            if response is not None:
+                return response
+
+        tournament = get_tournament(tournament_id)
+        if tournament is None:
+            return tournament_not_found_error()
+
+        return cached_json(tournament, "standings", lambda: tournament.get_standings(group, gender, handedness, age_group), group, gender, handedness, age_group)
     
     except Exception as e:
         logger.error(e, exc_info=True)
@@ -1331,8 +2166,9 @@ def next_stage():
         if tournament is None:
             return tournament_not_found_error()
 
-        tournament.next_stage()
-        save_tournament(tournament)
+        with tournament_transaction(tournament_id) as tournament:
+            tournament.next_stage()
+            save_tournament(tournament)
 
         # Send all results to master via Email
         if tournament.stage == Stage.FINISHED:
@@ -1401,7 +2237,7 @@ def piste_overview_update():
         piste = request.args.get('piste')
 
         tournament = get_tournament(tournament_id)
-        return jsonify(tournament.get_piste_status(piste))
+        return cached_json(tournament, "piste", lambda: tournament.get_piste_status(piste), piste)
     
     except Exception as e:
         logger.error(e, exc_info=True)
@@ -1420,8 +2256,9 @@ def toggle_piste():
         if tournament is None:
             return tournament_not_found_error()
 
-        tournament.toggle_piste(piste)
-        save_tournament(tournament)
+        with tournament_transaction(tournament_id) as tournament:
+            tournament.toggle_piste(piste)
+            record_mutation(tournament, "toggle_piste", piste)
         return {}, 200
     
     except Exception as e:
@@ -1447,11 +2284,13 @@ def get_fencer():
         logged_in_as_fencer = check_logged_in(request, tournament_id, 'fencer', fencer_id)
         logged_in_as_master = check_logged_in(request, tournament_id, 'master')
         
-        fencer_hub_information = tournament.get_fencer_hub_information(fencer_id)
-        fencer_hub_information['logged_in_as_fencer'] = logged_in_as_fencer
-        fencer_hub_information['logged_in_as_master'] = logged_in_as_master
+        def build():
+            fencer_hub_information = tournament.get_fencer_hub_information(fencer_id)
+            fencer_hub_information['logged_in_as_fencer'] = logged_in_as_fencer
+            fencer_hub_information['logged_in_as_master'] = logged_in_as_master
+            return fencer_hub_information
 
-        return jsonify(fencer_hub_information)
+        return cached_json(tournament, "fencer", build, fencer_id, logged_in_as_fencer, logged_in_as_master)
     
     except Exception as e:
         logger.error(e, exc_info=True)
@@ -1486,8 +2325,9 @@ def change_fencer_attribute():
         if value is None:
             return default_error(code="INVALID_ATTRIBUTE_VALUE", message='Client provided an invalid attribute value. Attribute value must not be None.'), 400
     
-        tournament.get_fencer_by_id(fencer_id).change_attribute(attribute, value)
-        save_tournament(tournament)
+        with tournament_transaction(tournament_id) as tournament:
+            tournament.change_fencer_attribute(fencer_id, attribute, value)
+            record_mutation(tournament, "change_fencer_attribute", fencer_id, attribute, value)
         return {}, 200
     
     except Exception as e:
@@ -1523,8 +2363,12 @@ def approve_tableau():
         else:
             device_id = random_generator.id(16)
 
-        response = make_response(get_tournament(tournament_id).approve_tableau(
-            prelim_round, group, data['timestamp'], fencer_id, device_id), 200)
+        with tournament_transaction(tournament_id) as tournament:
+            approval = tournament.approve_tableau(prelim_round, group, data['timestamp'], fencer_id, device_id)
+            if approval["success"]:
+                # The approval file is only written once, the journal only restores the approval of the fencer
+                record_mutation(tournament, "set_tableau_approved", fencer_id)
+        response = make_response(approval, 200)
 
         if 'device_id' not in request.cookies:
             response.set_cookie('device_id', device_id)
@@ -1600,8 +2444,9 @@ def disqualify_fencer():
         # if not check_logged_in(request, tournament_id, "master"):
         #     return default_error(code="NOT_LOGGED_IN", message="Client is not logged in as master"), 401
         
-        tournament.disqualify_fencer(fencer_id, reason)
-        save_tournament(tournament)
+        with tournament_transaction(tournament_id) as tournament:
+            tournament.disqualify_fencer(fencer_id, reason)
+            record_mutation(tournament, "disqualify_fencer", fencer_id, reason)
 
         return {}, 200
     
@@ -1626,9 +2471,7 @@ def get_tableau():
         if tournament is None:
             return tournament_not_found_error()
         
-        response = tournament.get_tableau_array(group)
-        
-        return jsonify(response), 200
+        return cached_json(tournament, "tableau", lambda: tournament.get_tableau_array(group), group)
     
     except Exception as e:
         logger.error(e, exc_info=True)
@@ -1648,15 +2491,79 @@ def get_brackets():
         if tournament is None:
             return tournament_not_found_error()
         
-        response = tournament.elimination_brackets[0].map()
-        
-        return jsonify(response), 200
+        return cached_json(tournament, "brackets", lambda: tournament.elimination_brackets[0].map())
     
     except Exception as e:
         logger.error(e, exc_info=True)
         return default_error(e, traceback.format_exc())
     
 
+# --- Event Streams ---
+def stream_tournament_events(tournament_id: str, last_revision: str):
+    """
+    This generator yields the Server-Sent Events of a tournament. An "update" event with the new revision (see :attr:`tournament.Tournament.revision`),
+    version and stage is sent whenever the tournament has changed, so the pages only request their data when there is something new.
+    Changes made by this worker wake the stream up immediately, changes made by other workers are noticed within ``event_stream_poll_interval``.
+    The stream is closed after ``event_stream_max_duration``; the browser then reconnects with the revision it has seen last (Last-Event-ID).
+
+    Parameters
+    ----------
+    tournament_id : str
+        The id of the tournament.
+    last_revision : str
+        The revision the client has seen last.
+    """
+    yield f"retry: {event_stream_poll_interval * 1000}\n\n"
+
+    started = last_message = time.monotonic()
+    seen = change_notifier.changes_of(tournament_id)
+    while time.monotonic() - started < event_stream_max_duration:
+        tournament = get_tournament(tournament_id)
+        if tournament is None:
+            yield "event: deleted\ndata: {}\n\n"
+            return
+
+        revision = tournament.revision
+        if revision != last_revision:
+            last_revision = revision
+            data = json.dumps({"version": tournament.version, "stage": tournament.stage.name})
+            yield f"id: {revision}\nevent: update\ndata: {data}\n\n"
+            last_message = time.monotonic()
+        elif time.monotonic() - last_message >= event_stream_keep_alive_interval:
+            # Keeps proxies from closing the idle connection, and tells the page that the stream is still alive (see static/js/events.js)
+            yield "event: ping\ndata: {}\n\n"
+            last_message = time.monotonic()
+
+        seen = change_notifier.wait(tournament_id, seen, event_stream_poll_interval)
+
+@app.route('/api/events', methods=['GET'])
+def tournament_events():
+    """
+    This route opens a Server-Sent Events stream of a tournament (see :func:`stream_tournament_events`).
+    """
+    tournament_id = request.args.get('tournament_id')
+    if not enable_event_streams:
+        return default_error(code = "EVENT_STREAMS_DISABLED", message = "Event streams are disabled"), 404
+
+    tournament = get_tournament(tournament_id)
+    if tournament is None:
+        return tournament_not_found_error(), 404
+
+    # Without Last-Event-ID (first connection), the client has just loaded the current data
+    last_revision = request.headers.get('Last-Event-ID') or tournament.revision
+
+    # The browser does not reconnect after an error response, the page polls instead
+    if not change_notifier.open_stream(event_stream_max_streams):
+        return default_error(code = "TOO_MANY_EVENT_STREAMS", message = "Too many open event streams"), 503
+
+    response = Response(stream_tournament_events(tournament_id, last_revision), mimetype='text/event-stream')
+    # Called when the response is closed, also if the stream has never been started
+    response.call_on_close(change_notifier.close_stream)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no' # nginx must not buffer the stream
+    return response
+
+
 # --- Push Notifications ---
 @app.route('/api/push/subscribe', methods=['POST'])
 def subscribe_push():
@@ -1671,8 +2578,9 @@ def subscribe_push():
         fencer_id = request.args.get('fencer_id')
 
         data = request.get_json()
-        tournament.get_fencer_by_id(fencer_id).subscribe_to_push_notifications(data['token'])
-        save_tournament(tournament)
+        with tournament_transaction(tournament_id) as tournament:
+            tournament.subscribe_fencer_to_push_notifications(fencer_id, data['token'])
+            record_mutation(tournament, "subscribe_fencer_to_push_notifications", fencer_id, data['token'])
         return {}, 200
     
     except Exception as e:
@@ -1694,8 +2602,9 @@ def unsubscribe_push():
         data = request.get_json()
         token = data['token']
 
-        tournament.get_fencer_by_id(fencer_id).unsubscribe_from_push_notifications(token)
-        save_tournament(tournament)
+        with tournament_transaction(tournament_id) as tournament:
+            tournament.unsubscribe_fencer_from_push_notifications(fencer_id, token)
+            record_mutation(tournament, "unsubscribe_fencer_from_push_notifications", fencer_id, token)
         return {}, 200
     
     except Exception as e:
@@ -1717,8 +2626,9 @@ def simulate():
         if tournament is None:
             return tournament_not_found_error()
 
-        tournament.simulate_current()
-        save_tournament(tournament)
+        with tournament_transaction(tournament_id) as tournament:
+            tournament.simulate_current()
+            save_tournament(tournament)
         return {}, 200
     
     except Exception as e:
@@ -174,22 +174,46 @@ class Match:
             # Free Piste
             try:
                 self.piste.match_finished()
+                self.release_piste()
             except AttributeError: # Piste is None, happens when wildcard. # TODO: Look into this
                 pass
 
     def set_active(self, staged: bool = False):
         self.piste.match_started(staged)
+        if self.piste.staged_match is self:
+            self.piste.staged_match = None
+        if self not in self.piste.ongoing_matches:
+            self.piste.ongoing_matches.append(self)
         self.green.match_started()
         self.red.match_started()
         self.match_ongoing = True
         self.match_ongoing_timestamp = datetime.now()
 
     def assign_piste(self, piste: Piste):
+        if self.piste is not None and self.piste is not piste:
+            self.release_piste()
         self.piste = piste
         self.piste.staged = True
+        if self.match_ongoing:
+            if self not in self.piste.ongoing_matches:
+                self.piste.ongoing_matches.append(self)
+        elif not self.match_completed:
+            self.piste.staged_match = self
         self.green.is_staged = True
         self.red.is_staged = True
 
+    def remove_piste(self):
+        if self.piste is not None:
+            self.release_piste()
+        self.piste = None
+
+    def release_piste(self):
+        # The piste does not reference this match anymore, its flags are left to the caller
+        if self.piste.staged_match is self:
+            self.piste.staged_match = None
+        if self in self.piste.ongoing_matches:
+            self.piste.ongoing_matches.remove(self)
+
 
 
 class GroupMatch(Match):
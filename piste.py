@@ -36,6 +36,26 @@ class Piste:
         self.occupied = False
         self.disabled = False
 
+        # The matches currently staged / fenced on the piste, maintained by the Match methods
+        self.staged_match = None
+        self.ongoing_matches = [] # More than one only if a match was started with override
+
+    def __getstate__(self) -> dict:
+        # The matches are not saved, they are restored by Tournament.build_indexes
+        state = self.__dict__.copy()
+        state.pop("staged_match", None)
+        state.pop("ongoing_matches", None)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.staged_match = None
+        self.ongoing_matches = []
+
+    @property
+    def ongoing_match(self):
+        return self.ongoing_matches[0] if self.ongoing_matches else None
+
     @property
     def index(self):
         return self.number - 1
@@ -65,8 +85,12 @@ class Piste:
     def reset(self):
         self.staged = False
         self.occupied = False
+        self.staged_match = None
+        self.ongoing_matches = []
 
     def disable(self):
         self.disabled = True
         self.staged = False
-        self.occupied = False
\ No newline at end of file
+        self.occupied = False
+        self.staged_match = None
+        self.ongoing_matches = []
\ No newline at end of file
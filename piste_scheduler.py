@@ -0,0 +1,107 @@
+import heapq
+from typing import Dict, List, Tuple
+
+from match import Match
+from piste import Piste
+
+
+class PisteScheduler:
+    """
+    The matches waiting for a piste, in the order they are assigned to free pistes: by priority (highest first),
+    then in the order they have been added to the tournament (the order of ``Tournament.match_index``).
+
+    The matches are kept in a heap, so :meth:`assign` only looks at the matches at the top of the heap until all free pistes are staged,
+    instead of sorting all matches of the tournament after every pushed score. Entries are removed lazily: matches that have been
+    assigned a piste, completed or removed are dropped when they reach the top of the heap.
+
+    :meth:`update` has to be called whenever the priority of a match changes or a match loses its piste, so it is queued again.
+    """
+
+    def __init__(self):
+        self.heap: List[Tuple[int, int, Match]] = [] # (-priority, position, match)
+        self.positions: Dict[Match, int] = {} # Match -> position in the order of the tournament
+        self.queued: Dict[Match, Tuple[int, int]] = {} # Match -> key of its current heap entry
+        self.next_position = 0
+
+    def add(self, match: Match) -> None:
+        """
+        Adds a new match after all matches added before. A match that has been added already keeps its position.
+        """
+        if match not in self.positions:
+            self.positions[match] = self.next_position
+            self.next_position += 1
+        self.update(match)
+
+    def extend(self, matches: List[Match]) -> None:
+        """
+        Adds new matches like :meth:`add`, but builds the heap once instead of pushing every match, e.g. when a tournament is loaded.
+        Matches that are not waiting for a piste are not queued, as :meth:`assign` would drop them anyway.
+        """
+        for match in matches:
+            if match not in self.positions:
+                self.positions[match] = self.next_position
+                self.next_position += 1
+            if match.piste is not None or match.match_completed or match.wildcard_or_disq:
+                continue
+            key = (-match.priority, self.positions[match])
+            if self.queued.get(match) != key:
+                self.queued[match] = key
+                self.heap.append(key + (match,))
+        heapq.heapify(self.heap)
+
+    def remove(self, match: Match) -> None:
+        """
+        Removes a match, e.g. of a replaced round.
+        """
+        self.positions.pop(match, None)
+        self.queued.pop(match, None)
+
+    def update(self, match: Match) -> None:
+        """
+        Queues a match again with its current priority. Matches that are not part of the tournament are ignored.
+        """
+        position = self.positions.get(match)
+        if position is None:
+            return
+        key = (-match.priority, position)
+        if self.queued.get(match) != key:
+            self.queued[match] = key
+            heapq.heappush(self.heap, key + (match,))
+
+    def assign(self, pistes: List[Piste]) -> None:
+        """
+        Stages the waiting matches on the free pistes.
+
+        Pistes that are not occupied are used first. Matches are skipped as long as one of their fencers is staged for another match
+        or both of them are fencing; they stay in the queue.
+
+        Parameters
+        ----------
+        pistes : List[Piste]
+            The pistes of the tournament.
+        """
+        free_pistes = [piste for piste in pistes if not piste.staged and not piste.disabled and not piste.occupied]
+        free_pistes += [piste for piste in pistes if not piste.staged and not piste.disabled and piste.occupied]
+        if not free_pistes:
+            return
+
+        skipped = []
+        free_pistes.reverse()
+        while free_pistes and self.heap:
+            entry = heapq.heappop(self.heap)
+            match = entry[2]
+            if self.queued.get(match) != entry[:2]:
+                # Outdated entry, the match has been queued again or removed
+                continue
+
+            if match.piste is not None or match.match_completed or match.wildcard_or_disq:
+                # Not waiting anymore, the match is queued again by update if it loses its piste
+                del self.queued[match]
+            elif match.green.is_staged or match.red.is_staged or (match.green.in_match and match.red.in_match):
+                skipped.append(entry)
+            else:
+                del self.queued[match]
+                match.assign_piste(free_pistes.pop())
+
+        for entry in skipped:
+            heapq.heappush(self.heap, entry)
@@ -0,0 +1,135 @@
+from bisect import bisect_left, insort
+from typing import Dict, List, Tuple
+
+from fencer import Fencer
+
+
+def ranking_key(fencer: Fencer) -> tuple:
+    """
+    Returns the key fencers are ranked by in ascending order:
+    disqualified fencers last, then by final rank, win percentage, points difference, points for and points against (the higher the better).
+
+    Parameters
+    ----------
+    fencer : Fencer
+        The fencer.
+
+    Returns
+    -------
+    tuple
+    """
+    overall = fencer.statistics["overall"]
+    return (
+        fencer.disqualified,
+        fencer.final_rank if fencer.final_rank is not None else 0,
+        -fencer.win_percentage(),
+        -fencer.points_difference_int(),
+        -overall["points_for"],
+        -overall["points_against"],
+    )
+
+
+class Ranking:
+    """
+    The fencers of a tournament in the order of their current rank, overall and within their preliminary group.
+
+    Every fencer is stored as an entry (ranking key, position in the list of fencers) in a sorted list, so fencers with the same key keep
+    the order of the list of fencers, as with a stable sort. The rank of a fencer is found by a binary search, and when a result is pushed,
+    only the entries of the two fencers of the match are moved with :meth:`update`, instead of sorting all fencers again.
+
+    The ranking keys are computed when a fencer is (re)inserted, so :meth:`update` has to be called whenever the statistics, the final rank or
+    the disqualification of a fencer change, and :meth:`index_groups` whenever the preliminary groups are assigned.
+    """
+
+    def __init__(self, fencers: List[Fencer]):
+        """
+        Parameters
+        ----------
+        fencers : List[Fencer]
+            The fencers of the tournament.
+        """
+        self.fencers = fencers
+        self.build()
+
+    def build(self) -> None:
+        """
+        Computes the keys of all fencers and sorts them again, e.g. after the final ranks have been assigned.
+        """
+        self.entries: Dict[Fencer, Tuple[tuple, int]] = {}
+        for position, fencer in enumerate(self.fencers):
+            self.entries.setdefault(fencer, (ranking_key(fencer), position))
+        self.order = sorted(self.entries.values())
+        self.index_groups()
+
+    def index_groups(self) -> None:
+        """
+        Sorts the entries into the preliminary groups the fencers are currently assigned to.
+        """
+        self.groups: Dict[int, list] = {} # Preliminary group -> sorted entries
+        self.fencer_groups: Dict[Fencer, int] = {} # Fencer -> preliminary group of its entry
+        for fencer, entry in self.entries.items():
+            self.groups.setdefault(fencer.prelim_group, []).append(entry)
+            self.fencer_groups[fencer] = fencer.prelim_group
+        for entries in self.groups.values():
+            entries.sort()
+
+    def update(self, *fencers: Fencer) -> None:
+        """
+        Moves fencers to their current rank. Fencers that are not ranked (e.g. wildcards) are ignored.
+
+        Parameters
+        ----------
+        *fencers : Fencer
+            The fencers whose statistics, final rank or disqualification have changed.
+        """
+        for fencer in fencers:
+            entry = self.entries.get(fencer)
+            if entry is None:
+                continue
+            new_entry = (ranking_key(fencer), entry[1])
+            if new_entry == entry:
+                continue
+            self.entries[fencer] = new_entry
+
+            del self.order[bisect_left(self.order, entry)]
+            insort(self.order, new_entry)
+
+            group = self.groups[self.fencer_groups[fencer]]
+            del group[bisect_left(group, entry)]
+            insort(group, new_entry)
+
+    def rank(self, fencer: Fencer) -> int:
+        """
+        Returns the current rank of a fencer (starting at 1), or None if the fencer is not ranked.
+        """
+        entry = self.entries.get(fencer)
+        if entry is None:
+            return None
+        return bisect_left(self.order, entry) + 1
+
+    def group_rank(self, fencer: Fencer) -> int:
+        """
+        Returns the current rank of a fencer within its preliminary group (starting at 1), or None if the fencer is not ranked.
+        """
+        entry = self.entries.get(fencer)
+        if entry is None:
+            return None
+        return bisect_left(self.groups[self.fencer_groups[fencer]], entry) + 1
+
+    def ranked(self) -> List[Fencer]:
+        """
+        Returns a new list of all fencers, ordered by their current rank.
+        """
+        return [self.fencers[position] for _, position in self.order]
+
+    def ranked_group(self, group: int) -> List[Fencer]:
+        """
+        Returns a new list of the fencers of a preliminary group, ordered by their current rank.
+        """
+        return [self.fencers[position] for _, position in self.groups.get(group, [])]
+
+    def first(self) -> Fencer:
+        """
+        Returns the fencer currently ranked first.
+        """
+        return self.fencers[self.order[0][1]]
@@ -0,0 +1,205 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Tuple
+
+# ------- Logging -------
+try: # Error Catch for Sphinx Documentation
+    # create logger
+    logger = logging.getLogger('registry')
+    logger.setLevel(logging.DEBUG)
+
+    # create console handler and set level to debug
+    ch = logging.StreamHandler()
+    ch.setLevel(logging.DEBUG)
+
+    # create file handler and set level to debug
+    fh = logging.FileHandler('logs/tournament.log')
+    fh.setLevel(logging.DEBUG)
+
+    # create formatter
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    # add formatter to ch
+    ch.setFormatter(formatter)
+    fh.setFormatter(formatter)
+
+    # add ch to logger
+    logger.addHandler(ch)
+    logger.addHandler(fh)
+
+except FileNotFoundError:
+    pass
+
+
+class TournamentRegistry:
+    """
+    In-process registry of loaded tournaments, keyed by the tournament id.
+
+    Tournaments are kept in least-recently-used order. When the estimated size of all loaded tournaments exceeds
+    the memory budget, the tournaments that have not been requested for the longest time are evicted.
+    Every mutation is persisted when it happens (see :func:`main.record_mutation`), so evicting a tournament never loses data,
+    the next request simply loads it from disk again.
+
+    Every registered tournament carries a generation, which describes the state on disk it was loaded from.
+    Before a registered tournament is returned, the refresher compares the generation with the files on disk
+    and brings the tournament up to date if another process has changed it in the meantime.
+    """
+
+    def __init__(self, loader: Callable[[str], Tuple[object, tuple]], refresher: Callable[[object, tuple], Tuple[object, tuple]], sizer: Callable[[str], int], memory_budget: int):
+        """
+        Parameters
+        ----------
+        loader : Callable[[str], Tuple[Tournament, tuple]]
+            Loads a tournament from disk given its id and returns it together with its generation. Returns (None, None) if the tournament does not exist.
+        refresher : Callable[[Tournament, tuple], Tuple[Tournament, tuple]]
+            Brings a registered tournament up to date with the files on disk and returns the (possibly reloaded) tournament and its new generation.
+            Returns (None, None) if the tournament does not exist anymore.
+        sizer : Callable[[str], int]
+            Estimates the memory footprint of a tournament in bytes given its id.
+        memory_budget : int
+            The maximum estimated size of all loaded tournaments in bytes.
+        """
+        self.loader = loader
+        self.refresher = refresher
+        self.sizer = sizer
+        self.memory_budget = memory_budget
+
+        self.entries: OrderedDict = OrderedDict() # tournament id -> [tournament, estimated size, generation, time of the last access]
+        self.size = 0
+        self.lock = threading.Lock()
+
+        if hasattr(os, 'register_at_fork'):
+            # The lock may have been held by another thread of the parent while the process forked
+            os.register_at_fork(after_in_child=self.reset_lock)
+
+    def reset_lock(self) -> None:
+        self.lock = threading.Lock()
+
+    def __contains__(self, tournament_id: str) -> bool:
+        with self.lock:
+            return tournament_id in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, tournament_id: str):
+        """
+        Returns a tournament from memory, or loads it from disk if it is not loaded yet.
+
+        Parameters
+        ----------
+        tournament_id : str
+            The id of the tournament.
+
+        Returns
+        -------
+        Tournament object
+            if the tournament exists
+        None
+            if the tournament does not exist
+        """
+        with self.lock:
+            entry = self.entries.get(tournament_id)
+            if entry is not None:
+                self.entries.move_to_end(tournament_id)
+                entry[3] = time.monotonic()
+
+        # Refresh and load outside of the lock, so that other tournaments can be served in the meantime
+        if entry is not None:
+            tournament, generation = self.refresher(entry[0], entry[2])
+            if tournament is None:
+                self.remove(tournament_id)
+                return None
+            if tournament is entry[0] and generation == entry[2]:
+                return tournament
+            logger.debug(f"Refreshed tournament {tournament_id} from disk")
+        else:
+            tournament, generation = self.loader(tournament_id)
+            if tournament is None:
+                return None
+
+        return self.add(tournament, generation)
+
+    def add(self, tournament, generation: tuple):
+        """
+        Adds a tournament to the registry (or updates its entry) and evicts idle tournaments if the memory budget is exceeded.
+
+        Parameters
+        ----------
+        tournament : Tournament
+            The tournament to be added.
+        generation : tuple
+            The generation of the files on disk the tournament corresponds to.
+
+        Returns
+        -------
+        Tournament object
+            The registered tournament.
+        """
+        size = self.sizer(tournament.id)
+        with self.lock:
+            if tournament.id in self.entries:
+                self.size -= self.entries[tournament.id][1]
+
+            self.entries[tournament.id] = [tournament, size, generation, time.monotonic()]
+            self.entries.move_to_end(tournament.id)
+            self.size += size
+            self.evict()
+            return tournament
+
+    def remove(self, tournament_id: str) -> None:
+        """
+        Removes a tournament from the registry.
+
+        Parameters
+        ----------
+        tournament_id : str
+            The id of the tournament.
+        """
+        with self.lock:
+            if tournament_id in self.entries:
+                self.size -= self.entries.pop(tournament_id)[1]
+
+    def tournaments(self) -> List[object]:
+        """
+        Returns all loaded tournaments, least recently used first.
+        """
+        with self.lock:
+            return [entry[0] for entry in self.entries.values()]
+
+    def evict_idle(self, max_idle_time: float) -> int:
+        """
+        Evicts all tournaments that have not been requested for a while.
+        Only the idle tournaments at the least recently used end of the registry are looked at.
+
+        Parameters
+        ----------
+        max_idle_time : float
+            The time in seconds after which an idle tournament is evicted.
+
+        Returns
+        -------
+        int
+            The number of evicted tournaments.
+        """
+        evicted = 0
+        with self.lock:
+            while self.entries:
+                tournament_id, entry = next(iter(self.entries.items()))
+                if time.monotonic() - entry[3] < max_idle_time:
+                    break
+                self.size -= self.entries.pop(tournament_id)[1]
+                evicted += 1
+                logger.debug(f"Evicted idle tournament {tournament_id} from the registry")
+        return evicted
+
+    def evict(self) -> None:
+        # Evict least recently used tournaments until the budget is met. The most recently used tournament is never evicted.
+        # Must be called with the lock held.
+        while self.size > self.memory_budget and len(self.entries) > 1:
+            tournament_id, entry = self.entries.popitem(last=False)
+            self.size -= entry[1]
+            logger.debug(f"Evicted tournament {tournament_id} from the registry ({entry[1]} bytes)")
@@ -0,0 +1,94 @@
+import os
+import threading
+from collections import OrderedDict
+
+# ------- Response Cache -------
+# Read endpoints are polled by every device of a tournament every few seconds, although the tournament changes far less often.
+# Their serialized responses are cached together with the version of the tournament they were built from (see Tournament.version),
+# so a poll between two mutations only costs a lookup.
+
+
+class ResponseCache:
+    """
+    Serialized responses of read endpoints, keyed by (tournament id, endpoint, parameters).
+
+    Every entry stores the version of the tournament it was built from and is only returned for this version,
+    so entries become invalid as soon as the tournament is mutated. Only the latest version of every response is kept,
+    and the least recently used entries are evicted if there are more than ``max_entries``.
+    """
+
+    def __init__(self, max_entries: int):
+        """
+        Parameters
+        ----------
+        max_entries : int
+            The maximum number of cached responses.
+        """
+        self.max_entries = max_entries
+
+        self.entries: OrderedDict = OrderedDict() # (tournament id, endpoint, parameters...) -> (version, body)
+        self.lock = threading.Lock()
+
+        if hasattr(os, 'register_at_fork'):
+            # The lock may have been held by another thread of the parent while the process forked
+            os.register_at_fork(after_in_child=self.reset_lock)
+
+    def reset_lock(self) -> None:
+        self.lock = threading.Lock()
+
+    def get(self, key: tuple, version: int) -> bytes:
+        """
+        Returns a cached response.
+
+        Parameters
+        ----------
+        key : tuple
+            The tournament id, the endpoint and the parameters of the request.
+        version : int
+            The current version of the tournament.
+
+        Returns
+        -------
+        bytes
+            if the response has been cached for this version
+        None
+            otherwise
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: tuple, version: int, body: bytes) -> None:
+        """
+        Caches a response, replacing the response of an older version.
+
+        Parameters
+        ----------
+        key : tuple
+            The tournament id, the endpoint and the parameters of the request.
+        version : int
+            The version of the tournament the response was built from.
+        body : bytes
+            The serialized response.
+        """
+        with self.lock:
+            self.entries[key] = (version, body)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, tournament_id: str) -> None:
+        """
+        Removes all cached responses of a tournament, e.g. if it has been changed without a new version.
+
+        Parameters
+        ----------
+        tournament_id : str
+            The id of the tournament.
+        """
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == tournament_id]:
+                del self.entries[key]
@@ -0,0 +1,246 @@
+import datetime
+import gc
+import json
+import logging
+import pickle
+import struct
+import zlib
+from enum import Enum
+from typing import BinaryIO, Optional, Tuple
+
+from exceptions import SnapshotError
+from fencer import Fencer, Stage, Wildcard
+from match import EliminationMatch, GroupMatch
+from piste import Piste
+from tournament import Tournament
+
+# ------- Logging -------
+try: # Error Catch for Sphinx Documentation
+    # create logger
+    logger = logging.getLogger('snapshot')
+    logger.setLevel(logging.DEBUG)
+
+    # create console handler and set level to debug
+    ch = logging.StreamHandler()
+    ch.setLevel(logging.DEBUG)
+
+    # create file handler and set level to debug
+    fh = logging.FileHandler('logs/tournament.log')
+    fh.setLevel(logging.DEBUG)
+
+    # create formatter
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    # add formatter to ch
+    ch.setFormatter(formatter)
+    fh.setFormatter(formatter)
+
+    # add ch to logger
+    logger.addHandler(ch)
+    logger.addHandler(fh)
+
+except FileNotFoundError:
+    pass
+
+
+# ------- Snapshot Format -------
+# A snapshot is the 4 byte magic, the format version (unsigned short) and the payload.
+# Since format version 2, the header continues with the version and the journal sequence of the tournament (unsigned long longs),
+# so that they can be read without loading the snapshot (see :func:`read_state`), and the payload is the pickled tournament.
+# Pickle is the fastest way to store and load the object graph of a tournament, attributes that are added to a class later
+# have to be defaulted in __setstate__, as pickle restores the attributes of an object by their name.
+#
+# Format version 1 stored a zlib compressed JSON payload, which is still read, so that older snapshots do not have to be converted.
+# It was several times slower to write and load than pickle, which matters as snapshots are written while holding the mutation lock
+# and loaded by every other worker:
+#
+#   {
+#       "strings": [...],                       every string, stored once and referenced by its index
+#       "schemas": [[class, [field, ...]], ...], the class name and attribute names of the stored objects
+#       "shapes": [[key, ...], ...],             the keys of stored dicts (e.g. the statistics of a fencer)
+#       "objects": [[schema, value, ...], ...],  the objects in the order of their index, the tournament is object 0
+#   }
+#
+# Scalars (None, bool, int, float) are stored as they are. Every other value is a list starting with its tag.
+
+MAGIC = b'DDSN'
+FORMAT_VERSION = 2
+HEADER = struct.Struct('>4sH')
+STATE = struct.Struct('>QQ')
+
+STRING, OBJECT, LIST, TUPLE, SET, RECORD, DICT, DATETIME, ENUM = range(9)
+
+# Classes that can be stored in a format version 1 snapshot
+CLASSES = {cls.__name__: cls for cls in (Tournament, Tournament.Bracket, Tournament.Bracket.Node, Fencer, Wildcard, GroupMatch, EliminationMatch, Piste)}
+ENUMS = {cls.__name__: cls for cls in (Stage,)}
+
+EPOCH = datetime.datetime(1970, 1, 1)
+MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+class Decoder:
+    def __init__(self, payload: dict):
+        self.strings = payload["strings"]
+        self.shapes = payload["shapes"]
+        try:
+            self.schemas = [(CLASSES[name], fields) for name, fields in payload["schemas"]]
+        except KeyError as e:
+            raise SnapshotError(f"Unknown class {e} in snapshot")
+
+        # All objects are created first, so that references between them can be resolved in any order.
+        # Their state is restored in reverse order, so that the tournament (object 0) is restored last and can build its indexes from complete objects.
+        self.objects = [self.schemas[obj[0]][0].__new__(self.schemas[obj[0]][0]) for obj in payload["objects"]]
+        for instance, obj in zip(reversed(self.objects), reversed(payload["objects"])):
+            state = dict(zip(self.schemas[obj[0]][1], self.values(obj, 1)))
+            if hasattr(instance, "__setstate__"):
+                instance.__setstate__(state)
+            else:
+                instance.__dict__.update(state)
+
+    def values(self, values: list, start: int) -> list:
+        # Scalars, strings and references are by far the most common values, they are resolved without a call
+        value, strings, objects = self.value, self.strings, self.objects
+        return [
+            item if type(item) is not list else
+            strings[item[1]] if item[0] == STRING else
+            objects[item[1]] if item[0] == OBJECT else
+            value(item)
+            for item in values[start:]
+        ]
+
+    def value(self, value: list):
+        tag = value[0]
+        if tag == STRING:
+            return self.strings[value[1]]
+        if tag == OBJECT:
+            return self.objects[value[1]]
+        if tag == LIST:
+            return self.values(value, 1)
+        if tag == RECORD:
+            return dict(zip(self.shapes[value[1]], self.values(value, 2)))
+        if tag == DATETIME:
+            if type(value[1]) is int:
+                return EPOCH + value[1] * MICROSECOND
+            return datetime.datetime.fromisoformat(value[1])
+        if tag == ENUM:
+            return ENUMS[self.strings[value[1]]][self.strings[value[2]]]
+        if tag == DICT:
+            items = self.values(value, 1)
+            return dict(zip(items[::2], items[1::2]))
+        if tag == TUPLE:
+            return tuple(self.values(value, 1))
+        if tag == SET:
+            return set(self.values(value, 1))
+        raise SnapshotError(f"Unknown tag {tag} in snapshot")
+
+
+def dumps(tournament: Tournament) -> bytes:
+    """
+    Serializes a tournament into the snapshot format.
+
+    Parameters
+    ----------
+    tournament : Tournament
+        The tournament to be serialized.
+
+    Returns
+    -------
+    bytes
+        The snapshot.
+
+    Raises
+    ------
+    SnapshotError
+        if the tournament contains a value that cannot be pickled
+    """
+    try:
+        payload = pickle.dumps(tournament, protocol=pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, TypeError, AttributeError) as e:
+        raise SnapshotError(f"Tournament cannot be stored: {e}")
+    return HEADER.pack(MAGIC, FORMAT_VERSION) + STATE.pack(tournament.version, tournament.snapshot_sequence) + payload
+
+
+def loads(data: bytes) -> Tournament:
+    """
+    Deserializes a tournament from the snapshot format. Snapshots of format version 1 are decoded from their JSON payload.
+
+    Parameters
+    ----------
+    data : bytes
+        The snapshot.
+
+    Returns
+    -------
+    Tournament object
+
+    Raises
+    ------
+    SnapshotError
+        if the data is not a snapshot, or the format version is not supported
+    """
+    if len(data) < HEADER.size:
+        raise SnapshotError("Snapshot is too short")
+    magic, version = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise SnapshotError("Not a snapshot")
+    if version > FORMAT_VERSION:
+        raise SnapshotError(f"Snapshot format version {version} is newer than the supported version {FORMAT_VERSION}")
+
+    # The garbage collector would otherwise run many times while the objects are created
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        if version == 1:
+            try:
+                payload = json.loads(zlib.decompress(data[HEADER.size:]))
+            except (zlib.error, ValueError) as e:
+                raise SnapshotError(f"Corrupt snapshot: {e}")
+            logger.info("Loaded snapshot of format version 1, it is replaced by the next snapshot")
+            return Decoder(payload).objects[0]
+
+        try:
+            return pickle.loads(data[HEADER.size + STATE.size:])
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError, IndexError, TypeError, ValueError) as e:
+            raise SnapshotError(f"Corrupt snapshot: {e}")
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def read_state(file: BinaryIO) -> Optional[Tuple[int, int]]:
+    """
+    Reads the version and the journal sequence of the tournament from the header of a snapshot, without loading the snapshot.
+
+    Parameters
+    ----------
+    file : BinaryIO
+        The snapshot file, positioned at its start.
+
+    Returns
+    -------
+    tuple
+        (version, journal sequence) of the stored tournament
+    None
+        if the snapshot does not store them (format version 1) or is not a snapshot
+    """
+    data = file.read(HEADER.size + STATE.size)
+    if len(data) < HEADER.size + STATE.size:
+        return None
+    magic, version = HEADER.unpack_from(data)
+    if magic != MAGIC or version < 2:
+        return None
+    return STATE.unpack_from(data, HEADER.size)
+
+
+def dump(tournament: Tournament, file: BinaryIO) -> None:
+    """
+    Writes a tournament to a binary file, see :func:`dumps`.
+    """
+    file.write(dumps(tournament))
+
+
+def load(file: BinaryIO) -> Tournament:
+    """
+    Reads a tournament from a binary file, see :func:`loads`.
+    """
+    return loads(file.read())
@@ -0,0 +1,726 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import List, Tuple
+
+from fencer import Stage, Wildcard
+
+# ------- Logging -------
+try: # Error Catch for Sphinx Documentation
+    # create logger
+    logger = logging.getLogger('sqlite_storage')
+    logger.setLevel(logging.DEBUG)
+
+    # create console handler and set level to debug
+    ch = logging.StreamHandler()
+    ch.setLevel(logging.DEBUG)
+
+    # create file handler and set level to debug
+    fh = logging.FileHandler('logs/tournament.log')
+    fh.setLevel(logging.DEBUG)
+
+    # create formatter
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    # add formatter to ch
+    ch.setFormatter(formatter)
+    fh.setFormatter(formatter)
+
+    # add ch to logger
+    logger.addHandler(ch)
+    logger.addHandler(fh)
+
+except FileNotFoundError:
+    pass
+
+
+# ------- SQLite Storage -------
+# The state of tournaments, fencers, matches and pistes is stored in normalized tables of a SQLite database (in WAL mode),
+# so that it can be queried and updated row by row. After a mutation, only the rows it may have changed are written,
+# e.g. a pushed score updates the row of the match, the rows of the two fencers and the pistes (see sync_tournament).
+# Every row stores the version of the tournament it last changed at, so the matches changed since a revision can be queried (see query_match_changes).
+
+DATABASE_PATH = 'tournament_cache/tournaments.sqlite3'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tournaments (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    location TEXT,
+    created_at TEXT,
+    stage TEXT,
+    preliminary_stage INTEGER,
+    current_round INTEGER,
+    first_elimination_round INTEGER,
+    round_version INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS fencers (
+    tournament_id TEXT,
+    id TEXT,
+    position INTEGER,
+    wildcard INTEGER,
+    start_number INTEGER,
+    name TEXT,
+    club TEXT,
+    nationality TEXT,
+    gender TEXT,
+    handedness TEXT,
+    age TEXT,
+    prelim_group INTEGER,
+    disqualified INTEGER,
+    eliminated INTEGER,
+    final_rank INTEGER,
+    matches INTEGER,
+    wins INTEGER,
+    losses INTEGER,
+    points_for INTEGER,
+    points_against INTEGER,
+    win_percentage INTEGER,
+    points_difference INTEGER,
+    label_version INTEGER,
+    PRIMARY KEY (tournament_id, id)
+);
+CREATE INDEX IF NOT EXISTS fencers_by_group ON fencers (tournament_id, prelim_group);
+
+CREATE TABLE IF NOT EXISTS matches (
+    tournament_id TEXT,
+    id TEXT,
+    elimination INTEGER,
+    round INTEGER,
+    position INTEGER,
+    stage TEXT,
+    match_group INTEGER,
+    green_id TEXT,
+    red_id TEXT,
+    green_score INTEGER,
+    red_score INTEGER,
+    piste INTEGER,
+    priority INTEGER,
+    ongoing INTEGER,
+    completed INTEGER,
+    wildcard_or_disq INTEGER,
+    ongoing_at TEXT,
+    completed_at TEXT,
+    changed_version INTEGER,
+    PRIMARY KEY (tournament_id, id)
+);
+CREATE INDEX IF NOT EXISTS matches_by_round ON matches (tournament_id, elimination, round, position);
+CREATE INDEX IF NOT EXISTS matches_on_pistes ON matches (tournament_id, completed, piste);
+
+CREATE TABLE IF NOT EXISTS pistes (
+    tournament_id TEXT,
+    number INTEGER,
+    staged INTEGER,
+    occupied INTEGER,
+    disabled INTEGER,
+    changed_version INTEGER,
+    PRIMARY KEY (tournament_id, number)
+);
+
+CREATE TABLE IF NOT EXISTS generations (
+    tournament_id TEXT PRIMARY KEY,
+    version INTEGER,
+    revision TEXT,
+    generation TEXT
+);
+"""
+
+TABLE_COLUMNS = {
+    "tournaments": ("id", "name", "location", "created_at", "stage", "preliminary_stage", "current_round", "first_elimination_round"),
+    "fencers": ("tournament_id", "id", "position", "wildcard", "start_number", "name", "club", "nationality", "gender", "handedness", "age", "prelim_group", "disqualified", "eliminated", "final_rank", "matches", "wins", "losses", "points_for", "points_against", "win_percentage", "points_difference"),
+    "matches": ("tournament_id", "id", "elimination", "round", "position", "stage", "match_group", "green_id", "red_id", "green_score", "red_score", "piste", "priority", "ongoing", "completed", "wildcard_or_disq", "ongoing_at", "completed_at"),
+    "pistes": ("tournament_id", "number", "staged", "occupied", "disabled"),
+}
+
+# Number of leading columns forming the primary key of each table
+TABLE_KEYS = {
+    "tournaments": 1,
+    "fencers": 2,
+    "matches": 2,
+    "pistes": 2,
+}
+
+# Number of leading columns that are set when a row is inserted and never change afterwards
+TABLE_FIXED = {
+    "tournaments": 1,
+    "fencers": 4,
+    "matches": 9,
+    "pistes": 2,
+}
+
+# The column storing the version of the tournament a row last changed at, and the columns it watches
+VERSION_COLUMNS = {
+    "tournaments": ("round_version", ("stage", "preliminary_stage", "current_round")),
+    "fencers": ("label_version", ("start_number", "name", "nationality")), # The columns shown in the rows of the matches
+    "matches": ("changed_version", TABLE_COLUMNS["matches"][TABLE_FIXED["matches"]:]),
+    "pistes": ("changed_version", TABLE_COLUMNS["pistes"][TABLE_FIXED["pistes"]:]),
+}
+
+# Changed together with the columns, databases of an older schema version are created again (they are filled again from the snapshots)
+SCHEMA_VERSION = 2
+
+connections = threading.local()
+
+# Tournaments whose rows have been written by this process, with the matches and fencers changed since:
+# {tournament_id: (weak reference to the tournament, match ids, fencer ids)}
+pending_rows = {}
+pending_rows_lock = threading.Lock()
+
+
+def reset_connections() -> None:
+    # SQLite connections must not be used across a fork, and the lock may have been held by another thread of the parent
+    global connections, pending_rows, pending_rows_lock
+    connections = threading.local()
+    pending_rows = {}
+    pending_rows_lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=reset_connections)
+
+
+def connect() -> sqlite3.Connection:
+    """
+    Returns the database connection of the current thread. The database and its tables are created if they do not exist,
+    tables of an older schema version are created again.
+
+    Returns
+    -------
+    sqlite3.Connection
+    """
+    if getattr(connections, "connection", None) is None:
+        if not os.path.exists(os.path.dirname(DATABASE_PATH)):
+            os.makedirs(os.path.dirname(DATABASE_PATH))
+        connection = sqlite3.connect(DATABASE_PATH, timeout=10)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        with connection:
+            # Checked while holding the write lock, so only one worker drops the tables of an older schema version
+            connection.execute("BEGIN IMMEDIATE")
+            if connection.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                for table in (*TABLE_COLUMNS, "generations"):
+                    connection.execute(f"DROP TABLE IF EXISTS {table}")
+                for statement in SCHEMA.split(";"):
+                    connection.execute(statement)
+                connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        connections.connection = connection
+    return connections.connection
+
+
+# ------- Generations -------
+# The rows of a tournament are written after its journal or snapshot, and another worker may have journaled mutations
+# that are not written to the database yet. Together with the rows, the generation of the tournament on disk
+# (snapshot signature, journal size) they have been written at is stored, so queries can tell whether the rows are up to date.
+
+def write_generation(connection: sqlite3.Connection, tournament, generation: tuple) -> None:
+    connection.execute("INSERT OR REPLACE INTO generations (tournament_id, version, revision, generation) VALUES (?, ?, ?, ?)",
+                       (tournament.id, tournament.version, tournament.revision, json.dumps(generation)))
+
+
+def update_generation(tournament, generation: tuple) -> None:
+    """
+    Stores a new generation for the rows of a tournament, if they have been written at the current revision of the tournament.
+    This is done when the journal is compacted, which changes the generation but not the tournament.
+
+    Parameters
+    ----------
+    tournament : Tournament
+        The tournament.
+    generation : tuple
+        The generation of the tournament on disk.
+    """
+    connection = connect()
+    with connection:
+        connection.execute("UPDATE generations SET generation = ? WHERE tournament_id = ? AND revision = ?",
+                           (json.dumps(generation), tournament.id, tournament.revision))
+
+
+def query_revision(tournament_id: str, generation: tuple) -> tuple:
+    """
+    Returns the version and revision of a tournament the rows have been written at, if they are up to date.
+
+    Parameters
+    ----------
+    tournament_id : str
+        The id of the tournament.
+    generation : tuple
+        The current generation of the tournament on disk.
+
+    Returns
+    -------
+    tuple
+        (version, revision), if the rows have been written at this generation
+    None
+        otherwise
+    """
+    row = connect().execute("SELECT version, revision, generation FROM generations WHERE tournament_id = ?", (tournament_id,)).fetchone()
+    if row is None or row["generation"] != json.dumps(generation):
+        return None
+    return row["version"], row["revision"]
+
+
+@contextmanager
+def read_transaction():
+    """
+    Context manager for queries that have to see the same state of the database, e.g. :func:`query_revision` and :func:`query_matches`.
+    """
+    connection = connect()
+    connection.execute("BEGIN")
+    try:
+        yield
+    finally:
+        connection.commit()
+
+
+# ------- Rows -------
+
+def tournament_row(tournament) -> tuple:
+    if tournament.stage == Stage.PRELIMINARY_ROUND:
+        current_round = tournament.preliminary_stage - 1
+    else:
+        current_round = len(tournament.elimination_matches_archive)
+    return (tournament.id, tournament.name, tournament.location, tournament.created_at.isoformat(), tournament.stage.name, tournament.preliminary_stage, current_round, tournament.first_elimination_round)
+
+def fencer_row(tournament, fencer, position: int) -> tuple:
+    return (tournament.id, fencer.id, position, type(fencer) == Wildcard) + fencer_values(fencer)
+
+def fencer_values(fencer) -> tuple:
+    if type(fencer) == Wildcard:
+        statistics = (0, 0, 0, 0, 0, 0, 0)
+    else:
+        overall = fencer.statistics["overall"]
+        statistics = (overall["matches"], overall["wins"], overall["losses"], overall["points_for"], overall["points_against"], fencer.win_percentage(), fencer.points_difference_int())
+    return (fencer.start_number, fencer.name, fencer.club, fencer.nationality, fencer.gender, fencer.handedness, fencer.age, fencer.prelim_group, fencer.disqualified, fencer.eliminated, fencer.final_rank) + statistics
+
+def match_row(tournament, match, elimination: bool, round: int, position: int) -> tuple:
+    return (tournament.id, match.id, elimination, round, position, match.stage.name, match.group, match.green.id, match.red.id) + match_values(match)
+
+def match_values(match) -> tuple:
+    return (
+        match.green_score, match.red_score,
+        match.piste.number if match.piste else None, match.priority,
+        match.match_ongoing, match.match_completed, match.wildcard_or_disq,
+        match.match_ongoing_timestamp.isoformat() if match.match_ongoing_timestamp else None,
+        match.match_completed_timestamp.isoformat() if match.match_completed_timestamp else None,
+    )
+
+def piste_row(tournament, piste) -> tuple:
+    return (tournament.id, piste.number, piste.staged, piste.occupied, piste.disabled)
+
+def tournament_rows(tournament) -> dict:
+    """
+    Converts a tournament into the rows of all tables.
+
+    Returns
+    -------
+    dict
+        {table: {key: row}}
+    """
+    rows = {table: {} for table in TABLE_COLUMNS}
+    rows["tournaments"][(tournament.id,)] = tournament_row(tournament)
+
+    fencers = list(tournament.fencers)
+    rounds = [(False, round, matches) for round, matches in enumerate(tournament.preliminary_matches)]
+    rounds += [(True, round, matches) for round, matches in enumerate(tournament.elimination_matches_archive + [tournament.elimination_matches])]
+    for elimination, round, matches in rounds:
+        for position, match in enumerate(matches):
+            rows["matches"][(tournament.id, match.id)] = match_row(tournament, match, elimination, round, position)
+            for fencer in match:
+                if type(fencer) == Wildcard and fencer not in fencers:
+                    fencers.append(fencer)
+
+    for position, fencer in enumerate(fencers):
+        rows["fencers"][(tournament.id, fencer.id)] = fencer_row(tournament, fencer, position)
+    for piste in tournament.pistes:
+        rows["pistes"][(tournament.id, piste.number)] = piste_row(tournament, piste)
+    return rows
+
+def changed_rows(tournament, operation: str, args: tuple) -> Tuple[List[str], List[str]]:
+    """
+    Returns the ids of the matches and fencers whose rows a journaled operation may have changed, besides the rows of the fencers
+    of these matches, the pistes and the matches on pistes, which are always written (see :func:`sync_tournament`).
+
+    Returns
+    -------
+    Tuple[List[str], List[str]]
+        The match ids and the fencer ids
+    None
+        if the operation is not known, all rows have to be written
+    """
+    if operation in ("push_score", "set_active", "prioritize_match", "assign_certain_piste", "remove_piste_assignment"):
+        return [args[0]], []
+    if operation == "push_scores":
+        return [score[0] for score in args[0]], []
+    if operation == "disqualify_fencer":
+        # The open matches of the fencer are finished, which changes the statistics of the opponents as well
+        return [match.id for match in tournament.fencer_matches.get(args[0], [])], [args[0]]
+    if operation == "change_fencer_attribute":
+        return [], [args[0]]
+    if operation in ("toggle_piste", "set_tableau_approved", "add_cookie", "subscribe_fencer_to_push_notifications", "unsubscribe_fencer_from_push_notifications"):
+        return [], []
+    return None
+
+
+# ------- Writing -------
+
+def insert_statement(table: str) -> str:
+    columns = TABLE_COLUMNS[table] + (VERSION_COLUMNS[table][0],)
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+
+def update_statement(table: str) -> str:
+    # Only rows whose values differ are updated, and their version column only if one of the watched columns differs.
+    # The parameters are the row (by column name) and its "version".
+    columns = TABLE_COLUMNS[table][TABLE_FIXED[table]:]
+    keys = TABLE_COLUMNS[table][:TABLE_KEYS[table]]
+    version_column, watched = VERSION_COLUMNS[table]
+    return (
+        f"UPDATE {table} SET {', '.join(f'{column} = :{column}' for column in columns)}, "
+        f"{version_column} = CASE WHEN ({', '.join(watched)}) IS NOT ({', '.join(':' + column for column in watched)}) THEN :version ELSE {version_column} END "
+        f"WHERE {' AND '.join(f'{column} = :{column}' for column in keys)} AND ({', '.join(columns)}) IS NOT ({', '.join(':' + column for column in columns)})"
+    )
+
+def delete_statement(table: str) -> str:
+    columns = TABLE_COLUMNS[table]
+    return f"DELETE FROM {table} WHERE {' AND '.join(column + ' = ?' for column in columns[:TABLE_KEYS[table]])}"
+
+def update_rows(connection: sqlite3.Connection, table: str, rows: list, version: int) -> int:
+    # The rows are given as (key, values), with the values of the columns that are not fixed
+    keys = TABLE_COLUMNS[table][:TABLE_KEYS[table]]
+    columns = TABLE_COLUMNS[table][TABLE_FIXED[table]:]
+    cursor = connection.executemany(update_statement(table), [{**dict(zip(keys, key)), **dict(zip(columns, values)), "version": version} for key, values in rows])
+    return max(cursor.rowcount, 0)
+
+def write_tournament(tournament, generation: tuple) -> int:
+    """
+    Writes all rows of a tournament: rows that have changed are updated, new rows are inserted and rows of removed matches (or fencers, pistes) are deleted.
+    This is done whenever a full snapshot of the tournament is saved. Afterwards, the rows are written incrementally by :func:`sync_tournament`.
+
+    Parameters
+    ----------
+    tournament : Tournament
+        The tournament to be written.
+    generation : tuple
+        The generation of the tournament on disk (see :func:`query_revision`).
+
+    Returns
+    -------
+    int
+        The number of written rows.
+    """
+    rows = tournament_rows(tournament)
+    written = 0
+    connection = connect()
+    with connection:
+        matches_changed = False
+        for table in TABLE_COLUMNS:
+            keys = TABLE_COLUMNS[table][:TABLE_KEYS[table]]
+            stored = {tuple(row) for row in connection.execute(f"SELECT {', '.join(keys)} FROM {table} WHERE {keys[0]} = ?", (tournament.id,))}
+            inserted = [row for key, row in rows[table].items() if key not in stored]
+            deleted = [key for key in stored if key not in rows[table]]
+            if inserted:
+                connection.executemany(insert_statement(table), [row + (tournament.version,) for row in inserted])
+            if deleted:
+                connection.executemany(delete_statement(table), deleted)
+            written += len(inserted) + len(deleted)
+            written += update_rows(connection, table, [(key, row[TABLE_FIXED[table]:]) for key, row in rows[table].items() if key in stored], tournament.version)
+            if table == "matches":
+                matches_changed = bool(inserted or deleted)
+
+        if matches_changed:
+            # Clients that have seen matches that are gone or did not have the new ones have to request all matches again (see query_match_changes)
+            connection.execute("UPDATE tournaments SET round_version = ? WHERE id = ?", (tournament.version, tournament.id))
+        write_generation(connection, tournament, generation)
+
+    with pending_rows_lock:
+        pending_rows[tournament.id] = (weakref.ref(tournament), set(), set())
+    return written
+
+def mark_changed(tournament, operation: str, *args) -> None:
+    """
+    Remembers the rows a journaled operation may have changed, so that :func:`sync_tournament` only writes these.
+    Has to be called for every journaled operation, also for the ones of other workers replayed onto the tournament.
+
+    Parameters
+    ----------
+    tournament : Tournament
+        The mutated tournament.
+    operation : str
+        The name of the Tournament method that was called (see ``journal.JOURNALED_OPERATIONS``).
+    *args
+        The arguments the method was called with.
+    """
+    with pending_rows_lock:
+        pending = pending_rows.get(tournament.id)
+        if pending is None or pending[0]() is not tournament:
+            return # All rows are written with the next sync
+        changed = changed_rows(tournament, operation, args)
+        if changed is None:
+            del pending_rows[tournament.id]
+        else:
+            pending[1].update(changed[0])
+            pending[2].update(changed[1])
+
+def sync_tournament(tournament, generation: tuple) -> int:
+    """
+    Writes the rows of a tournament the journaled operations since the last write may have changed (see :func:`mark_changed`):
+    the rows of their matches and the fencers of these matches, the pistes, and the matches that are (or were, as stored in the database) on a piste,
+    as staging matches on the free pistes changes these after any operation. The number of written rows does not depend on the size of the tournament.
+    If the rows of the tournament have not been written by this process yet, or the tournament has been loaded again since, all rows are written.
+
+    Parameters
+    ----------
+    tournament : Tournament
+        The mutated tournament.
+    generation : tuple
+        The generation of the tournament on disk (see :func:`query_revision`).
+
+    Returns
+    -------
+    int
+        The number of written rows.
+    """
+    with pending_rows_lock:
+        pending = pending_rows.get(tournament.id)
+        if pending is not None and pending[0]() is tournament:
+            pending_rows[tournament.id] = (pending[0], set(), set())
+    if pending is None or pending[0]() is not tournament:
+        return write_tournament(tournament, generation)
+
+    _, match_ids, fencer_ids = pending
+    connection = connect()
+    try:
+        with connection:
+            written = write_changed_rows(connection, tournament, match_ids, fencer_ids)
+            write_generation(connection, tournament, generation)
+    except BaseException:
+        # The changes are lost, all rows are written with the next sync
+        with pending_rows_lock:
+            pending_rows.pop(tournament.id, None)
+        raise
+    return written
+
+def write_changed_rows(connection: sqlite3.Connection, tournament, match_ids: set, fencer_ids: set) -> int:
+    match_ids.update(row["id"] for row in connection.execute("SELECT id FROM matches WHERE tournament_id = ? AND completed = 0 AND piste IS NOT NULL", (tournament.id,)))
+    matches = {}
+    for match_id in match_ids:
+        match = tournament.match_index.get(match_id)
+        if match is not None:
+            matches[match.id] = match
+    for piste in tournament.pistes:
+        for match in piste.ongoing_matches + [piste.staged_match]:
+            if match is not None:
+                matches[match.id] = match
+
+    fencers = {}
+    for fencer_id in fencer_ids:
+        fencer = tournament.fencer_index.get(fencer_id)
+        if fencer is not None:
+            fencers[fencer.id] = fencer
+    for match in matches.values():
+        for fencer in match:
+            fencers[fencer.id] = fencer
+
+    written = update_rows(connection, "matches", [((tournament.id, match.id), match_values(match)) for match in matches.values()], tournament.version)
+    written += update_rows(connection, "fencers", [((tournament.id, fencer.id), fencer_values(fencer)) for fencer in fencers.values()], tournament.version)
+    written += update_rows(connection, "pistes", [((tournament.id, piste.number), piste_row(tournament, piste)[TABLE_FIXED["pistes"]:]) for piste in tournament.pistes], tournament.version)
+    return written
+
+def delete_tournament(tournament_id: str) -> None:
+    """
+    Deletes all rows of a tournament.
+
+    Parameters
+    ----------
+    tournament_id : str
+        The id of the tournament.
+    """
+    connection = connect()
+    with connection:
+        for table in TABLE_COLUMNS:
+            connection.execute(f"DELETE FROM {table} WHERE {TABLE_COLUMNS[table][0]} = ?", (tournament_id,))
+        connection.execute("DELETE FROM generations WHERE tournament_id = ?", (tournament_id,))
+
+    with pending_rows_lock:
+        pending_rows.pop(tournament_id, None)
+
+
+# ------- Queries -------
+
+def query_matches(tournament_id: str) -> dict:
+    """
+    Returns the matches of the current round of a tournament in the format of :meth:`tournament.Tournament.get_matches`.
+
+    Parameters
+    ----------
+    tournament_id : str
+        The id of the tournament.
+
+    Returns
+    -------
+    dict
+        if the tournament exists
+    None
+        if the tournament does not exist
+    """
+    return select_matches(connect(), tournament_id)
+
+
+def query_match_changes(tournament_id: str, since: str) -> dict:
+    """
+    Returns the matches of the current round of a tournament that have changed since a revision, in the format of :meth:`tournament.Tournament.get_match_changes`.
+    These are the matches whose row, fencers (start number, name or nationality) or piste have changed at a later version of the tournament.
+    Clients with a revision of an earlier round, or before matches of the round have been added or removed, get all matches with ``"full": true``.
+
+    Parameters
+    ----------
+    tournament_id : str
+        The id of the tournament.
+    since : str
+        The revision the client has seen last, or an empty string.
+
+    Returns
+    -------
+    dict
+        if the tournament exists
+    None
+        if the tournament does not exist
+    """
+    connection = connect()
+    written = connection.execute("SELECT version, revision FROM generations WHERE tournament_id = ?", (tournament_id,)).fetchone()
+    tournament = connection.execute("SELECT round_version FROM tournaments WHERE id = ?", (tournament_id,)).fetchone()
+    if written is None or tournament is None:
+        return None
+
+    try:
+        since_version = int(since.split(".")[0])
+    except ValueError:
+        since_version = None
+    full = since_version is None or not tournament["round_version"] <= since_version <= written["version"]
+
+    dictionary = select_matches(connection, tournament_id, None if full else since_version)
+    dictionary["revision"] = written["revision"]
+    dictionary["full"] = full
+    # Matches are only removed together with a new round_version, which makes the response full
+    dictionary["removed"] = []
+    return dictionary
+
+
+def select_matches(connection: sqlite3.Connection, tournament_id: str, since_version: int = None) -> dict:
+    tournament = connection.execute("SELECT stage, preliminary_stage, current_round FROM tournaments WHERE id = ?", (tournament_id,)).fetchone()
+    if tournament is None:
+        return None
+
+    preliminary = tournament["stage"] == Stage.PRELIMINARY_ROUND.name
+    rows = connection.execute("""
+        SELECT m.*,
+            g.start_number AS green_start_number, g.name AS green_name, g.nationality AS green_nationality,
+            r.start_number AS red_start_number, r.name AS red_name, r.nationality AS red_nationality,
+            p.occupied AS piste_occupied
+        FROM matches m
+        JOIN fencers g ON g.tournament_id = m.tournament_id AND g.id = m.green_id
+        JOIN fencers r ON r.tournament_id = m.tournament_id AND r.id = m.red_id
+        LEFT JOIN pistes p ON p.tournament_id = m.tournament_id AND p.number = m.piste
+        WHERE m.tournament_id = :tournament_id AND m.elimination = :elimination AND m.round = :round
+            AND (:since IS NULL OR m.changed_version > :since OR g.label_version > :since OR r.label_version > :since OR p.changed_version > :since)
+        ORDER BY m.position
+    """, {"tournament_id": tournament_id, "elimination": not preliminary, "round": tournament["current_round"], "since": since_version}).fetchall()
+
+    dictionary = {
+        "stage": tournament["stage"].replace("_", " ") + f" {tournament['preliminary_stage']}" if preliminary else tournament["stage"],
+        "matches": [],
+    }
+    for row in rows:
+        dictionary["matches"].append({
+            "id": row["id"],
+            "group": row["match_group"] if preliminary else row["stage"].replace("_", " ").title(),
+            "piste": str(row["piste"]) if row["piste"] is not None else ("-" if row["wildcard_or_disq"] else "TBA"),
+            "green": f"{row['green_start_number']}   {row['green_name']}",
+            "green_id": row["green_id"],
+            "green_nationality": row["green_nationality"],
+            "green_score": row["green_score"],
+            "red": f"{row['red_start_number']}   {row['red_name']}",
+            "red_id": row["red_id"],
+            "red_nationality": row["red_nationality"],
+            "red_score": row["red_score"],
+            "ongoing": bool(row["ongoing"]),
+            "complete": bool(row["completed"]),
+            "piste_occupied": bool(row["piste_occupied"]) if row["piste"] is not None else None,
+            "priority": row["priority"],
+        })
+    return dictionary
+
+
+def query_standings(tournament_id: str, group=None, gender=None, handedness=None, age_group=None) -> dict:
+    """
+    Returns the standings of a tournament in the format of :meth:`tournament.Tournament.get_standings`.
+    The order is the same as the one of :func:`tournament.sorting_fencers`.
+
+    Parameters
+    ----------
+    tournament_id : str
+        The id of the tournament.
+    group, gender, handedness, age_group : str, optional
+        Filters, see :meth:`tournament.Tournament.get_standings`
+
+    Returns
+    -------
+    dict
+        if the tournament exists
+    None
+        if the tournament does not exist
+    """
+    connection = connect()
+    tournament = connection.execute("SELECT stage, first_elimination_round FROM tournaments WHERE id = ?", (tournament_id,)).fetchone()
+    if tournament is None:
+        return None
+
+    conditions = ["tournament_id = ?", "wildcard = 0"]
+    parameters = [tournament_id]
+    if group and group != "all" and tournament["stage"] == Stage.PRELIMINARY_ROUND.name:
+        conditions.append("prelim_group = ?")
+        parameters.append(int(group))
+    if gender != None:
+        conditions.append("gender = ?")
+        parameters.append(gender)
+    if handedness != None:
+        conditions.append("handedness = ?")
+        parameters.append(handedness)
+    if age_group != None:
+        age_range = age_group.split("-")
+        conditions.append("CAST(age AS INTEGER) BETWEEN ? AND ?")
+        parameters.extend([int(age_range[0]), int(age_range[1])])
+
+    rows = connection.execute(f"""
+        SELECT * FROM fencers
+        WHERE {' AND '.join(conditions)}
+        ORDER BY disqualified ASC, COALESCE(final_rank, 0) ASC, win_percentage DESC, points_difference DESC, points_for DESC, points_against DESC, position ASC
+    """, parameters).fetchall()
+
+    standings = {
+        "stage": str(Stage[tournament["stage"]]),
+        "first_elimination_round": tournament["first_elimination_round"],
+        "standings": [],
+    }
+    for rank, row in enumerate(rows, start=1):
+        standings["standings"].append({
+            "rank": rank,
+            "id": row["id"],
+            "name": f"{row['start_number']}   {row['name']}",
+            "club": row["club"],
+            "nationality": row["nationality"],
+            "gender": row["gender"],
+            "age": row["age"],
+            "handedness": row["handedness"],
+            "win_percentage": row["win_percentage"],
+            "win_lose": f"{row['wins']} - {row['losses']}",
+            "points_difference": "+" + str(row["points_difference"]) if row["points_difference"] > 0 else str(row["points_difference"]),
+            "points_for": row["points_for"],
+            "points_against": row["points_against"],
+            "eliminated": bool(row["eliminated"]),
+        })
+    return standings
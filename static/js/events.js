@@ -0,0 +1,69 @@
+// Calls the callback whenever the tournament has changed, using the event stream of the tournament (/api/events).
+// Bursts of changes (e.g. several scores pushed at once) are coalesced, the callback is called at most once every min_interval milliseconds.
+// If the browser does not support event streams, the server has disabled or refused them, or the stream stalls,
+// the callback is called every fallback_interval milliseconds instead.
+// The server sends a ping every 15 seconds (event_stream_keep_alive_interval), a stream without any message for STREAM_TIMEOUT milliseconds has stalled.
+const STREAM_TIMEOUT = 40000;
+// Whether the server has enabled event streams (enable_event_streams), set by the page in the data-enabled attribute of this script
+const EVENT_STREAMS_ENABLED = document.currentScript.dataset.enabled === "true";
+
+function subscribe_to_updates(tournament_id, callback, fallback_interval, min_interval = 0) {
+    let polling = null;
+    let pending = null;
+    let last_call = 0;
+    let watchdog = null;
+
+    function start_polling() {
+        if (polling === null) {
+            polling = setInterval(callback, fallback_interval);
+        }
+    }
+
+    function schedule_callback() {
+        if (pending !== null) {
+            return;
+        }
+        let delay = Math.max(0, last_call + min_interval - Date.now());
+        pending = setTimeout(function () {
+            pending = null;
+            last_call = Date.now();
+            callback();
+        }, delay);
+    }
+
+    // Without enabled event streams, the page polls right away instead of opening a stream that is refused
+    if (!EVENT_STREAMS_ENABLED || !window.EventSource) {
+        start_polling();
+        return;
+    }
+
+    let source = new EventSource("/api/events?tournament_id=" + tournament_id);
+
+    function reset_watchdog() {
+        clearTimeout(watchdog);
+        watchdog = setTimeout(function () {
+            // A stalled connection never fires onerror
+            source.close();
+            start_polling();
+        }, STREAM_TIMEOUT);
+    }
+
+    reset_watchdog();
+    source.onopen = reset_watchdog;
+    source.addEventListener("ping", reset_watchdog);
+    source.addEventListener("update", function () {
+        reset_watchdog();
+        schedule_callback();
+    });
+    source.addEventListener("deleted", function () {
+        clearTimeout(watchdog);
+        source.close();
+    });
+    source.onerror = function () {
+        // The browser reconnects on its own, unless the stream has been refused (e.g. event streams are disabled or too many are open)
+        if (source.readyState === EventSource.CLOSED) {
+            clearTimeout(watchdog);
+            start_polling();
+        }
+    };
+}
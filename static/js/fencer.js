@@ -642,8 +642,9 @@ window.onload = function () {
     });
 }
 
-// Update every 10 seconds
-setInterval(function () { update() }, 10000);
+// Update whenever the tournament changes, at most every 5 seconds (every 10 seconds without event streams)
+// Every score of the tournament wakes up the stream, not only the ones of this fencer
+subscribe_to_updates(tournament_id, function () { update() }, 10000, 5000);
 
 
 
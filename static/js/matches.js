@@ -7,10 +7,13 @@ if (window.self === window.top) {
 }
 
 
+// Revision of the tournament the displayed matches belong to, only the matches changed since then are requested
+let matches_revision = null
+
 function get_matches() {
-    fetch('/api/matches/update?tournament_id=' + tournament_id)
+    fetch('/api/matches/update?tournament_id=' + tournament_id + '&since=' + (matches_revision ?? ''))
     .then(response => response.json())
-    .then(response => {
+    .then(async response => {
         console.log(response)
         if (Object.keys(response).includes("error")) {
             console.log(response["error"]);
@@ -28,11 +31,40 @@ function get_matches() {
             }
         } else {
             let matches = response["matches"]
-            update_matches(matches)
+            if (response["full"] === false) {
+                await apply_match_changes(matches, response["removed"])
+            } else {
+                await update_matches(matches)
+            }
+            matches_revision = response["revision"]
         }
     })
 }
 
+// Replaces the rows of the changed matches and removes the rows of the removed ones, instead of redrawing the table
+async function apply_match_changes(matches, removed) {
+    const matches_table = document.getElementById("tablebody")
+
+    for (const element of matches) {
+        let item = await create_match_item(element, matches_table)
+        let old_item = document.getElementById("match-" + element["id"])
+        if (old_item != null) {
+            old_item.replaceWith(item)
+        } else {
+            matches_table.appendChild(item)
+        }
+    }
+
+    for (const match_id of removed) {
+        let old_item = document.getElementById("match-" + match_id)
+        if (old_item != null) {
+            old_item.remove()
+        }
+    }
+
+    toggleFilter(true)
+}
+
 function get_flag(country) {
     return new Promise((resolve, reject) => {
       // Check if the file is already in cache
@@ -98,188 +130,7 @@ async function update_matches(matches) {
 
     // Add the new, updated rows
     for (const element of matches) {
-        let item = document.createElement('div')
-        item.className = "item"
-        item.id = "match-" + element["id"]
-        item.dataset.match_id = element["id"]
-        item.dataset.completed = element["complete"]
-        item.dataset.ongoing = element["ongoing"]
-        item.dataset.priority = element["priority"]
-
-        let group = document.createElement('div')
-        group.classList.add("group", "cell", "first-column")
-        if (element["group"] != null) {
-            group.innerHTML = element["group"]
-        } else {
-            group.innerHTML = "F"
-        }
-
-        let piste = document.createElement('div')
-        let piste_wrapper = document.createElement('div')
-        piste_wrapper.innerHTML = element["piste"]
-        piste_wrapper.classList.add("piste-wrapper")
-        piste.classList.add("piste", "cell")
-        if (element["complete"] === true) {
-            piste_wrapper.classList.add("piste-completed")
-        } else if (element["ongoing"] === true) {
-            piste_wrapper.classList.add("piste-ongoing")
-        } else if (element["piste_occupied"] === false) {
-            piste_wrapper.classList.add("piste-empty")
-            piste.onclick = function() {
-                openPisteOptions(item, matches_table, element["id"])
-            }
-        } else if (element["piste"] != "TBA") {
-            piste_wrapper.classList.add("piste-staged")
-            piste.onclick = function() {
-                openPisteOptions(item, matches_table, element["id"])
-            }
-        } else {
-            piste_wrapper.classList.add("piste-tba")
-            if (element["priority"] == 1) {
-                piste_wrapper.innerHTML = '<i class="fa-solid fa-circle-arrow-up"></i>'
-            } else if (element["priority"] == -1) {
-                piste_wrapper.innerHTML = '<i class="fa-solid fa-circle-arrow-down"></i>'
-            }
-            piste.onclick = function() {
-                openPisteOptions(item, matches_table, element["id"])
-            }
-        }
-        piste.appendChild(piste_wrapper)
-
-        let score = document.createElement('div')
-        score.classList.add("score", "cell")
-        if (element["green_score"] != 0 || element["red_score"] != 0) {
-            if (element["red_score"].toString().length == 1 && element["green_score"].toString().length == 2) {
-                score.innerHTML = "&ensp;" + element["red_score"] + "&thinsp;:&thinsp;" + element["green_score"]
-            } else if (element["red_score"].toString().length == 2 && element["green_score"].toString().length == 1) {
-                score.innerHTML = element["red_score"] + "&thinsp;:&thinsp;" + element["green_score"] + "&ensp;"
-            } else {
-                score.innerHTML = element["red_score"] + "&thinsp;:&thinsp;" + element["green_score"]
-            }
-        } else {
-            score.innerHTML = " : "
-        }
-
-        let red = document.createElement('div')
-        red.dataset.fencer_id = element["red_id"]
-        red.classList.add("red", "cell")
-        let red_wrapper = document.createElement('div')
-        red_wrapper.classList.add("Name-Banner")
-        let red_name = document.createElement('div')
-        red_name.classList.add("name")
-        let red_flag = document.createElement('div')
-        red_flag.classList.add("flag")
-        let red_svgString = await get_flag(element["red_nationality"]);
-        let red_svg = parseSVG(red_svgString);
-        red_flag.appendChild(red_svg);
-        red_name.innerHTML = element["red"]
-        red_wrapper.appendChild(red_flag)
-        red_wrapper.appendChild(red_name)
-        if (element["red"].includes("Wildcard") == false) {
-            red.onclick = function() {
-                window.open("/" + tournament_id + "/fencer/" + element["red_id"], "_blank")
-            }
-        } else {
-            red.classList.add("wildcard")
-        }
-        red.appendChild(red_wrapper)
-
-        let green = document.createElement('div')
-        green.dataset.fencer_id = element["green_id"]
-        green.classList.add("green", "cell")
-        let green_wrapper = document.createElement('div')
-        green_wrapper.classList.add("Name-Banner")
-        let green_name = document.createElement('div')
-        green_name.classList.add("name")
-        let green_flag = document.createElement('div')
-        green_flag.classList.add("flag")
-        let green_svgString = await get_flag(element["green_nationality"]);
-        let green_svg = parseSVG(green_svgString);
-        green_flag.appendChild(green_svg);
-        green_name.innerHTML = element["green"]
-        green_wrapper.appendChild(green_flag)
-        green_wrapper.appendChild(green_name)
-        if (element["green"].includes("Wildcard") == false) {
-            green.onclick = function() {
-                window.open("/" + tournament_id + "/fencer/" + element["green_id"], "_blank")
-            }
-        } else {
-            green.classList.add("wildcard")
-        }
-        green.appendChild(green_wrapper)
-
-        let forward_button = document.createElement('div')
-        forward_button.classList.add("forward", "cell")
-        let forward_button_wrapper = document.createElement('div')
-        forward_button_wrapper.classList.add("option-button-wrapper")
-        let forward_icon = document.createElement('i')
-        if (element["complete"] == true) {
-            forward_button_wrapper.classList.add("forward-button-completed")
-            forward_icon.classList.add("fa-solid", "fa-check")
-            forward_button.onclick = function() {
-                openScoreOptions(item, matches_table, element["id"])
-            }
-            forward_button.onmouseenter = function() {
-                forward_icon.classList.remove("fa-check")
-                forward_icon.classList.add("fa-edit")
-            }
-            forward_button.onmouseleave = function() {
-                forward_icon.classList.remove("fa-edit")
-                forward_icon.classList.add("fa-check")
-            }
-        } else if (element["ongoing"] == true) {
-            forward_button_wrapper.classList.add("forward-button-ongoing")
-            forward_icon.classList.add("fa-solid", "fa-spinner", "fa-spin")
-            forward_button.onclick = function() {
-                openScoreOptions(item, matches_table, element["id"])
-            }
-            forward_button.onmouseenter = function() {
-                forward_icon.classList.remove("fa-spin", "fa-spinner")
-                forward_icon.classList.add("fa-trophy")
-            }
-            forward_button.onmouseleave = function() {
-                forward_icon.classList.remove("fa-trophy")
-                forward_icon.classList.add("fa-spin", "fa-spinner")
-            } 
-        } else if (element["piste"] != "TBA") {
-            forward_button_wrapper.classList.add("forward-button-staged")
-            forward_button.onclick = function() {
-                match_set_active(element["id"])
-            }
-            forward_icon.classList.add("fa-solid", "fa-play")
-            if (element["piste_occupied"] == false) {
-                forward_icon.classList.add("fa-beat")
-            }
-        } else {
-            forward_button_wrapper.classList.add("forward-button-blocked")
-            forward_icon.classList.add("fa-solid", "fa-ban")
-        }
-        forward_button_wrapper.appendChild(forward_icon)
-        forward_button.appendChild(forward_button_wrapper)
-
-        let options_button = document.createElement('div')
-        options_button.classList.add("options", "cell", "last-column")
-        let options_button_wrapper = document.createElement('div')
-        options_button_wrapper.classList.add("option-button-wrapper")
-        let options_icon = document.createElement('i')
-        options_icon.classList.add("fa-solid", "fa-gear")
-        options_button_wrapper.appendChild(options_icon)
-        options_button.onclick = function() {
-            openMatchOptions(item, matches_table, element["id"])
-        }
-        options_button.appendChild(options_button_wrapper)
-
-        item.appendChild(group)
-        item.appendChild(piste)
-        item.appendChild(red)
-        item.appendChild(score)
-        item.appendChild(green)
-        item.appendChild(forward_button)
-        item.appendChild(options_button)
-
-        
-        matches_array.push(item)
-        
+        matches_array.push(await create_match_item(element, matches_table))
     }
     
     clearTable();
@@ -293,6 +144,189 @@ async function update_matches(matches) {
     toggleFilter(true)
 }
 
+async function create_match_item(element, matches_table) {
+    let item = document.createElement('div')
+    item.className = "item"
+    item.id = "match-" + element["id"]
+    item.dataset.match_id = element["id"]
+    item.dataset.completed = element["complete"]
+    item.dataset.ongoing = element["ongoing"]
+    item.dataset.priority = element["priority"]
+
+    let group = document.createElement('div')
+    group.classList.add("group", "cell", "first-column")
+    if (element["group"] != null) {
+        group.innerHTML = element["group"]
+    } else {
+        group.innerHTML = "F"
+    }
+
+    let piste = document.createElement('div')
+    let piste_wrapper = document.createElement('div')
+    piste_wrapper.innerHTML = element["piste"]
+    piste_wrapper.classList.add("piste-wrapper")
+    piste.classList.add("piste", "cell")
+    if (element["complete"] === true) {
+        piste_wrapper.classList.add("piste-completed")
+    } else if (element["ongoing"] === true) {
+        piste_wrapper.classList.add("piste-ongoing")
+    } else if (element["piste_occupied"] === false) {
+        piste_wrapper.classList.add("piste-empty")
+        piste.onclick = function() {
+            openPisteOptions(item, matches_table, element["id"])
+        }
+    } else if (element["piste"] != "TBA") {
+        piste_wrapper.classList.add("piste-staged")
+        piste.onclick = function() {
+            openPisteOptions(item, matches_table, element["id"])
+        }
+    } else {
+        piste_wrapper.classList.add("piste-tba")
+        if (element["priority"] == 1) {
+            piste_wrapper.innerHTML = '<i class="fa-solid fa-circle-arrow-up"></i>'
+        } else if (element["priority"] == -1) {
+            piste_wrapper.innerHTML = '<i class="fa-solid fa-circle-arrow-down"></i>'
+        }
+        piste.onclick = function() {
+            openPisteOptions(item, matches_table, element["id"])
+        }
+    }
+    piste.appendChild(piste_wrapper)
+
+    let score = document.createElement('div')
+    score.classList.add("score", "cell")
+    if (element["green_score"] != 0 || element["red_score"] != 0) {
+        if (element["red_score"].toString().length == 1 && element["green_score"].toString().length == 2) {
+            score.innerHTML = "&ensp;" + element["red_score"] + "&thinsp;:&thinsp;" + element["green_score"]
+        } else if (element["red_score"].toString().length == 2 && element["green_score"].toString().length == 1) {
+            score.innerHTML = element["red_score"] + "&thinsp;:&thinsp;" + element["green_score"] + "&ensp;"
+        } else {
+            score.innerHTML = element["red_score"] + "&thinsp;:&thinsp;" + element["green_score"]
+        }
+    } else {
+        score.innerHTML = " : "
+    }
+
+    let red = document.createElement('div')
+    red.dataset.fencer_id = element["red_id"]
+    red.classList.add("red", "cell")
+    let red_wrapper = document.createElement('div')
+    red_wrapper.classList.add("Name-Banner")
+    let red_name = document.createElement('div')
+    red_name.classList.add("name")
+    let red_flag = document.createElement('div')
+    red_flag.classList.add("flag")
+    let red_svgString = await get_flag(element["red_nationality"]);
+    let red_svg = parseSVG(red_svgString);
+    red_flag.appendChild(red_svg);
+    red_name.innerHTML = element["red"]
+    red_wrapper.appendChild(red_flag)
+    red_wrapper.appendChild(red_name)
+    if (element["red"].includes("Wildcard") == false) {
+        red.onclick = function() {
+            window.open("/" + tournament_id + "/fencer/" + element["red_id"], "_blank")
+        }
+    } else {
+        red.classList.add("wildcard")
+    }
+    red.appendChild(red_wrapper)
+
+    let green = document.createElement('div')
+    green.dataset.fencer_id = element["green_id"]
+    green.classList.add("green", "cell")
+    let green_wrapper = document.createElement('div')
+    green_wrapper.classList.add("Name-Banner")
+    let green_name = document.createElement('div')
+    green_name.classList.add("name")
+    let green_flag = document.createElement('div')
+    green_flag.classList.add("flag")
+    let green_svgString = await get_flag(element["green_nationality"]);
+    let green_svg = parseSVG(green_svgString);
+    green_flag.appendChild(green_svg);
+    green_name.innerHTML = element["green"]
+    green_wrapper.appendChild(green_flag)
+    green_wrapper.appendChild(green_name)
+    if (element["green"].includes("Wildcard") == false) {
+        green.onclick = function() {
+            window.open("/" + tournament_id + "/fencer/" + element["green_id"], "_blank")
+        }
+    } else {
+        green.classList.add("wildcard")
+    }
+    green.appendChild(green_wrapper)
+
+    let forward_button = document.createElement('div')
+    forward_button.classList.add("forward", "cell")
+    let forward_button_wrapper = document.createElement('div')
+    forward_button_wrapper.classList.add("option-button-wrapper")
+    let forward_icon = document.createElement('i')
+    if (element["complete"] == true) {
+        forward_button_wrapper.classList.add("forward-button-completed")
+        forward_icon.classList.add("fa-solid", "fa-check")
+        forward_button.onclick = function() {
+            openScoreOptions(item, matches_table, element["id"])
+        }
+        forward_button.onmouseenter = function() {
+            forward_icon.classList.remove("fa-check")
+            forward_icon.classList.add("fa-edit")
+        }
+        forward_button.onmouseleave = function() {
+            forward_icon.classList.remove("fa-edit")
+            forward_icon.classList.add("fa-check")
+        }
+    } else if (element["ongoing"] == true) {
+        forward_button_wrapper.classList.add("forward-button-ongoing")
+        forward_icon.classList.add("fa-solid", "fa-spinner", "fa-spin")
+        forward_button.onclick = function() {
+            openScoreOptions(item, matches_table, element["id"])
+        }
+        forward_button.onmouseenter = function() {
+            forward_icon.classList.remove("fa-spin", "fa-spinner")
+            forward_icon.classList.add("fa-trophy")
+        }
+        forward_button.onmouseleave = function() {
+            forward_icon.classList.remove("fa-trophy")
+            forward_icon.classList.add("fa-spin", "fa-spinner")
+        } 
+    } else if (element["piste"] != "TBA") {
+        forward_button_wrapper.classList.add("forward-button-staged")
+        forward_button.onclick = function() {
+            match_set_active(element["id"])
+        }
+        forward_icon.classList.add("fa-solid", "fa-play")
+        if (element["piste_occupied"] == false) {
+            forward_icon.classList.add("fa-beat")
+        }
+    } else {
+        forward_button_wrapper.classList.add("forward-button-blocked")
+        forward_icon.classList.add("fa-solid", "fa-ban")
+    }
+    forward_button_wrapper.appendChild(forward_icon)
+    forward_button.appendChild(forward_button_wrapper)
+
+    let options_button = document.createElement('div')
+    options_button.classList.add("options", "cell", "last-column")
+    let options_button_wrapper = document.createElement('div')
+    options_button_wrapper.classList.add("option-button-wrapper")
+    let options_icon = document.createElement('i')
+    options_icon.classList.add("fa-solid", "fa-gear")
+    options_button_wrapper.appendChild(options_icon)
+    options_button.onclick = function() {
+        openMatchOptions(item, matches_table, element["id"])
+    }
+    options_button.appendChild(options_button_wrapper)
+
+    item.appendChild(group)
+    item.appendChild(piste)
+    item.appendChild(red)
+    item.appendChild(score)
+    item.appendChild(green)
+    item.appendChild(forward_button)
+    item.appendChild(options_button)
+
+    return item
+}
+
 // Set the time for the fade-in and fade-out animations
 const panelAnimationTime = 300
 
@@ -577,8 +611,16 @@ function push_score(id, green_score, red_score) {
         },
         body: JSON.stringify(data)
     })
-    .then(response => response.json())
+    .then(response => response.json(), error => {
+        // The device is offline, the score is pushed as soon as it is back online
+        queue_score(id, green_score, red_score)
+        alert("No connection to the server. The score will be pushed as soon as the connection is back.")
+        return null
+    })
     .then(data => {
+        if (data === null) {
+            return
+        }
         if (Object.keys(data).includes("error")) {
             console.log(data["error"]);
             alert_string = "Error: " + data["error"]["code"];
@@ -787,7 +829,54 @@ function toggleFilter(just_apply = false) {
     }
 }
 
+// Scores that could not be pushed are kept in the local storage and pushed together with /api/matches/push-scores.
+// Every score has an idempotency key, so scores that have reached the server before are not pushed twice.
+const score_queue_key = "score_queue_" + tournament_id
+
+function queue_score(id, green_score, red_score) {
+    let queue = JSON.parse(localStorage.getItem(score_queue_key) ?? "[]")
+    queue.push({
+        'match_id': id,
+        'green_score': green_score,
+        'red_score': red_score,
+        'idempotency_key': Date.now().toString(36) + Math.random().toString(36).slice(2),
+    })
+    localStorage.setItem(score_queue_key, JSON.stringify(queue))
+}
+
+function push_queued_scores() {
+    let queue = JSON.parse(localStorage.getItem(score_queue_key) ?? "[]")
+    if (queue.length == 0) {
+        return
+    }
+
+    fetch('/api/matches/push-scores?tournament_id=' + tournament_id, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({'scores': queue})
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (Object.keys(data).includes("error")) {
+            console.log(data["error"]);
+            return
+        }
+        // Scores queued while the request was sent stay in the queue
+        let pushed = new Set(queue.map(score => score["idempotency_key"]))
+        let remaining = JSON.parse(localStorage.getItem(score_queue_key) ?? "[]").filter(score => !pushed.has(score["idempotency_key"]))
+        localStorage.setItem(score_queue_key, JSON.stringify(remaining))
+        get_matches()
+    })
+    .catch(error => console.log(error))
+}
+
+window.addEventListener("online", push_queued_scores)
+
 window.onload = function() {
+    push_queued_scores()
+
     // if not an iframe, update the matches
     if (window.self === window.top) {
         document.getElementById("open_in_new_tab").style.display = "none"
@@ -84,9 +84,9 @@ window.onload = function () {
     piste.classList.add("Last-Banner");
     piste_container.appendChild(piste);
 
-    // Get the piste status every 5 seconds
+    // Get the piste status whenever the tournament changes (every 5 seconds without event streams)
     get_piste_status();
-    setInterval(get_piste_status, 5000);
+    subscribe_to_updates(tournament_id, get_piste_status, 5000);
 };
 
 function get_piste_status() {
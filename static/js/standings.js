@@ -238,8 +238,8 @@ window.onload = function() {
 
 }
 
-// loop to update the standings every 90 seconds
-setInterval(get_standings, 60000)
+// update the standings whenever the tournament changes, at most every 5 seconds (every 60 seconds without event streams)
+subscribe_to_updates(tournament_id, get_standings, 60000, 5000)
 
 // Listen for messages from the parent window
 window.addEventListener('message', function(event) {
@@ -0,0 +1,59 @@
+import os
+import random
+import shutil
+import sys
+import traceback
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def main(tmp_path, monkeypatch):
+    # main writes its logs, snapshots and journals relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("MAIL_ADMIN_RECIPIENTS", "admin@example.com")
+    for folder in ("logs", "approvals", "results"):
+        os.mkdir(folder)
+    shutil.copy(os.path.join(ROOT, "countries.json"), tmp_path)
+
+    import main
+    monkeypatch.setattr(main, "save_durability", "sync")
+    return main
+
+
+@pytest.fixture
+def tournament_id(main):
+    from fencer import Fencer
+    from tournament import Tournament
+
+    random.seed(1)
+    fencers = [Fencer(f"Name{i}", f"Club{i % 5}", "GER", random.choice(["M", "F"]), random.choice(["R", "L"]), str(random.randint(10, 60)), i, 1)
+               for i in range(1, 17)]
+    tournament = Tournament("T1", "Test", "Location", "test@example.com", "password", fencers, "1", "0", "0", "ko", "4", simulation_active=True)
+    tournament.allow_fencers_to_input_scores = True
+    main.save_tournament(tournament)
+    return tournament.id
+
+
+@pytest.fixture
+def other_worker():
+    if not hasattr(os, "fork"):
+        pytest.skip("Workers are simulated with forked processes")
+
+    def run(function):
+        # A forked process has its own tournament cache, response cache and change log, like another gunicorn worker
+        pid = os.fork()
+        if pid == 0:
+            try:
+                function()
+            except BaseException:
+                traceback.print_exc()
+                os._exit(1)
+            os._exit(0)
+        _, status = os.waitpid(pid, 0)
+        assert os.WEXITSTATUS(status) == 0
+
+    return run
@@ -0,0 +1,49 @@
+import time
+
+
+def match_state(tournament) -> list:
+    return [(match.id, match.piste.number if match.piste else None, match.priority, match.green_score, match.red_score,
+             match.match_ongoing, match.match_completed, match.match_ongoing_timestamp, match.match_completed_timestamp)
+            for match in tournament.match_index.values()]
+
+
+def mutate(main, tournament_id, operation, *args) -> None:
+    with main.tournament_transaction(tournament_id) as tournament:
+        getattr(tournament, operation)(*args)
+        main.record_mutation(tournament, operation, *args)
+
+
+def test_replayed_journal_restores_tournament(main, tournament_id):
+    tournament = main.get_tournament(tournament_id)
+    staged = [match.id for match in tournament.matches_of_current_preliminary_round if match.piste is not None]
+    waiting = [match.id for match in tournament.matches_of_current_preliminary_round if match.piste is None]
+    free_piste = tournament.get_match_by_id(staged[2]).piste.number
+    fencer_id = tournament.fencers[0].id
+
+    mutate(main, tournament_id, "set_active", staged[0])
+    # The timestamps of the replayed records have to be the ones of the mutation, not the time of the replay
+    time.sleep(0.01)
+    mutate(main, tournament_id, "push_score", staged[0], 5, 3)
+    mutate(main, tournament_id, "set_active", staged[1])
+    mutate(main, tournament_id, "prioritize_match", waiting[-1], 1)
+    mutate(main, tournament_id, "remove_piste_assignment", staged[2])
+    mutate(main, tournament_id, "toggle_piste", free_piste)
+    mutate(main, tournament_id, "change_fencer_attribute", fencer_id, "name", "Renamed")
+    mutate(main, tournament_id, "push_scores", [[staged[1], 2, 5, "key"]], "2024-01-01T12:00:00")
+
+    tournament = main.get_tournament(tournament_id)
+    assert tournament.journal_sequence == 8
+    assert [record["op"] for record in main.journal.read(tournament_id)[0]] == ["set_active", "push_score", "set_active", "prioritize_match",
+                                                                               "remove_piste_assignment", "toggle_piste", "change_fencer_attribute", "push_scores"]
+
+    # Drop the tournament from the cache, it is loaded from the snapshot and the journal is replayed
+    main.tournament_registry.remove(tournament_id)
+    time.sleep(0.01)
+    replayed = main.get_tournament(tournament_id)
+    assert replayed is not tournament
+    assert (replayed.version, replayed.journal_sequence, replayed.revision) == (tournament.version, tournament.journal_sequence, tournament.revision)
+    assert match_state(replayed) == match_state(tournament)
+    assert any(piste.disabled for piste in tournament.pistes)
+    assert [piste.disabled for piste in replayed.pistes] == [piste.disabled for piste in tournament.pistes]
+    assert replayed.get_fencer_by_id(fencer_id).name == "Renamed"
+    assert replayed.score_keys == tournament.score_keys
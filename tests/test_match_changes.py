@@ -0,0 +1,53 @@
+def test_changes_after_snapshot_of_other_worker(main, tournament_id, other_worker):
+    client = main.app.test_client()
+
+    initial = client.get("/api/matches/update", query_string={"tournament_id": tournament_id, "since": ""}).get_json()
+    match = next(match for match in main.get_tournament(tournament_id).matches_of_current_preliminary_round if not match.match_completed)
+    # A rejected score must not change the revision of this worker only
+    client.post("/api/matches/push-score", query_string={"tournament_id": tournament_id, "match_id": match.id}, json={"green_score": 3, "red_score": 3})
+
+    def finish_round():
+        other_client = main.app.test_client()
+        for match in list(main.get_tournament(tournament_id).matches_of_current_preliminary_round):
+            if not match.match_completed:
+                other_client.post("/api/matches/push-score", query_string={"tournament_id": tournament_id, "match_id": match.id},
+                                  json={"green_score": 5, "red_score": 1})
+        with main.tournament_transaction(tournament_id) as tournament:
+            tournament.next_stage()
+            main.save_tournament(tournament)
+
+    other_worker(finish_round)
+
+    full = client.get("/api/matches/update", query_string={"tournament_id": tournament_id, "since": ""}).get_json()
+    delta = client.get("/api/matches/update", query_string={"tournament_id": tournament_id, "since": initial["revision"]}).get_json()
+
+    assert full["stage"] != initial["stage"]
+    assert delta["revision"] == full["revision"]
+    assert delta["stage"] == full["stage"]
+    # The matches of the new stage are all new, the client has to replace its rows
+    assert delta["full"]
+    assert delta["matches"] == full["matches"]
+
+
+def test_changes_after_scores_of_other_worker(main, tournament_id, other_worker):
+    client = main.app.test_client()
+
+    initial = client.get("/api/matches/update", query_string={"tournament_id": tournament_id, "since": ""}).get_json()
+    match = next(match for match in main.get_tournament(tournament_id).matches_of_current_preliminary_round if not match.match_completed)
+
+    def push_score():
+        main.app.test_client().post("/api/matches/push-score", query_string={"tournament_id": tournament_id, "match_id": match.id},
+                                    json={"green_score": 5, "red_score": 2})
+        with main.tournament_transaction(tournament_id) as tournament:
+            main.save_tournament(tournament)
+
+    other_worker(push_score)
+
+    full = client.get("/api/matches/update", query_string={"tournament_id": tournament_id, "since": ""}).get_json()
+    delta = client.get("/api/matches/update", query_string={"tournament_id": tournament_id, "since": initial["revision"]}).get_json()
+
+    assert delta["revision"] == full["revision"] != initial["revision"]
+    assert not delta["full"]
+    changed = {row["id"]: row for row in delta["matches"]}
+    assert match.id in changed
+    assert changed[match.id] == next(row for row in full["matches"] if row["id"] == match.id)
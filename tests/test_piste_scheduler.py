@@ -0,0 +1,66 @@
+import random
+import types
+
+from exceptions import PisteError, TournamentError
+
+
+def resort_assign_pistes(self):
+    # The assignment before PisteScheduler: all matches sorted by priority, each one on the least occupied free piste
+    for match in sorted(self.match_index.values(), key=lambda match: match.priority, reverse=True):
+        if (match.piste is None and not match.match_completed and not match.wildcard_or_disq
+                and not (match.green.is_staged or match.red.is_staged) and not (match.green.in_match and match.red.in_match)):
+            for piste in sorted(self.pistes, key=lambda piste: piste.occupied):
+                if not piste.staged and not piste.disabled:
+                    match.assign_piste(piste)
+                    break
+
+
+def assignments(tournament) -> list:
+    return [(match.id, match.piste.number if match.piste else None, match.match_ongoing, match.match_completed)
+            for match in tournament.match_index.values()]
+
+
+def mutate(tournament, rng: random.Random) -> str:
+    try:
+        mutate_once(tournament, rng)
+    except (PisteError, TournamentError) as error:
+        # Rejected like by the routes, e.g. a disabled or occupied piste
+        return type(error).__name__
+
+
+def mutate_once(tournament, rng: random.Random) -> None:
+    matches = [match for match in tournament.match_index.values() if not match.match_completed]
+    staged = [match for match in matches if match.piste is not None and not match.match_ongoing]
+    ongoing = [match for match in matches if match.match_ongoing]
+    operation = rng.random()
+    if operation < 0.3 and staged:
+        tournament.set_active(rng.choice(staged).id)
+    elif operation < 0.6 and ongoing:
+        tournament.push_score(rng.choice(ongoing).id, 5, rng.randint(0, 4))
+    elif operation < 0.75:
+        tournament.prioritize_match(rng.choice(matches).id, rng.choice([-1, 0, 1]))
+        tournament.assign_pistes()
+    elif operation < 0.85:
+        tournament.toggle_piste(rng.randint(1, len(tournament.pistes)))
+    elif operation < 0.95 and staged:
+        tournament.remove_piste_assignment(rng.choice(staged).id)
+        if rng.random() < 0.5:
+            tournament.assign_pistes()
+    else:
+        tournament.assign_certain_piste(rng.choice(matches).id, rng.randint(1, len(tournament.pistes)))
+
+
+def test_same_assignments_as_resorting_all_matches(main, tournament_id):
+    import snapshot
+
+    data = snapshot.dumps(main.get_tournament(tournament_id))
+    tournament, reference = snapshot.loads(data), snapshot.loads(data)
+    reference.assign_pistes = types.MethodType(resort_assign_pistes, reference)
+
+    # Both tournaments get the same random mutations, including prioritized matches, removed piste assignments and toggled pistes
+    rngs = random.Random(1), random.Random(1)
+    for _ in range(300):
+        if all(match.match_completed for match in tournament.match_index.values()):
+            break
+        assert mutate(tournament, rngs[0]) == mutate(reference, rngs[1])
+        assert assignments(tournament) == assignments(reference)
@@ -0,0 +1,33 @@
+import pytest
+
+from pool_order import POOL_BOUT_ORDERS, pool_bout_order
+
+
+@pytest.mark.parametrize("size", range(3, 21))
+def test_every_pair_fences_once(size):
+    bouts = pool_bout_order(size)
+
+    pairs = [frozenset(bout) for bout in bouts]
+    assert len(pairs) == len(set(pairs)) == size * (size - 1) // 2
+    assert all(len(pair) == 2 and pair <= set(range(1, size + 1)) for pair in pairs)
+
+
+@pytest.mark.parametrize("size", range(5, 21))
+def test_no_bouts_back_to_back(size):
+    # Standard orders up to 10 fencers, computed orders for larger groups
+    assert (size in POOL_BOUT_ORDERS) == (size <= 10)
+    bouts = pool_bout_order(size)
+
+    assert not [(previous, bout) for previous, bout in zip(bouts, bouts[1:]) if set(previous) & set(bout)]
+
+
+def test_groups_of_tournament_follow_bout_order(main, tournament_id):
+    tournament = main.get_tournament(tournament_id)
+
+    groups = {}
+    for match in tournament.matches_of_current_preliminary_round:
+        groups.setdefault(match.green.prelim_group, []).append(match)
+    for matches in groups.values():
+        # Back-to-back bouts are only avoidable in groups of at least 5 fencers
+        assert len({fencer for match in matches for fencer in (match.green, match.red)}) >= 5
+        assert not [(previous, match) for previous, match in zip(matches, matches[1:]) if {previous.green, previous.red} & {match.green, match.red}]
@@ -0,0 +1,72 @@
+def push_scores(main, tournament_id, scores) -> list:
+    response = main.app.test_client().post("/api/matches/push-scores", query_string={"tournament_id": tournament_id},
+                                           json={"scores": [{"match_id": match_id, "green_score": green_score, "red_score": red_score, "idempotency_key": key}
+                                                            for match_id, green_score, red_score, key in scores]})
+    assert response.status_code == 200, response.get_json()
+    return [result["status"] for result in response.get_json()["results"]]
+
+
+def journaled_operations(main, tournament_id) -> list:
+    return [record["op"] for record in main.journal.read(tournament_id)[0]]
+
+
+def open_matches(main, tournament_id) -> list:
+    return [match.id for match in main.get_tournament(tournament_id).matches_of_current_preliminary_round if not match.match_completed]
+
+
+def test_replayed_batch_is_ignored(main, tournament_id):
+    matches = open_matches(main, tournament_id)
+    assert push_scores(main, tournament_id, [[matches[0], 5, 2, "a"], [matches[1], 3, 5, "b"]]) == ["applied", "applied"]
+    tournament = main.get_tournament(tournament_id)
+    version = tournament.version
+    operations = journaled_operations(main, tournament_id)
+
+    # The device sends the batch again, e.g. because the response got lost, even with other scores the keys win
+    assert push_scores(main, tournament_id, [[matches[0], 5, 2, "a"], [matches[1], 5, 1, "b"]]) == ["duplicate", "duplicate"]
+    tournament = main.get_tournament(tournament_id)
+    assert tournament.version == version
+    assert journaled_operations(main, tournament_id) == operations
+    assert (tournament.match_index[matches[1]].green_score, tournament.match_index[matches[1]].red_score) == (3, 5)
+
+
+def test_partially_rejected_batch_is_journaled(main, tournament_id):
+    matches = open_matches(main, tournament_id)
+    version = main.get_tournament(tournament_id).version
+
+    # A tie and an unknown match are rejected, the other score is applied
+    assert push_scores(main, tournament_id, [[matches[0], 4, 4, "a"], ["unknown", 5, 0, "b"], [matches[1], 5, 2, "c"]]) == ["invalid", "not_found", "applied"]
+    assert journaled_operations(main, tournament_id)[-1] == "push_scores"
+    assert main.get_tournament(tournament_id).version == version + 1
+
+    # The applied score survives loading the tournament from the journal
+    main.tournament_registry.remove(tournament_id)
+    reloaded = main.get_tournament(tournament_id)
+    assert reloaded.match_index[matches[1]].match_completed
+    assert not reloaded.match_index[matches[0]].match_completed
+    assert "c" in reloaded.score_keys and "a" not in reloaded.score_keys
+
+
+def test_rejected_batch_is_not_journaled(main, tournament_id):
+    matches = open_matches(main, tournament_id)
+    version = main.get_tournament(tournament_id).version
+    operations = journaled_operations(main, tournament_id)
+
+    assert push_scores(main, tournament_id, [[matches[0], 4, 4, "a"], ["unknown", 5, 0, "b"]]) == ["invalid", "not_found"]
+    assert journaled_operations(main, tournament_id) == operations
+    assert main.get_tournament(tournament_id).version == version
+
+
+def test_oldest_score_keys_are_forgotten(main, tournament_id, monkeypatch):
+    from tournament import Tournament
+
+    monkeypatch.setattr(Tournament, "MAX_SCORE_KEYS", 2)
+    matches = open_matches(main, tournament_id)
+    assert push_scores(main, tournament_id, [[matches[0], 5, 2, "a"], [matches[1], 5, 2, "b"], [matches[2], 5, 2, "c"]]) == ["applied"] * 3
+    assert list(main.get_tournament(tournament_id).score_keys) == ["b", "c"]
+
+    # The evicted key is applied again (as a correction of the score), the remembered one is still a duplicate
+    assert push_scores(main, tournament_id, [[matches[0], 5, 3, "a"], [matches[2], 5, 4, "c"]]) == ["applied", "duplicate"]
+    tournament = main.get_tournament(tournament_id)
+    assert list(tournament.score_keys) == ["c", "a"]
+    assert tournament.match_index[matches[0]].red_score == 3
+    assert tournament.match_index[matches[2]].red_score == 2
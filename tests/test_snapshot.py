@@ -0,0 +1,58 @@
+import io
+
+
+def push_scores(main, tournament_id, count):
+    client = main.app.test_client()
+    matches = [match for match in main.get_tournament(tournament_id).matches_of_current_preliminary_round if not match.match_completed][:count]
+    for match in matches:
+        response = client.post("/api/matches/push-score", query_string={"tournament_id": tournament_id, "match_id": match.id},
+                               json={"green_score": 5, "red_score": 2})
+        assert response.status_code == 200, response.get_json()
+
+
+def test_snapshot_header(main, tournament_id):
+    import snapshot
+
+    tournament = main.get_tournament(tournament_id)
+    data = snapshot.dumps(tournament)
+
+    assert snapshot.read_state(io.BytesIO(data)) == (tournament.version, tournament.snapshot_sequence)
+    loaded = snapshot.loads(data)
+    assert loaded.version == tournament.version
+    assert [fencer.id for fencer in loaded.fencers] == [fencer.id for fencer in tournament.fencers]
+    assert loaded.match_index.keys() == tournament.match_index.keys()
+
+
+def test_compaction_of_other_worker_keeps_cached_tournament(main, tournament_id, other_worker, monkeypatch):
+    monkeypatch.setattr(main, "journal_compaction_interval", 3)
+    cached = main.get_tournament(tournament_id)
+    version = cached.version
+
+    # The third score is compacted into a new snapshot, the version only changes with the journaled scores
+    other_worker(lambda: push_scores(main, tournament_id, 3))
+    assert main.snapshot_state(tournament_id) == (version + 3, 3)
+
+    tournament = main.get_tournament(tournament_id)
+    assert tournament is cached
+    assert (tournament.version, tournament.journal_sequence) == (version + 3, 3)
+    assert sum(match.match_completed for match in tournament.matches_of_current_preliminary_round) == 3
+
+    main.tournament_registry.remove(tournament_id)
+    reloaded = main.get_tournament(tournament_id)
+    assert (reloaded.version, reloaded.journal_sequence) == (tournament.version, tournament.journal_sequence)
+
+
+def test_snapshot_of_other_worker_after_unjournaled_mutation_is_loaded(main, tournament_id, other_worker):
+    cached = main.get_tournament(tournament_id)
+
+    def rename():
+        with main.tournament_transaction(tournament_id) as tournament:
+            tournament.name = "Renamed"
+            main.save_tournament(tournament)
+
+    other_worker(rename)
+
+    tournament = main.get_tournament(tournament_id)
+    assert tournament is not cached
+    assert tournament.name == "Renamed"
+    assert tournament.version == cached.version + 1
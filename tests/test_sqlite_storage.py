@@ -0,0 +1,88 @@
+import pytest
+
+
+@pytest.fixture
+def storage(main, tournament_id, monkeypatch):
+    import sqlite_storage
+
+    monkeypatch.setattr(main, "enable_sqlite_storage", True)
+    with main.tournament_transaction(tournament_id) as tournament:
+        main.save_tournament(tournament)
+    return sqlite_storage
+
+
+def stored_rows(storage, tournament_id) -> dict:
+    connection = storage.connect()
+    rows = {}
+    for table, columns in storage.TABLE_COLUMNS.items():
+        rows[table] = {tuple(row[:storage.TABLE_KEYS[table]]): tuple(row)
+                       for row in connection.execute(f"SELECT {', '.join(columns)} FROM {table} WHERE {columns[0]} = ?", (tournament_id,))}
+    return rows
+
+
+def expected_rows(storage, tournament) -> dict:
+    # Booleans are stored as integers
+    return {table: {key: tuple(int(value) if type(value) is bool else value for value in row) for key, row in rows.items()}
+            for table, rows in storage.tournament_rows(tournament).items()}
+
+
+def push_score(main, tournament_id, match_id, green_score=5, red_score=2):
+    response = main.app.test_client().post("/api/matches/push-score", query_string={"tournament_id": tournament_id, "match_id": match_id},
+                                           json={"green_score": green_score, "red_score": red_score})
+    assert response.status_code == 200, response.get_json()
+
+
+def test_mutations_only_write_their_rows(main, tournament_id, storage, other_worker, monkeypatch):
+    written = []
+    sync_tournament = storage.sync_tournament
+    monkeypatch.setattr(storage, "sync_tournament", lambda *args: written.append(sync_tournament(*args)) or written[-1])
+
+    matches = [match.id for match in main.get_tournament(tournament_id).matches_of_current_preliminary_round]
+    waiting = [match.id for match in main.get_tournament(tournament_id).matches_of_current_preliminary_round if match.piste is None]
+    def journal_without_rows():
+        # Like a worker with write-behind durability that has not flushed its rows yet
+        with main.tournament_transaction(tournament_id) as tournament:
+            tournament.push_score(waiting[-1], 5, 3)
+            main.journal.append(tournament, "push_score", waiting[-1], 5, 3)
+
+    push_score(main, tournament_id, matches[0])
+    other_worker(journal_without_rows)
+    # The score of the other worker is replayed before this mutation, and its rows are written together with the new generation
+    push_score(main, tournament_id, matches[2], 1, 5)
+    assert stored_rows(storage, tournament_id) == expected_rows(storage, main.get_tournament(tournament_id))
+    with main.tournament_transaction(tournament_id) as tournament:
+        tournament.toggle_piste(4)
+        main.record_mutation(tournament, "toggle_piste", 4)
+        fencer_id = tournament.matches_of_current_preliminary_round[3].green.id
+        tournament.disqualify_fencer(fencer_id, "Test")
+        main.record_mutation(tournament, "disqualify_fencer", fencer_id, "Test")
+
+    tournament = main.get_tournament(tournament_id)
+    assert stored_rows(storage, tournament_id) == expected_rows(storage, tournament)
+    # A score writes the match, its fencers, the pistes and the matches staged on them, not all rows of the tournament
+    assert 0 < written[0] <= 3 + 2 * len(tournament.pistes) + 2 * len(tournament.pistes)
+
+
+def test_match_changes_from_storage(main, tournament_id, storage, monkeypatch):
+    client = main.app.test_client()
+    initial = client.get("/api/matches/update", query_string={"tournament_id": tournament_id, "since": ""}).get_json()
+    assert initial["full"]
+
+    match = next(match for match in main.get_tournament(tournament_id).matches_of_current_preliminary_round
+                 if not match.match_completed and match.piste is None)
+    push_score(main, tournament_id, match.id)
+
+    # The matches are answered from the database, without the tournament
+    monkeypatch.setattr(main, "get_tournament", lambda tournament_id: pytest.fail("The tournament has been loaded"))
+    delta = client.get("/api/matches/update", query_string={"tournament_id": tournament_id, "since": initial["revision"]}).get_json()
+    full = client.get("/api/matches/update", query_string={"tournament_id": tournament_id, "since": ""}).get_json()
+
+    assert delta["revision"] == full["revision"] != initial["revision"]
+    assert not delta["full"] and full["full"]
+    changed = {row["id"]: row for row in delta["matches"]}
+    assert match.id in changed
+    assert len(changed) < len(full["matches"])
+    assert all(row == next(other for other in full["matches"] if other["id"] == row["id"]) for row in delta["matches"])
+    # Rows that did not change since the revision are not sent again
+    unchanged = [row for row in initial["matches"] if row["id"] not in changed]
+    assert all(row in full["matches"] for row in unchanged)
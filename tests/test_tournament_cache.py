@@ -0,0 +1,51 @@
+def log_in_as_fencer(main, tournament_id, fencer_id) -> dict:
+    with main.tournament_transaction(tournament_id) as tournament:
+        tournament.add_cookie("fencer", "cookie", fencer_id)
+        main.record_mutation(tournament, "add_cookie", "fencer", "cookie", fencer_id)
+    return {"Cookie": f"{tournament_id}_fencer_{fencer_id}=cookie"}
+
+
+def test_approval_of_other_worker(main, tournament_id, other_worker):
+    fencer = main.get_tournament(tournament_id).fencers[0]
+    version = main.get_tournament(tournament_id).version
+
+    def approve():
+        headers = log_in_as_fencer(main, tournament_id, fencer.id)
+        # Without a cookie jar, the client sends the Cookie header as it is
+        client = main.app.test_client(use_cookies=False)
+        response = client.post("/api/fencer/approve-tableau", query_string={"tournament_id": tournament_id, "fencer_id": fencer.id, "group": fencer.prelim_group},
+                               json={"timestamp": "2024-01-01T12:00:00"}, headers=headers)
+        assert response.get_json()["success"], response.get_json()
+
+    other_worker(approve)
+
+    # The cached tournament of this worker is brought up to date with the journal
+    tournament = main.get_tournament(tournament_id)
+    assert tournament.get_fencer_by_id(fencer.id).approved_tableau
+    assert tournament.version > version
+
+    # The approval survives loading the tournament from disk
+    main.tournament_registry.remove(tournament_id)
+    reloaded = main.get_tournament(tournament_id)
+    assert reloaded.get_fencer_by_id(fencer.id).approved_tableau
+    assert reloaded.version == tournament.version
+
+
+def test_failed_mutation_is_not_cached(main, tournament_id):
+    client = main.app.test_client()
+    tournament = main.get_tournament(tournament_id)
+    version = tournament.version
+
+    try:
+        with main.tournament_transaction(tournament_id) as cached:
+            cached.allow_fencers_to_input_scores = False
+            raise RuntimeError("Mutation failed halfway")
+    except RuntimeError:
+        pass
+
+    # The partially mutated tournament is loaded again from disk, where only persisted mutations are saved
+    reloaded = main.get_tournament(tournament_id)
+    assert reloaded is not tournament
+    assert reloaded.allow_fencers_to_input_scores
+    assert reloaded.version == version
+    assert client.get("/api/matches/update", query_string={"tournament_id": tournament_id}).status_code == 200
@@ -12,6 +12,10 @@ import random_generator
 from fencer import Fencer, Stage, Wildcard
 from match import EliminationMatch, GroupMatch, Match
 from piste import Piste
+from ranking import Ranking, ranking_key
+from change_log import MatchChangeLog
+from piste_scheduler import PisteScheduler
+from pool_order import pool_bout_order
 from exceptions import *
 import logging
 
@@ -161,39 +165,43 @@ def create_group_matches(fencers: List[List[Fencer]], stage: Stage, groups: int
 def sorting_fencers(fencers: List[Fencer]) -> List[Fencer]:
     # This method sorts fencers by overall score
     # sort by stage, win percentage, points difference, points for, points against
-    fencers = sorted(fencers, key=lambda fencer: (-(fencer.disqualified), -(fencer.final_rank if fencer.final_rank != None else float('0')), fencer.win_percentage(), fencer.points_difference_int(), fencer.statistics["overall"]["points_for"], fencer.statistics["overall"]["points_against"]), reverse=True)
+    # The sort is stable, fencers with the same score keep their order. Use Tournament.ranking for the fencers of a tournament.
+    fencers = sorted(fencers, key=ranking_key)
     return fencers
 
 
 def sort_matchups_in_preliminary_round(fencers: List[Fencer], matches: List[Match]) -> List[Match]:
-    # The matches in the preliminary round are sorted in the most diverse way possible. Idealy, no fencer should have two matches back to back.
-    # Initialize the dictionary of wait times
-    wait_times = {}
+    # The matches of every group are sorted by the standard bout order for the size of the group (see pool_order.py), so no fencer has two matches back to back.
+    # The groups fence at the same time, so the first match of every group comes first, then the second match of every group, etc.
+    positions = {}
+    group_sizes = {}
     for fencer in fencers:
-        if fencer.name not in wait_times:
-            wait_times[fencer.name] = 0
-
-    sorted_matches = []
-
-    while matches != []:
-        # Iterate over the matches
-        for match in matches:
-            # The match with the highest sum of wait time is chosen
-            if wait_times[match.green.name] + wait_times[match.red.name] >= max([wait_times[fencer.name] for fencer in match]) + 1:
-                # The match is removed from the list
-                matches.remove(match)
+        if fencer not in positions:
+            group_sizes[fencer.prelim_group] = group_sizes.get(fencer.prelim_group, 0) + 1
+            positions[fencer] = group_sizes[fencer.prelim_group]
+
+    # Matches by group and positions of their fencers
+    group_matches = {}
+    unordered = []
+    for match in matches:
+        if match.green in positions and match.red in positions:
+            pairing = frozenset((positions[match.green], positions[match.red]))
+            group_matches.setdefault(match.green.prelim_group, {})[pairing] = match
+        else:
+            unordered.append(match)
 
-                # The wait times of the fencers are reset
-                wait_times[match.green.name] = -10
-                wait_times[match.red.name] = -10
+    ordered_groups = []
+    for group, matches_of_group in group_matches.items():
+        ordered = [matches_of_group.pop(frozenset(bout)) for bout in pool_bout_order(group_sizes.get(group, 0)) if frozenset(bout) in matches_of_group]
+        # Matches that are not part of the bout order (e.g. if the group has changed) are fenced last
+        ordered_groups.append(ordered + list(matches_of_group.values()))
 
-                # The match is added to the list of sorted matches
-                sorted_matches.append(match)
-            
-            else:
-                # The wait times of the fencers are updated
-                wait_times[match.green.name] += 1
-                wait_times[match.red.name] += 1
+    sorted_matches = []
+    for bout in range(max((len(ordered) for ordered in ordered_groups), default=0)):
+        for ordered in ordered_groups:
+            if bout < len(ordered):
+                sorted_matches.append(ordered[bout])
+    sorted_matches += unordered
 
     for id in range(1, len(sorted_matches) + 1):
         sorted_matches[id - 1].sorting_id = id
@@ -371,6 +379,22 @@ class Tournament:
 
         # --------------------
 
+        # Indexes (see build_indexes)
+        self.match_index = {} # Match ID -> Match, for all matches in all_matches
+        self.fencer_matches = {} # Fencer ID -> Matches of the fencer in match_index, in the order of their rounds
+        self.pairing_index = {} # (Preliminary round, green fencer ID, red fencer ID) -> GroupMatch
+        self.piste_scheduler = PisteScheduler() # Matches waiting for a piste, see assign_pistes
+        self.fencer_index = {} # Fencer ID -> Fencer
+        self.start_number_index = {} # Start number -> Fencer
+        self.group_index = {} # Preliminary group -> Fencers of the group, in the order of self.fencers
+        self.attribute_index = {} # (Attribute, value) -> Fencers with this gender or handedness
+        self.age_index = {} # Age -> Fencers of this age
+        self.ranking: Ranking = None # Fencers ordered by their current rank, see ranking.py
+        self.index_fencers()
+        self.match_log = MatchChangeLog() # Rows of the current matches and the revisions they have changed in, see get_match_changes
+
+        # --------------------
+
         # List of fencers in the preliminary round
         self.preliminary_fencers = []
         self.preliminary_matches = [list() for _ in range(self.num_preliminary_rounds)] # 2D list of Preliminary Rounds -> Matches
@@ -407,12 +431,124 @@ class Tournament:
         self.master_cookies = [] 
         self.referee_cookies = [] 
 
+        # --------------------
+        # Idempotency keys of the pushed scores (see push_scores), only the last MAX_SCORE_KEYS are kept
+        self.score_keys = {} # Idempotency key -> Match ID, in the order they have been pushed
+
+        # --------------------
+        # Journal (see journal.py)
+        self.journal_sequence = 0 # Sequence number of the last mutation applied to this object
+        self.snapshot_sequence = 0 # Sequence number of the last mutation contained in the saved snapshot
+        self.version = 0 # Incremented with every journaled mutation and saved snapshot, identifies the state of the tournament for cached responses
+
         # --------------------
         # Logging
         logger.info(f"Created tournament {self.name} ({self.id}) with {len(self.fencers)} fencers")
         logger.debug(f"Simulation is {'active' if self.simulation_active else 'inactive'}")
 
     
+    def __getstate__(self) -> dict:
+        # Indexes are derived from the matches and fencers, they are not saved but rebuilt when the tournament is loaded
+        state = self.__dict__.copy()
+        for attribute in self.INDEXES:
+            state.pop(attribute, None)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        # Snapshots saved by older versions do not contain all attributes
+        state.setdefault("journal_sequence", 0)
+        state.setdefault("snapshot_sequence", 0)
+        state.setdefault("version", state["journal_sequence"])
+        state.setdefault("score_keys", {})
+        self.__dict__.update(state)
+        self.build_indexes()
+
+
+    # Devices only resend the scores they have queued while offline, older keys are dropped
+    MAX_SCORE_KEYS = 1024
+
+    # ---| Indexes |---
+    # Lookup tables kept in sync with the matches and fencers, so that requests do not have to scan them
+    INDEXES = ("match_index", "fencer_matches", "pairing_index", "fencer_index", "start_number_index", "group_index", "attribute_index", "age_index", "ranking", "match_log", "piste_scheduler")
+
+    def build_indexes(self) -> None:
+        self.match_index = {}
+        self.fencer_matches = {}
+        self.pairing_index = {}
+        self.piste_scheduler = PisteScheduler()
+        for round in self.preliminary_matches:
+            self.index_matches(round)
+        self.index_matches(self.elimination_matches)
+        self.index_fencers()
+        self.index_groups()
+        self.index_pistes()
+        self.match_log = MatchChangeLog()
+
+    def index_matches(self, matches: List[Match]) -> None:
+        for match in matches:
+            self.match_index[match.id] = match
+            self.fencer_matches.setdefault(match.green.id, []).append(match)
+            self.fencer_matches.setdefault(match.red.id, []).append(match)
+            if isinstance(match, GroupMatch):
+                self.pairing_index[(match.prelim_round, match.green.id, match.red.id)] = match
+        self.piste_scheduler.extend(matches)
+
+    def unindex_matches(self, matches: List[Match]) -> None:
+        for match in matches:
+            if self.match_index.pop(match.id, None) is not None:
+                self.piste_scheduler.remove(match)
+                for fencer in match:
+                    self.fencer_matches[fencer.id] = [other for other in self.fencer_matches[fencer.id] if other is not match]
+                if isinstance(match, GroupMatch):
+                    self.pairing_index.pop((match.prelim_round, match.green.id, match.red.id), None)
+
+    def index_fencers(self) -> None:
+        # If ids or start numbers are not unique, the first fencer is found, as with a search through self.fencers
+        self.fencer_index = {}
+        self.start_number_index = {}
+        self.attribute_index = {}
+        self.age_index = {}
+        for fencer in self.fencers:
+            self.fencer_index.setdefault(fencer.id, fencer)
+            self.start_number_index.setdefault(fencer.start_number, fencer)
+            self.index_fencer_attributes(fencer)
+        self.ranking = Ranking(self.fencers)
+
+    def index_fencer_attributes(self, fencer: Fencer) -> None:
+        # Buckets for the filters of the standings
+        self.attribute_index.setdefault(("gender", fencer.gender), set()).add(fencer)
+        self.attribute_index.setdefault(("handedness", fencer.handedness), set()).add(fencer)
+        try:
+            self.age_index.setdefault(int(fencer.age), set()).add(fencer)
+        except (TypeError, ValueError):
+            pass # Fencers without a (valid) age are not in any age group
+
+    def unindex_fencer_attributes(self, fencer: Fencer) -> None:
+        for key in (("gender", fencer.gender), ("handedness", fencer.handedness)):
+            self.attribute_index.get(key, set()).discard(fencer)
+        try:
+            self.age_index.get(int(fencer.age), set()).discard(fencer)
+        except (TypeError, ValueError):
+            pass
+
+    def index_pistes(self) -> None:
+        # Restores the matches referenced by the pistes, which are maintained by the Match methods afterwards
+        for match in self.match_index.values():
+            if match.piste is not None and not match.match_completed:
+                if match.match_ongoing:
+                    match.piste.ongoing_matches.append(match)
+                elif match.piste.staged_match is None:
+                    match.piste.staged_match = match
+
+    def index_groups(self) -> None:
+        # Has to be called whenever the preliminary groups are assigned
+        self.group_index = {}
+        for fencer in self.fencers:
+            if fencer.prelim_group is not None:
+                self.group_index.setdefault(fencer.prelim_group, []).append(fencer)
+        self.ranking.index_groups()
+
+    
     # ---| Properties |---
     
     @property
@@ -427,20 +563,18 @@ class Tournament:
 
     @property
     def all_matches(self) -> List[Match]:
-        matches = []
-        for round in self.preliminary_matches:
-            matches.extend(round)
-        matches.extend(self.elimination_matches)
+        # All preliminary matches and the matches of the current elimination round. Iterate over match_index.values() to avoid the copy.
+        return list(self.match_index.values())
 
-        return matches
+    @property
+    def revision(self) -> str:
+        # Changes whenever the tournament is changed, and is the same in every worker for the same state (the version only changes with the journal and the snapshots)
+        return f"{self.version}.{self.journal_sequence}"
 
 
     # ---| Misc |---
     def get_fencer_rank(self, fencer_id: str) -> int:
-        fencers = sorting_fencers(self.fencers)
-        for i, fencer in enumerate(fencers):
-            if fencer.id == fencer_id:
-                return i + 1
+        return self.ranking.rank(self.fencer_index.get(fencer_id))
 
 
     # --- Creating Rounds ---
@@ -448,8 +582,11 @@ class Tournament:
     def create_preliminary_round(self) -> None:
         # Create preliminary round
         self.preliminary_fencers = self.fencers
+        self.unindex_matches(self.matches_of_current_preliminary_round)
         self.preliminary_matches[self.preliminary_stage - 1] = create_group_matches(self.preliminary_fencers, self.stage, groups=self.num_preliminary_groups, prelim_round=self.preliminary_stage - 1)
+        self.index_groups()
         self.preliminary_matches[self.preliminary_stage - 1] = sort_matchups_in_preliminary_round(self.preliminary_fencers , self.matches_of_current_preliminary_round)
+        self.index_matches(self.matches_of_current_preliminary_round)
         self.assign_pistes()
 
 
@@ -459,7 +596,7 @@ class Tournament:
         # If it is the first elimination round, sort the fencers by overall score and append them to the elimination fencers list
         if self.elimination_matches == []:
             # Sort the fencers by overall score from Preliminary Round
-            self.elimination_fencers = [sorting_fencers(self.fencers)]
+            self.elimination_fencers = [self.ranking.ranked()]
             # If the first elimination round is customarily set, the list of fencers is cut to the length of the first elimination round
             if self.first_elimination_round != None:
                 self.elimination_fencers = self.elimination_fencers[(self.first_elimination_round ** 2):]
@@ -469,9 +606,13 @@ class Tournament:
 
         else:
             self.elimination_fencers = next_tree_node(self.elimination_fencers, self.stage.value, self.elimination_mode, final = final)
+            # The eliminated fencers got their final rank
+            self.ranking.build()
 
         if self.elimination_matches != []: self.elimination_matches_archive.append(self.elimination_matches)
+        self.unindex_matches(self.elimination_matches)
         self.elimination_matches = matchmaker_elimination(self.elimination_fencers, self.elimination_mode, self.stage)
+        self.index_matches(self.elimination_matches)
         self.assign_pistes()
 
         for fencer in self.fencers:
@@ -479,38 +620,9 @@ class Tournament:
 
 
     def assign_pistes(self):
+        # Matches are staged by priority on the pistes that are not staged, see PisteScheduler
         logger.debug("Piste assignment")
-        matches = sorted(self.all_matches, key=lambda match: match.priority, reverse=True)
-        for match in matches:
-            if (
-                match.piste == None
-                and
-                match.match_completed == False
-                and
-                match.wildcard_or_disq == False
-                and
-
-                not (
-                    match.green.is_staged
-                    or
-                    match.red.is_staged
-                )
-
-                and
-
-                not (
-                    match.green.in_match
-                    and
-                    match.red.in_match
-                )
-            ):
-                for piste in sorted(self.pistes, key=lambda piste: piste.occupied):
-                    if not piste.staged and not piste.disabled:
-                        match.assign_piste(piste)
-                        break
-                else:
-                    # break
-                    pass
+        self.piste_scheduler.assign(self.pistes)
 
 
     def generate_matches(self) -> None:
@@ -532,47 +644,35 @@ class Tournament:
             "standings": [],
         }
 
-        # Sort fencers by overall score
-        fencers = sorting_fencers(self.fencers)
-
-
         if not group:
             group = "all"
 
-        # If a specific group is requested, only return the fencers of that group
+        # Sort fencers by overall score, if a specific group is requested, only return the fencers of that group
         if group != "all" and self.stage == Stage.PRELIMINARY_ROUND:
-            filtered_fencers = []
-            for fencer in fencers:
-                if fencer.prelim_group == int(group):
-                    filtered_fencers.append(fencer)
-            fencers = filtered_fencers
+            fencers = self.ranking.ranked_group(int(group))
+        else:
+            fencers = self.ranking.ranked()
         
+        # Filter by the buckets of the requested attributes (see index_fencer_attributes), the order of the ranking is kept
+        buckets = []
         if gender != None:
-            filtered_fencers = []
-            for fencer in fencers:
-                if fencer.gender == gender:
-                    filtered_fencers.append(fencer)
-            fencers = filtered_fencers
+            buckets.append(self.attribute_index.get(("gender", gender), set()))
 
         if handedness != None:
-            filtered_fencers = []
-            for fencer in fencers:
-                if fencer.handedness == handedness:
-                    filtered_fencers.append(fencer)
-            fencers = filtered_fencers
-        
+            buckets.append(self.attribute_index.get(("handedness", handedness), set()))
+
         if age_group != None:
-            filtered_fencers = []
             age_range = age_group.split("-")
-            for fencer in fencers:
-                if int(fencer.age) >= int(age_range[0]) and int(fencer.age) <= int(age_range[1]):
-                    filtered_fencers.append(fencer)
-            fencers = filtered_fencers
+            youngest, oldest = int(age_range[0]), int(age_range[1])
+            buckets.append(set().union(*(fencers_of_age for age, fencers_of_age in self.age_index.items() if youngest <= age <= oldest)))
 
+        if buckets:
+            selected = set.intersection(*buckets)
+            fencers = [fencer for fencer in fencers if fencer in selected]
 
-        for fencer in fencers:
+        for rank, fencer in enumerate(fencers, start=1):
             standings["standings"].append({
-                "rank": fencers.index(fencer) + 1,
+                "rank": rank,
                 "id": fencer.id,
                 "name": fencer.short_str,
                 "club": fencer.club,
@@ -593,54 +693,68 @@ class Tournament:
 
     def get_matches(self) -> dict:
         if self.stage == Stage.PRELIMINARY_ROUND:
-            dictionary = {
+            return {
                 "stage": self.stage.name.replace("_", " ") + f" {self.preliminary_stage}",
-                "matches": [],
+                "matches": [self.get_match_row(match, match.group) for match in self.matches_of_current_preliminary_round],
             }
-            for match in self.matches_of_current_preliminary_round:
-                dictionary["matches"].append({
-                    "id": match.id,
-                    "group": match.group,
-                    "piste": match.piste_str,
-                    "green": match.green.short_str,
-                    "green_id": match.green.id,
-                    "green_nationality": match.green.nationality,
-                    "green_score": match.green_score,
-                    "red": match.red.short_str,
-                    "red_id": match.red.id,
-                    "red_nationality": match.red.nationality,
-                    "red_score": match.red_score,
-                    "ongoing": match.match_ongoing,
-                    "complete": match.match_completed,
-                    "piste_occupied": match.piste.occupied if match.piste else None,
-                    "priority": match.priority,
-                })
-            return dictionary
 
         else:
-            dictionary = {
+            return {
                 "stage": self.stage.name,
-                "matches": [],
+                "matches": [self.get_match_row(match, match.stage.name.replace("_", " ").title()) for match in self.elimination_matches],
             }
-            for match in self.elimination_matches:
-                dictionary["matches"].append({
-                    "id": match.id,
-                    "group": match.stage.name.replace("_", " ").title(),
-                    "piste": match.piste_str,
-                    "green": match.green.short_str,
-                    "green_id": match.green.id,
-                    "green_nationality": match.green.nationality,
-                    "green_score": match.green_score,
-                    "red": match.red.short_str,
-                    "red_id": match.red.id,
-                    "red_nationality": match.red.nationality,
-                    "red_score": match.red_score,
-                    "ongoing": match.match_ongoing,
-                    "complete": match.match_completed,
-                    "piste_occupied": match.piste.occupied if match.piste else None,
-                    "priority": match.priority,
-                })
-            return dictionary
+
+
+    def get_match_row(self, match: Match, group) -> dict:
+        return {
+            "id": match.id,
+            "group": group,
+            "piste": match.piste_str,
+            "green": match.green.short_str,
+            "green_id": match.green.id,
+            "green_nationality": match.green.nationality,
+            "green_score": match.green_score,
+            "red": match.red.short_str,
+            "red_id": match.red.id,
+            "red_nationality": match.red.nationality,
+            "red_score": match.red_score,
+            "ongoing": match.match_ongoing,
+            "complete": match.match_completed,
+            "piste_occupied": match.piste.occupied if match.piste else None,
+            "priority": match.priority,
+        }
+
+
+    def get_match_changes(self, since: str) -> dict:
+        """
+        Returns the matches that have changed since a revision of the tournament, see :class:`change_log.MatchChangeLog`.
+
+        Parameters
+        ----------
+        since : str
+            The revision (see :attr:`revision`) the client has seen last, or None.
+
+        Returns
+        -------
+        dict
+            Like :meth:`get_matches`, with the current "revision". If "full" is False, "matches" only contains the changed matches,
+            and "removed" the ids of the matches that are gone. Otherwise (unknown revision), "matches" contains all matches.
+        """
+        revision = self.revision
+        dictionary = self.get_matches()
+        # Rows built while the tournament was mutated are not logged, they may belong to the next revision
+        if self.revision == revision:
+            self.match_log.sync(revision, dictionary["stage"], dictionary["matches"])
+
+        changes = self.match_log.changes_since(since) if since else None
+        dictionary["revision"] = revision
+        if changes is None or dictionary["stage"] != self.match_log.stage:
+            dictionary["full"] = True
+            dictionary["removed"] = []
+        else:
+            dictionary["full"] = False
+            dictionary["matches"], dictionary["removed"] = changes
+        return dictionary
 
 
     def get_matches_left(self) -> str:
@@ -684,16 +798,10 @@ class Tournament:
                 match_on_piste = None
 
             elif piste.occupied:
-                for match in self.all_matches:
-                    if match.piste == piste and match.match_ongoing:
-                        match_on_piste = match
-                        break
+                match_on_piste = piste.ongoing_match
 
             elif piste.staged:
-                for match in self.all_matches:
-                    if match.piste == piste and not match.match_completed and not match.match_ongoing:
-                        match_on_piste = match
-                        break
+                match_on_piste = piste.staged_match
             
             piste_status.append({
                 "status": piste.status,
@@ -713,15 +821,17 @@ class Tournament:
             self.pistes[piste - 1].disabled = False
             print(f"Piste {piste} enabled.")
         else:
-            for match in self.all_matches:
+            # Disabling a piste is rare, so all matches are checked, including the ones left on the piste by remove_piste_assignment
+            for match in self.match_index.values():
                 if (
                     match.piste == self.pistes[piste - 1]
                     and
                     not match.match_completed
                 ):
-                    match.piste = None
+                    match.remove_piste()
                     match.green.is_staged = False
                     match.red.is_staged = False
+                    self.piste_scheduler.update(match)
             self.pistes[piste - 1].disable()
                 
 
@@ -729,20 +839,13 @@ class Tournament:
         self.assign_pistes()
 
     def get_fencer_object(self, fencer_id: int) -> Fencer:
-        for fencer in self.fencers:
-            if fencer.id == fencer_id:
-                return fencer
-        return None
+        return self.fencer_index.get(fencer_id)
 
     def get_current_rank(self, fencer: Fencer) -> int:
-        return sorting_fencers(self.fencers).index(fencer) + 1
+        return self.ranking.rank(fencer)
 
     def get_current_group_rank(self, fencer: Fencer) -> int:
-        group = []
-        for rank in sorting_fencers(self.fencers):
-            if fencer.prelim_group == rank.prelim_group:
-                group.append(rank)
-        return group.index(fencer) + 1
+        return self.ranking.group_rank(fencer)
                 
 
     def get_opponent(self, fencer: Fencer, match: Match) -> dict:
@@ -765,7 +868,14 @@ class Tournament:
         fencer = self.get_fencer_object(fencer_id)
         if fencer:
             next_matches = []
-            for match in self.matches_of_current_preliminary_round if self.stage == Stage.PRELIMINARY_ROUND else self.elimination_matches:
+            for match in self.fencer_matches.get(fencer.id, []):
+                # Only the matches of the current round (the index also contains the preliminary matches of earlier rounds)
+                if self.stage == Stage.PRELIMINARY_ROUND:
+                    if not isinstance(match, GroupMatch) or match.prelim_round != self.preliminary_stage - 1:
+                        continue
+                elif not isinstance(match, EliminationMatch):
+                    continue
+
                 if (match.green == fencer or match.red == fencer) and not match.match_completed:
                     next_matches.append({
                         "id": match.id,
@@ -820,18 +930,76 @@ class Tournament:
     # --- POST Request handling from client ---
 
     def push_score(self, match_id: int, green_score: int, red_score: int) -> None:
-        for match in self.all_matches:
-            if match.id == match_id:
-                if match.match_completed:
-                    self.correct_score(match, green_score, red_score)
-                else:
-                    match.input_results(green_score, red_score)
-                    green_rank = self.get_fencer_rank(match.green.id)
-                    red_rank = self.get_fencer_rank(match.red.id)
-                    match.green.update_rank(green_rank)
-                    match.red.update_rank(red_rank)
+        match = self.match_index.get(match_id)
+        if match is not None:
+            self.input_score(match, green_score, red_score)
+
+        self.assign_pistes()
+
+
+    def push_scores(self, scores: List[list], timestamp: str) -> List[str]:
+        """
+        Pushes the scores of several matches at once, e.g. the results a referee's device has queued while it was offline.
+        Pistes are only assigned once, after all scores have been pushed.
+
+        Every score can carry an idempotency key. Scores whose key has been pushed before are ignored,
+        so a device can safely send its queued scores again if it did not receive the response.
+        Only the last ``MAX_SCORE_KEYS`` keys are remembered.
+
+        Parameters
+        ----------
+        scores : List[list]
+            The scores as [match id, green score, red score, idempotency key or None].
+        timestamp : str
+            The time the scores were pushed (ISO format), set as completion time of the matches so that replaying the journal restores it.
+
+        Returns
+        -------
+        List[str]
+            The result of every score: "applied", "duplicate" (the key has been pushed before), "not_found" (no such match) or "invalid" (e.g. a tie).
+            If no score has been applied, the tournament is unchanged.
+        """
+        results = []
+        for match_id, green_score, red_score, key in scores:
+            match = self.match_index.get(match_id)
+            if key is not None and key in self.score_keys:
+                results.append("duplicate")
+            elif match is None:
+                results.append("not_found")
+            else:
+                completed_timestamp = match.match_completed_timestamp if match.match_completed else None
+                try:
+                    self.input_score(match, green_score, red_score)
+                except ValueError:
+                    results.append("invalid")
+                    continue
+                # A corrected score keeps the time the match was completed
+                match.match_completed_timestamp = completed_timestamp or datetime.datetime.fromisoformat(timestamp)
+                if key is not None:
+                    self.score_keys[key] = match_id
+                    while len(self.score_keys) > self.MAX_SCORE_KEYS:
+                        del self.score_keys[next(iter(self.score_keys))]
+                results.append("applied")
+
+        if "applied" not in results:
+            return results
 
         self.assign_pistes()
+        return results
+
+
+    def input_score(self, match: Match, green_score: int, red_score: int) -> None:
+        if match.match_completed:
+            self.correct_score(match, green_score, red_score)
+        else:
+            try:
+                match.input_results(green_score, red_score)
+            finally:
+                self.ranking.update(match.green, match.red)
+            green_rank = self.get_fencer_rank(match.green.id)
+            red_rank = self.get_fencer_rank(match.red.id)
+            match.green.update_rank(green_rank)
+            match.red.update_rank(red_rank)
 
     
     def correct_score(self, match: int, green_score: int, red_score: int) -> None:
@@ -841,22 +1009,25 @@ class Tournament:
         old_red_score = match.red_score
         match.input_results(green_score, red_score, skip_update_statistics=True)
 
-        green_fencer.correct_statistics(match, red_fencer, old_green_score, old_red_score, green_score, red_score, match.prelim_round if self.stage == Stage.PRELIMINARY_ROUND else 0)
-        red_fencer.correct_statistics(match, green_fencer, old_red_score, old_green_score, red_score, green_score, match.prelim_round if self.stage == Stage.PRELIMINARY_ROUND else 0)
+        try:
+            green_fencer.correct_statistics(match, red_fencer, old_green_score, old_red_score, green_score, red_score, match.prelim_round if self.stage == Stage.PRELIMINARY_ROUND else 0)
+            red_fencer.correct_statistics(match, green_fencer, old_red_score, old_green_score, red_score, green_score, match.prelim_round if self.stage == Stage.PRELIMINARY_ROUND else 0)
+        finally:
+            # The statistics of the first fencer may have been corrected even if the second one fails
+            self.ranking.update(green_fencer, red_fencer)
 
 
     def set_active(self, match_id: int, override_flag=False) -> None:
-        for match in self.all_matches:
-            if match.id == match_id:
-                # If there is a match on the same piste, the piste staged status is not set to False
-                for match2 in self.all_matches:
-                    if match2.piste == match.piste and match2.match_ongoing:
-                        if not override_flag:
-                            raise OccupiedPisteError("Piste " + str(match.piste.number) + " is already occupied by match " + match2.id)
-                        match.set_active(staged=True)
-                        break
-                else:
-                    match.set_active()
+        match = self.match_index.get(match_id)
+        if match is not None:
+            # If there is a match on the same piste, the piste staged status is not set to False
+            match2 = match.piste.ongoing_match if match.piste is not None else None
+            if match2 is not None:
+                if not override_flag:
+                    raise OccupiedPisteError("Piste " + str(match.piste.number) + " is already occupied by match " + match2.id)
+                match.set_active(staged=True)
+            else:
+                match.set_active()
 
         self.assign_pistes()
 
@@ -865,6 +1036,7 @@ class Tournament:
         for match in (self.matches_of_current_preliminary_round if self.stage == Stage.PRELIMINARY_ROUND else self.elimination_matches):
             if match.id == match_id:
                 match.priority = value
+                self.piste_scheduler.update(match)
                 print("match " + match.id + " priority set to ", match.priority)
 
     
@@ -885,15 +1057,15 @@ class Tournament:
                 #   -> The staged status of the other piste is set to false
                 print("Case 1")
                 old_piste.staged = False
+                if old_piste.staged_match is match:
+                    old_piste.staged_match = None
 
             elif old_piste.staged and requested_piste.staged:
                 # 2. The match is already staged, and there is another match staged on the same piste
                 #   -> The matches switch piste and the staged status remains true for both
                 print("Case 2")
-                for match2 in self.all_matches:
-                    if match2.piste == requested_piste and match2.match_ongoing == False and match2.match_completed == False:
-                        match2.assign_piste(old_piste)
-                        break
+                if requested_piste.staged_match is not None:
+                    requested_piste.staged_match.assign_piste(old_piste)
 
             else:
                 raise Exception("Error in assign_certain_piste: match.piste != None, but old_piste.staged and requested_piste.staged are both false. This should not happen.")
@@ -908,10 +1080,10 @@ class Tournament:
                 # 4. The match is not staged, but there is another match staged on the same piste
                 #   -> The match is staged on the requested piste, the piste assignment for the other piste is removed
                 print("Case 4")
-                for match2 in self.all_matches:
-                    if match2.piste == requested_piste and match2.match_ongoing == False and match2.match_completed == False:
-                        match2.piste = None
-                        break
+                staged_match = requested_piste.staged_match
+                if staged_match is not None:
+                    staged_match.remove_piste()
+                    self.piste_scheduler.update(staged_match)
 
         # In all cases, the match is staged on the requested piste
         match.assign_piste(requested_piste)
@@ -922,14 +1094,41 @@ class Tournament:
         match = self.get_match_by_id(match_id)
         if match.piste != None:
             match.piste.staged = False
-            match.piste = None
+            match.remove_piste()
             match.green.is_staged = False
             match.red.is_staged = False
+            self.piste_scheduler.update(match)
         else:
             raise PisteError("Error in remove_piste_assignment: The match is not staged on a piste and therefore cannot be removed from a piste.")
 
 
 
+    def add_cookie(self, clearence: Literal["master", "referee", "fencer"], cookie_value: str, fencer_id: str = None) -> None:
+        if clearence == "master":
+            self.master_cookies.append(cookie_value)
+        elif clearence == "referee":
+            self.referee_cookies.append(cookie_value)
+        elif clearence == "fencer":
+            self.get_fencer_by_id(fencer_id).cookies.append(cookie_value)
+
+
+    def change_fencer_attribute(self, fencer_id, attribute: Literal["name", "club", "nationality", "gender", "handedness", "age"], value) -> None:
+        fencer = self.get_fencer_by_id(fencer_id)
+        self.unindex_fencer_attributes(fencer)
+        try:
+            fencer.change_attribute(attribute, value)
+        finally:
+            self.index_fencer_attributes(fencer)
+
+
+    def subscribe_fencer_to_push_notifications(self, fencer_id, token: str) -> None:
+        self.get_fencer_by_id(fencer_id).subscribe_to_push_notifications(token)
+
+
+    def unsubscribe_fencer_from_push_notifications(self, fencer_id, token: str) -> None:
+        self.get_fencer_by_id(fencer_id).unsubscribe_from_push_notifications(token)
+
+
     def next_stage(self) -> None:
 
         for piste in self.pistes:
@@ -956,6 +1155,7 @@ class Tournament:
             self.stage = Stage.FINISHED
 
             save_final_ranking(self.elimination_fencers, self.elimination_mode)
+            self.ranking.build()
             self.export_final_ranking()
 
 
@@ -975,10 +1175,10 @@ class Tournament:
     
     # ---| Search |---
     def get_fencer_by_id(self, fencer_id) -> Fencer:
-        for fencer in self.fencers:
-            if fencer.id == fencer_id:
-                return fencer
-        raise SearchError(f"Fencer with id {fencer_id} not found.")
+        fencer = self.fencer_index.get(fencer_id)
+        if fencer is None:
+            raise SearchError(f"Fencer with id {fencer_id} not found.")
+        return fencer
     
     def get_fencer_id_by_name(self, fencer_name) -> str:
         return self.get_fencer_by_name(fencer_name).id
@@ -999,28 +1199,21 @@ class Tournament:
         return self.get_fencer_by_start_number(start_number).id
     
     def get_fencer_by_start_number(self, start_number) -> Fencer:
-        if start_number < len(self.fencers):
-            for fencer in self.fencers:
-                if fencer.start_number == int(start_number):
-                    return fencer
+        if start_number < len(self.fencers) and int(start_number) in self.start_number_index:
+            return self.start_number_index[int(start_number)]
         raise SearchError(
             f"Could not match requested start number {start_number} to any fencer in the tournament.")
 
     def get_match_by_id(self, match_id) -> Match:
-        for match in self.all_matches:
-            if match.id == match_id:
-                return match
-        raise SearchError(f"Match with id {match_id} not found.")
+        match = self.match_index.get(match_id)
+        if match is None:
+            raise SearchError(f"Match with id {match_id} not found.")
+        return match
 
     def get_tableau_array(self, group) -> list:
         tableau = []
 
-        fencers_in_group = []
-        for fencer in self.fencers:
-            if fencer.prelim_group == int(group):
-                fencers_in_group.append(fencer)
-        
-        fencers_in_group = sorting_fencers(fencers_in_group)
+        fencers_in_group = self.ranking.ranked_group(int(group))
 
         # For the first row of the tableau, all fencers get a column, the first column is empty
         tableau.append([])
@@ -1053,17 +1246,19 @@ class Tournament:
                     })
                 
                 else:
-                    # Search all matches of the match
-                    for match in self.matches_of_current_preliminary_round:
-                        if match.green.id == fencer.id and match.red.id == opponent.id:
-                            tableau[-1].append({
-                                "cell_type": "result",
-                                "match_id": match.id,
-                                "finished": match.match_completed,
-                                "content": match.green_score,
-                                "win": True if match.red_score < match.green_score else False
-                            })
-                        elif match.green.id == opponent.id and match.red.id == fencer.id:
+                    # Look up the match of the two fencers in the current round
+                    match = self.pairing_index.get((self.preliminary_stage - 1, fencer.id, opponent.id))
+                    if match is not None:
+                        tableau[-1].append({
+                            "cell_type": "result",
+                            "match_id": match.id,
+                            "finished": match.match_completed,
+                            "content": match.green_score,
+                            "win": True if match.red_score < match.green_score else False
+                        })
+                    else:
+                        match = self.pairing_index.get((self.preliminary_stage - 1, opponent.id, fencer.id))
+                        if match is not None:
                             tableau[-1].append({
                                 "cell_type": "result",
                                 "match_id": match.id,
@@ -1077,29 +1272,36 @@ class Tournament:
     def get_winner(self):
         if self.stage != Stage.FINISHED:
             raise SystemError("Tournament not finished yet.")
-        return sorting_fencers(self.fencers)[0]
+        return self.ranking.first()
 
 
     def approve_tableau(self, round, group, timestamp, fencer_id, device_id):
         # TODO need to implement a check if all approvals are in before advancing to the next stage
         if self.stage == Stage.PRELIMINARY_ROUND:
             if self.preliminary_stage == int(round):
-                for fencer in self.fencers:
-                    if fencer.id == fencer_id:
-                        if register_approval(fencer_id, fencer.short_str, self.id, timestamp, round, group, device_id) and fencer.approved_tableau == False:
-                            fencer.approved_tableau = True
-                            return {"success": True, "message": "Tableau approved"}
+                fencer = self.fencer_index.get(fencer_id)
+                if fencer is not None:
+                    if register_approval(fencer_id, fencer.short_str, self.id, timestamp, round, group, device_id) and fencer.approved_tableau == False:
+                        self.set_tableau_approved(fencer_id)
+                        return {"success": True, "message": "Tableau approved"}
         return {"success": False, "message": "Tableau not approved"}
 
 
+    def set_tableau_approved(self, fencer_id) -> None:
+        fencer = self.fencer_index.get(fencer_id)
+        if fencer is not None:
+            fencer.approved_tableau = True
+
+
     def disqualify_fencer(self, fencer_id, reason = None):
         fencer = self.get_fencer_by_id(fencer_id)
         fencer.disqualify(reason)
+        self.ranking.update(fencer)
 
         logger.info(f"Fencer {fencer} disqualified for '{reason if reason else 'No reason given'}'")
 
         # All unfinished matches of the fencer are automatically finished
-        for match in self.all_matches:
+        for match in self.fencer_matches.get(fencer_id, []):
             if match.match_completed == False:
                 if match.green.id == fencer_id:
                     match.match_completed = True
@@ -1111,11 +1313,14 @@ class Tournament:
                     match.green_score = 1
                     match.wildcard_or_disq = True
                     match.green.update_statistics_wildcard_or_disq_game(self, disq = True)
+                if match.match_completed and match.piste is not None:
+                    match.release_piste()
 
 
     def revoke_disqulification(self, fencer_id):
         fencer = self.get_fencer_by_id(fencer_id)
         fencer.revoke_disqualification()
+        self.ranking.update(fencer)
         logger.info(f"Disqualification of fencer {fencer} revoked")
                 
                     
@@ -1128,11 +1333,7 @@ class Tournament:
     # --- General Information ---
     def get_num_groups(self) -> int:
         if self.stage == Stage.PRELIMINARY_ROUND:
-            num_groups = 0
-            for fencer in self.fencers:
-                if fencer.prelim_group > num_groups:
-                    num_groups = fencer.prelim_group
-            return num_groups
+            return max(self.group_index, default=0)
         else:
             return 0
 
@@ -1201,8 +1402,8 @@ class Tournament:
             csvwriter.writerow([""])
             csvwriter.writerow(["Current Ranking"])
             csvwriter.writerow(["Rank", "Name", "Club", "Nationality", "W%", "W-L", "PD", "P+", "P-", "Gender", "Handedness", "Age", "Eliminated"])
-            for fencer in sorting_fencers(self.fencers):
-                csvwriter.writerow([self.get_current_rank(fencer), fencer.short_str, fencer.club, fencer.nationality, fencer.win_percentage(), f'{fencer.statistics["overall"]["wins"]}-{fencer.statistics["overall"]["losses"]}', fencer.statistics["overall"]["points_for"] - fencer.statistics["overall"]["points_against"], fencer.statistics["overall"]["points_for"], fencer.statistics["overall"]["points_against"], fencer.gender, fencer.handedness, fencer.age, fencer.eliminated])
+            for rank, fencer in enumerate(self.ranking.ranked(), start=1):
+                csvwriter.writerow([rank, fencer.short_str, fencer.club, fencer.nationality, fencer.win_percentage(), f'{fencer.statistics["overall"]["wins"]}-{fencer.statistics["overall"]["losses"]}', fencer.statistics["overall"]["points_for"] - fencer.statistics["overall"]["points_against"], fencer.statistics["overall"]["points_for"], fencer.statistics["overall"]["points_against"], fencer.gender, fencer.handedness, fencer.age, fencer.eliminated])
 
             csvwriter.writerow([""])
             csvwriter.writerow([""])
@@ -1226,8 +1427,8 @@ class Tournament:
             csvwriter.writerow([""])
 
             csvwriter.writerow(["Rank", "Name", "Club", "Nationality", "W%", "W-L", "PD", "P+", "P-", "Gender", "Handedness", "Age", "Eliminated"])
-            for fencer in sorting_fencers(self.fencers):
-                csvwriter.writerow([self.get_current_rank(fencer), fencer.short_str, fencer.club, fencer.nationality, fencer.win_percentage(), f'{fencer.statistics["overall"]["wins"]}-{fencer.statistics["overall"]["losses"]}', fencer.statistics["overall"]["points_for"] - fencer.statistics["overall"]["points_against"], fencer.statistics["overall"]["points_for"], fencer.statistics["overall"]["points_against"], fencer.gender, fencer.handedness, fencer.age, fencer.eliminated])
+            for rank, fencer in enumerate(self.ranking.ranked(), start=1):
+                csvwriter.writerow([rank, fencer.short_str, fencer.club, fencer.nationality, fencer.win_percentage(), f'{fencer.statistics["overall"]["wins"]}-{fencer.statistics["overall"]["losses"]}', fencer.statistics["overall"]["points_for"] - fencer.statistics["overall"]["points_against"], fencer.statistics["overall"]["points_for"], fencer.statistics["overall"]["points_against"], fencer.gender, fencer.handedness, fencer.age, fencer.eliminated])
 
 
         
@@ -0,0 +1,193 @@
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import List
+
+try:
+    import fcntl
+except ImportError: # Not available on Windows, updates are then only serialized within one process
+    fcntl = None
+
+# ------- Logging -------
+try: # Error Catch for Sphinx Documentation
+    # create logger
+    logger = logging.getLogger('tournament_index')
+    logger.setLevel(logging.DEBUG)
+
+    # create console handler and set level to debug
+    ch = logging.StreamHandler()
+    ch.setLevel(logging.DEBUG)
+
+    # create file handler and set level to debug
+    fh = logging.FileHandler('logs/tournament.log')
+    fh.setLevel(logging.DEBUG)
+
+    # create formatter
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    # add formatter to ch
+    ch.setFormatter(formatter)
+    fh.setFormatter(formatter)
+
+    # add ch to logger
+    logger.addHandler(ch)
+    logger.addHandler(fh)
+
+except FileNotFoundError:
+    pass
+
+
+def metadata(tournament, snapshot_size: int, archived: bool = False) -> dict:
+    """
+    Returns the metadata of a tournament as stored in the index.
+
+    Parameters
+    ----------
+    tournament : Tournament
+        The tournament.
+    snapshot_size : int
+        The size of the snapshot file (or archive) of the tournament in bytes.
+    archived : bool, optional
+        Whether the tournament has been moved into the archive, by default False.
+
+    Returns
+    -------
+    dict
+        id, name, location, created_at (ISO format), stage (name of the Stage), num_fencers, snapshot_size and archived
+    """
+    return {
+        "id": tournament.id,
+        "name": tournament.name,
+        "location": tournament.location,
+        "created_at": tournament.created_at.isoformat(),
+        "stage": tournament.stage.name,
+        "num_fencers": len(tournament.fencers),
+        "snapshot_size": snapshot_size,
+        "archived": archived,
+    }
+
+
+class TournamentIndex:
+    """
+    Index of the metadata of all saved tournaments, stored in a single small JSON file next to the snapshots.
+
+    The index is updated whenever a snapshot is written or deleted, so that existence checks and listings
+    never have to load a tournament. Every worker keeps the index in memory and reads it again only if the file has changed.
+    """
+
+    def __init__(self, path: str):
+        """
+        Parameters
+        ----------
+        path : str
+            The path of the index file.
+        """
+        self.path = path
+        self.entries = {} # tournament id -> metadata
+        self.signature = None
+        self.lock = threading.Lock()
+
+        if hasattr(os, 'register_at_fork'):
+            # The lock may have been held by another thread of the parent while the process forked
+            os.register_at_fork(after_in_child=self.reset_lock)
+
+    def reset_lock(self) -> None:
+        self.lock = threading.Lock()
+
+    def __contains__(self, tournament_id: str) -> bool:
+        return self.get(tournament_id) is not None
+
+    def get(self, tournament_id: str) -> dict:
+        """
+        Returns the metadata of a tournament, see :func:`metadata`.
+
+        Parameters
+        ----------
+        tournament_id : str
+            The id of the tournament.
+
+        Returns
+        -------
+        dict
+            if the tournament is in the index
+        None
+            if the tournament is not in the index
+        """
+        with self.lock:
+            self.reload()
+            return self.entries.get(tournament_id)
+
+    def all(self) -> List[dict]:
+        """
+        Returns the metadata of all tournaments in the index, oldest first.
+        """
+        with self.lock:
+            self.reload()
+            return sorted(self.entries.values(), key=lambda entry: entry["created_at"])
+
+    def update(self, entry: dict) -> None:
+        """
+        Adds or replaces the metadata of a tournament.
+
+        Parameters
+        ----------
+        entry : dict
+            The metadata of the tournament, see :func:`metadata`.
+        """
+        with self.lock, self.file_lock():
+            self.reload()
+            self.entries[entry["id"]] = entry
+            self.write()
+
+    def remove(self, tournament_id: str) -> None:
+        """
+        Removes the metadata of a tournament.
+
+        Parameters
+        ----------
+        tournament_id : str
+            The id of the tournament.
+        """
+        with self.lock, self.file_lock():
+            self.reload()
+            if self.entries.pop(tournament_id, None) is not None:
+                self.write()
+
+    def reload(self) -> None:
+        # Reads the index file again if it has been changed (by this or another worker). Must be called with the lock held.
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self.entries, self.signature = {}, None
+            return
+
+        signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if signature != self.signature:
+            with open(self.path, 'r') as f:
+                self.entries = {entry["id"]: entry for entry in json.load(f)}
+            self.signature = signature
+
+    def write(self) -> None:
+        # Writes the index file atomically. Must be called with the lock and the file lock held.
+        with open(self.path + '.tmp', 'w') as f:
+            json.dump(list(self.entries.values()), f)
+        os.replace(self.path + '.tmp', self.path)
+        stat = os.stat(self.path)
+        self.signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    @contextmanager
+    def file_lock(self):
+        # Serializes updates of the index across workers
+        if not os.path.exists(os.path.dirname(self.path)):
+            os.makedirs(os.path.dirname(self.path))
+        if fcntl is None:
+            yield
+            return
+        with open(self.path + '.lock', 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
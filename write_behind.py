@@ -0,0 +1,122 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from typing import Callable
+
+# ------- Logging -------
+try: # Error Catch for Sphinx Documentation
+    # create logger
+    logger = logging.getLogger('write_behind')
+    logger.setLevel(logging.DEBUG)
+
+    # create console handler and set level to debug
+    ch = logging.StreamHandler()
+    ch.setLevel(logging.DEBUG)
+
+    # create file handler and set level to debug
+    fh = logging.FileHandler('logs/tournament.log')
+    fh.setLevel(logging.DEBUG)
+
+    # create formatter
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    # add formatter to ch
+    ch.setFormatter(formatter)
+    fh.setFormatter(formatter)
+
+    # add ch to logger
+    logger.addHandler(ch)
+    logger.addHandler(fh)
+
+except FileNotFoundError:
+    pass
+
+
+class WriteBehind:
+    """
+    Coalesces the writes of mutated tournaments.
+
+    Instead of writing a tournament after every mutation, the tournament is only marked as dirty.
+    A background thread flushes all dirty tournaments at most once per interval, so a burst of mutations
+    (e.g. scores pushed by several referees within a few seconds) results in a single write.
+    All dirty tournaments are flushed as well when the process exits.
+    """
+
+    def __init__(self, flush: Callable[[str], None], interval: int):
+        """
+        Parameters
+        ----------
+        flush : Callable[[str], None]
+            Writes everything that is pending for a tournament given its id.
+        interval : int
+            The minimum time between two flushes in milliseconds.
+        """
+        self.flush = flush
+        self.interval = interval
+
+        self.dirty = set()
+        self.lock = threading.Lock()
+        self.event = threading.Event()
+        self.thread = None
+        self.pid = None
+
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self.reset)
+
+    def reset(self) -> None:
+        # The thread does not exist in a forked child and the lock may have been held by it, dirty tournaments are flushed by the parent
+        self.lock = threading.Lock()
+        self.dirty = set()
+        self.thread = None
+
+    def mark_dirty(self, tournament_id: str) -> None:
+        """
+        Marks a tournament as dirty, so that it is flushed with the next flush.
+
+        Parameters
+        ----------
+        tournament_id : str
+            The id of the tournament.
+        """
+        with self.lock:
+            self.dirty.add(tournament_id)
+            # The thread is started lazily, so that every (forked) gunicorn worker runs its own thread
+            if self.thread is None or self.pid != os.getpid():
+                self.start()
+        self.event.set()
+
+    def is_dirty(self, tournament_id: str) -> bool:
+        with self.lock:
+            return tournament_id in self.dirty
+
+    def flush_all(self) -> None:
+        """
+        Flushes all dirty tournaments immediately.
+        """
+        with self.lock:
+            tournament_ids = self.dirty
+            self.dirty = set()
+
+        for tournament_id in tournament_ids:
+            try:
+                self.flush(tournament_id)
+            except Exception as e:
+                logger.error(f"Could not flush tournament {tournament_id}: {e}", exc_info=True)
+
+    def start(self) -> None:
+        # Must be called with the lock held
+        self.pid = os.getpid()
+        self.event = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="write-behind", daemon=True)
+        self.thread.start()
+        atexit.register(self.flush_all)
+
+    def run(self) -> None:
+        while True:
+            self.event.wait()
+            # Wait for the interval, so that further mutations are coalesced into the same flush
+            time.sleep(self.interval / 1000)
+            self.event.clear()
+            self.flush_all()